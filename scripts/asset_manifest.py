@@ -0,0 +1,137 @@
+"""
+Content-fingerprinted asset names and the build manifest.
+
+Stylesheets, scripts and figures are published under names that contain a
+hash of their content, such as ``assets/style.3f2a1c9b.css``. A changed file
+gets a new name, so published files never change and can be cached by
+browsers indefinitely. ``manifest.json`` in the output directory maps the
+logical path of every asset to its published path, and generated pages look
+up asset URLs there.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from file_sync import file_hash
+from output_files import write_atomic
+
+MANIFEST_FILE = "manifest.json"
+
+# Extensions of assets referenced from pages; other assets keep their names
+# so that relative references between them, e.g. fonts in CSS, still work
+FINGERPRINTED = (".css", ".js")
+
+HASH_LENGTH = 8
+
+
+def fingerprint(name: str, digest: str) -> str:
+    """Return a file name with a content hash before its extension."""
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{digest[:HASH_LENGTH]}{extension}"
+
+
+class AssetManifest:
+    """Mapping from logical asset paths to published, fingerprinted paths."""
+
+    def __init__(self, entries: Optional[Dict[str, str]] = None):
+        """Initialize the manifest with optional existing entries."""
+        self.entries: Dict[str, str] = dict(entries or {})
+        self._local = threading.local()
+
+    @classmethod
+    def load(cls, output_dir: str) -> "AssetManifest":
+        """Load the manifest of an output directory, keeping published entries."""
+        try:
+            with open(
+                os.path.join(output_dir, MANIFEST_FILE), "r", encoding="utf-8"
+            ) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        return cls(
+            {
+                logical: published
+                for logical, published in entries.items()
+                if os.path.isfile(os.path.join(output_dir, published))
+            }
+        )
+
+    def add(self, logical: str, published: str) -> None:
+        """Record the published path of an asset."""
+        self.entries[_posix(logical)] = _posix(published)
+        added = getattr(self._local, "added", None)
+        if added is not None:
+            added[_posix(logical)] = _posix(published)
+
+    @contextmanager
+    def recording(self) -> Iterator[Dict[str, str]]:
+        """Collect the entries the current thread adds in the block.
+
+        Stages running at the same time in other threads are not included.
+        """
+        added: Dict[str, str] = {}
+        self._local.added = added
+        try:
+            yield added
+        finally:
+            self._local.added = None
+
+    def url(self, logical: str) -> str:
+        """Return the URL of an asset, or its logical path if unknown."""
+        return self.entries.get(logical, logical)
+
+    def save(self, output_dir: str) -> None:
+        """Write manifest.json into the output directory."""
+        os.makedirs(output_dir, exist_ok=True)
+        content = json.dumps(self.entries, indent=2, sort_keys=True) + "\n"
+        write_atomic(os.path.join(output_dir, MANIFEST_FILE), [content])
+
+    def fingerprinter(self, src_root: str, prefix: str) -> Callable[[str], str]:
+        """Return a sync_tree rename hook that fingerprints and records assets.
+
+        ``prefix`` is the URL of the destination directory below the output.
+        """
+
+        def rename(path: str) -> str:
+            relative = os.path.relpath(path, src_root)
+            name = os.path.basename(path)
+            if os.path.splitext(name)[1] in FINGERPRINTED:
+                name = fingerprint(name, file_hash(path))
+            self.add(
+                os.path.join(prefix, relative),
+                os.path.join(prefix, os.path.dirname(relative), name),
+            )
+            return name
+
+        return rename
+
+    def write(self, directory: str, prefix: str, name: str, content: str) -> str:
+        """Write generated content under a fingerprinted name and record it."""
+        data = content.encode("utf-8")
+        published = fingerprint(name, hashlib.sha256(data).hexdigest())
+        os.makedirs(directory, exist_ok=True)
+
+        # Earlier versions of the same file are no longer referenced
+        stem, extension = os.path.splitext(name)
+        stale = re.compile(
+            rf"{re.escape(stem)}\.[0-9a-f]{{{HASH_LENGTH}}}{re.escape(extension)}"
+        )
+        for existing in os.listdir(directory):
+            if existing != published and stale.fullmatch(existing):
+                os.unlink(os.path.join(directory, existing))
+
+        path = os.path.join(directory, published)
+        if not os.path.exists(path):
+            write_atomic(path, [content])
+        self.add(os.path.join(prefix, name), os.path.join(prefix, published))
+        return published
+
+
+def _posix(path: str) -> str:
+    """Return a normalized path with forward slashes, for use in URLs."""
+    return os.path.normpath(path).replace(os.sep, "/")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the converter and the website build.
+
+Each benchmark generates a synthetic paper of a named size and times
+parsing it, rendering the parsed paper to HTML and a full website build,
+keeping the best of a few runs. The results are appended to a history
+file and compared with a stored baseline: a stage slower than its
+baseline by more than the tolerance fails the suite.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from build_website import WebsiteBuilder
+from latex_to_html import LatexToHtmlConverter
+from output_files import write_atomic
+from paper_corpus import SIZES, write_project
+
+STAGES = ("parse", "convert", "build")
+DEFAULT_HISTORY = "benchmark-history.json"
+DEFAULT_BASELINE = "benchmark-baseline.json"
+# Percentage a stage may be slower than its baseline
+DEFAULT_TOLERANCE = 25.0
+
+Results = Dict[str, Dict[str, float]]
+
+
+@contextlib.contextmanager
+def _quiet_in(directory: str) -> Iterator[None]:
+    """Run in a directory without printing the build's progress."""
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        os.chdir(previous)
+
+
+def _best(run: Callable[[], Callable[[], object]], repeat: int) -> float:
+    """Return the fastest of ``repeat`` timings.
+
+    ``run`` prepares one timing and returns the function to time.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        timed = run()
+        started = time.perf_counter()
+        timed()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark_project(root: str, repeat: int = 3) -> Dict[str, float]:
+    """Time the stages on the paper project under ``root``, in seconds."""
+    with _quiet_in(root):
+        main_tex = os.path.join("src", "paper", "main.tex")
+
+        def parse() -> Callable[[], object]:
+            converter = LatexToHtmlConverter()
+            content = converter.include_graph.resolve(main_tex)
+            return lambda: converter._parse_latex(content)
+
+        def convert() -> Callable[[], object]:
+            converter = LatexToHtmlConverter()
+            content = converter.include_graph.resolve(main_tex)
+            parsed = converter._parse_latex(content)
+            return lambda: converter._convert_to_html(parsed)
+
+        def build() -> Callable[[], object]:
+            shutil.rmtree("docs", ignore_errors=True)
+            return WebsiteBuilder().build
+
+        return {
+            "parse": _best(parse, repeat),
+            "convert": _best(convert, repeat),
+            "build": _best(build, repeat),
+        }
+
+
+def run_benchmarks(sizes: List[str], repeat: int = 3) -> Results:
+    """Generate a paper of every size and time its stages."""
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as root:
+            write_project(root, SIZES[size])
+            results[size] = benchmark_project(root, repeat)
+    return results
+
+
+def compare(
+    results: Results, baseline: Results, tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """Return a description of every stage slower than its baseline allows."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, seconds in stages.items():
+            expected = baseline.get(size, {}).get(stage)
+            if expected is None or seconds <= expected * (1 + tolerance / 100):
+                continue
+            regressions.append(
+                f"{size} {stage}: {seconds * 1000:.1f} ms, "
+                f"{(seconds / expected - 1) * 100:.0f}% slower than the baseline "
+                f"{expected * 1000:.1f} ms"
+            )
+    return regressions
+
+
+def append_history(path: str, results: Results) -> None:
+    """Append a run to the JSON history file."""
+    history = _load(path, [])
+    history.append(
+        {
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+    )
+    write_atomic(path, [json.dumps(history, indent=2)])
+
+
+def load_baseline(path: str) -> Results:
+    """Return the stored baseline, or no baseline if there is none yet."""
+    baseline: Results = _load(path, {})
+    return baseline
+
+
+def save_baseline(path: str, results: Results) -> None:
+    """Store results as the baseline, keeping the sizes they do not cover."""
+    baseline = load_baseline(path)
+    baseline.update(results)
+    write_atomic(path, [json.dumps(baseline, indent=2, sort_keys=True)])
+
+
+def _load(path: str, default: Any) -> Any:
+    """Return the contents of a JSON file, or ``default`` if it is missing."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def describe(results: Results) -> str:
+    """Return the results as a table in milliseconds."""
+    lines = [f"{'Size':<8}" + "".join(f"{stage:>12}" for stage in STAGES)]
+    for size, stages in results.items():
+        lines.append(
+            f"{size:<8}"
+            + "".join(f"{stages[stage] * 1000:>9.1f} ms" for stage in STAGES)
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main function; returns 1 when a stage regressed."""
+    parser = argparse.ArgumentParser(description="Benchmark the paper conversion.")
+    parser.add_argument(
+        "--size",
+        nargs="+",
+        choices=list(SIZES),
+        default=["small", "medium"],
+        help="sizes of the generated papers",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs per stage, the best counts"
+    )
+    parser.add_argument(
+        "--history", default=DEFAULT_HISTORY, help="JSON file the runs are added to"
+    )
+    parser.add_argument(
+        "--baseline", default=DEFAULT_BASELINE, help="JSON file of the baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="percentage a stage may be slower than the baseline",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store this run as the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.size, args.repeat)
+    print(describe(results))
+    append_history(args.history, results)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Saved the baseline to {args.baseline}")
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,456 @@
+"""
+BibTeX parsing and formatting of cited references.
+
+A ``.bib`` file is read in chunks, one entry at a time, into an index from
+citation key to fields, and only the entries a paper cites are formatted.
+The index and the formatted references are cached on disk by the file's
+hash, so large shared bibliographies are not parsed again on every build.
+A long-running process can keep them in memory with a BibliographyStore.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterator, List, Match, Optional, TextIO, Tuple
+
+# Bump when the formatted output changes, to invalidate cached references
+FORMAT_VERSION = 1
+
+_ENTRY_START = re.compile(r"@\s*([A-Za-z]+)\s*([{(])")
+_PARTIAL_ENTRY_START = re.compile(r"@\s*[A-Za-z]*\s*")
+_FIELD_NAME = re.compile(r"\s*([A-Za-z][\w:.+-]*)\s*=\s*")
+# Most fields are a single unnested value and are parsed by one match
+_SIMPLE_FIELD = re.compile(
+    r"\s*([A-Za-z][\w:.+-]*)\s*=\s*" r"(?:\{([^{}]*)\}|\"([^\"{}]*)\"|(\d+))\s*(?:,|\Z)"
+)
+_BARE_VALUE = re.compile(r"[^\s,#{}\"]+")
+_AUTHOR_SEPARATOR = re.compile(r"\s+and\s+", re.IGNORECASE)
+_MONTHS = {
+    month: month.capitalize()
+    for month in ("jan feb mar apr may jun jul aug sep oct nov dec".split())
+}
+
+_ACCENTS = {
+    '"': "\u0308",
+    "'": "\u0301",
+    "`": "\u0300",
+    "^": "\u0302",
+    "~": "\u0303",
+    "=": "\u0304",
+    ".": "\u0307",
+    "c": "\u0327",
+    "v": "\u030c",
+    "u": "\u0306",
+    "H": "\u030b",
+}
+_ACCENT = re.compile(
+    r"\\([\"'`^~=.])\s*(?:\{(\w)\}|(\w))|\\([cvuH])(?:\s*\{(\w)\}|\s+(\w))"
+)
+_SYMBOLS = re.compile(r"\\([&%$_#{}])|---|--|~")
+_COMMAND = re.compile(r"\\[A-Za-z]+\s*")
+_SPACE = re.compile(r"\s*")
+_DELIMITERS = {
+    "}": re.compile(r"[{}]"),
+    ")": re.compile(r"[{})]"),
+    '"': re.compile(r'[{}"]'),
+}
+
+
+class Bibliography:
+    """Index of the entries of a BibTeX file, keyed by citation key."""
+
+    def __init__(
+        self,
+        entries: Dict[str, Dict],
+        formatted: Optional[Dict[str, str]] = None,
+        cache_file: Optional[Path] = None,
+    ):
+        """Initialize the bibliography from parsed entries."""
+        self.entries = entries
+        self.formatted = formatted if formatted is not None else {}
+        self.cache_file = cache_file
+        self._dirty = False
+
+    def format(self, key: str) -> Optional[str]:
+        """Return the HTML reference for a citation key, if it is known."""
+        if key in self.formatted:
+            return self.formatted[key]
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        self.formatted[key] = format_entry(entry["type"], entry["fields"])
+        self._dirty = True
+        return self.formatted[key]
+
+    def save(self) -> None:
+        """Write the index and formatted references to the cache file."""
+        if self.cache_file is None or not self._dirty:
+            return
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_file.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"entries": self.entries, "formatted": self.formatted}, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            # A cache that cannot be written only costs parsing again
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self._dirty = False
+
+
+def load_bibliography(path: str, cache_dir: Optional[str] = None) -> Bibliography:
+    """Return the bibliography in ``path``, from the cache if it is unchanged."""
+    digest = hashlib.sha256(f"{FORMAT_VERSION}\0".encode("utf-8"))
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+    cache_file = None
+    if cache_dir:
+        cache_file = Path(cache_dir) / "bibliography" / f"{digest.hexdigest()}.json"
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return Bibliography(data["entries"], data["formatted"], cache_file)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    with open(path, "r", encoding="utf-8") as f:
+        entries = {
+            key: {"type": entry_type, "fields": fields}
+            for entry_type, key, fields in iter_entries(f)
+        }
+
+    bibliography = Bibliography(entries, cache_file=cache_file)
+    bibliography._dirty = True
+    return bibliography
+
+
+class BibliographyStore:
+    """Parsed bibliographies kept in memory while their files are unchanged.
+
+    A file counts as unchanged while its modification time and size are.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """Load files missing from memory through the cache in ``cache_dir``."""
+        self.cache_dir = cache_dir
+        self._loaded: Dict[str, Tuple[Tuple[int, int], Bibliography]] = {}
+        self._lock = threading.Lock()
+
+    def stamp(self, path: str) -> Optional[Tuple[int, int]]:
+        """Return the modification time and size of a file, or None if missing."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self, path: str) -> Bibliography:
+        """Return the bibliography in ``path``, parsed again only if it changed.
+
+        Raises FileNotFoundError for a missing file.
+        """
+        stamp = self.stamp(path)
+        if stamp is None:
+            raise FileNotFoundError(path)
+        with self._lock:
+            loaded = self._loaded.get(path)
+        if loaded is not None and loaded[0] == stamp:
+            return loaded[1]
+
+        bibliography = load_bibliography(path, self.cache_dir)
+        with self._lock:
+            self._loaded[path] = (stamp, bibliography)
+        return bibliography
+
+
+def iter_entries(
+    f: TextIO, chunk_size: int = 1 << 16
+) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+    """Yield the type, key and fields of each entry, reading in chunks."""
+    strings: Dict[str, str] = {}
+    pending = ""
+
+    for chunk in iter(lambda: f.read(chunk_size), ""):
+        pending += chunk
+        pos = 0
+        while True:
+            at = pending.find("@", pos)
+            if at < 0:
+                pending = ""
+                break
+
+            match = _ENTRY_START.match(pending, at)
+            if match is None:
+                if _PARTIAL_ENTRY_START.fullmatch(pending, at):
+                    # The entry type continues in the next chunk
+                    pending = pending[at:]
+                    break
+                pos = at + 1
+                continue
+
+            closer = "}" if match.group(2) == "{" else ")"
+            end = _find_closing(pending, match.end(), closer)
+            if end is None:
+                pending = pending[at:]
+                break
+            pos = end + 1
+
+            entry = _parse_entry(
+                match.group(1).lower(), pending[match.end() : end], strings
+            )
+            if entry is not None:
+                yield entry
+
+
+def _parse_entry(
+    entry_type: str, body: str, strings: Dict[str, str]
+) -> Optional[Tuple[str, str, Dict[str, str]]]:
+    """Parse the body of one entry, recording @string definitions."""
+    if entry_type in ("comment", "preamble"):
+        return None
+    if entry_type == "string":
+        for name, value in _parse_fields(body, 0, strings).items():
+            strings[name] = value
+        return None
+
+    comma = body.find(",")
+    if comma < 0:
+        return None
+    key = body[:comma].strip()
+    return entry_type, key, _parse_fields(body, comma + 1, strings)
+
+
+def _parse_fields(body: str, pos: int, strings: Dict[str, str]) -> Dict[str, str]:
+    """Parse ``name = value`` pairs separated by commas."""
+    fields = {}
+    while True:
+        simple = _SIMPLE_FIELD.match(body, pos)
+        if simple is not None:
+            name, braced, quoted, number = simple.groups()
+            if braced is not None:
+                fields[name.lower()] = braced
+            elif quoted is not None:
+                fields[name.lower()] = quoted
+            else:
+                fields[name.lower()] = number
+            pos = simple.end()
+            continue
+
+        match = _FIELD_NAME.match(body, pos)
+        if match is None:
+            return fields
+        value, pos = _parse_value(body, match.end(), strings)
+        fields[match.group(1).lower()] = value
+
+        pos = _skip_space(body, pos)
+        if pos >= len(body) or body[pos] != ",":
+            return fields
+        pos += 1
+
+
+def _parse_value(body: str, pos: int, strings: Dict[str, str]) -> Tuple[str, int]:
+    """Parse a field value, joining parts concatenated with #."""
+    parts = []
+    while True:
+        pos = _skip_space(body, pos)
+        char = body[pos] if pos < len(body) else ""
+
+        if char == "{":
+            end = _group_end(body, pos + 1, "}")
+            parts.append(body[pos + 1 : end])
+            pos = end + 1
+        elif char == '"':
+            end = _group_end(body, pos + 1, '"')
+            parts.append(body[pos + 1 : end])
+            pos = end + 1
+        else:
+            match = _BARE_VALUE.match(body, pos)
+            if match is None:
+                break
+            word = match.group(0)
+            parts.append(strings.get(word.lower(), _MONTHS.get(word.lower(), word)))
+            pos = match.end()
+
+        pos = _skip_space(body, pos)
+        if pos >= len(body) or body[pos] != "#":
+            break
+        pos += 1
+
+    return "".join(parts), pos
+
+
+def _find_closing(text: str, pos: int, closer: str) -> Optional[int]:
+    """Return the position of ``closer`` outside nested braces, if any."""
+    depth = 0
+    for match in _DELIMITERS[closer].finditer(text, pos):
+        char = match.group()
+        if char == "{":
+            depth += 1
+        elif depth:
+            if char == "}":
+                depth -= 1
+        elif char == closer:
+            return match.start()
+    return None
+
+
+def _group_end(body: str, pos: int, closer: str) -> int:
+    """Return the end of a braced or quoted value, or the end of the body."""
+    end = _find_closing(body, pos, closer)
+    return len(body) if end is None else end
+
+
+def _skip_space(body: str, pos: int) -> int:
+    """Return the position of the next non-whitespace character."""
+    match = _SPACE.match(body, pos)
+    return match.end() if match else pos
+
+
+def format_entry(entry_type: str, fields: Dict[str, str]) -> str:
+    """Format an entry as an HTML reference in author-year style."""
+    authors = format_authors(fields.get("author") or fields.get("editor", ""))
+    year = plain_text(fields.get("year", "")) or "n.d."
+    title = plain_text(fields.get("title", ""))
+
+    parts = [_sentence(authors)] if authors else []
+    parts.append(f"({year}).")
+
+    if entry_type in ("book", "phdthesis", "mastersthesis", "techreport"):
+        parts.append(_sentence(f"<em>{title}</em>"))
+        publisher = fields.get("publisher") or fields.get("school")
+        if publisher:
+            parts.append(_sentence(plain_text(publisher)))
+    else:
+        parts.append(_sentence(title))
+        venue = (
+            fields.get("journal")
+            or fields.get("booktitle")
+            or fields.get("howpublished")
+            or fields.get("publisher")
+        )
+        details = []
+        if fields.get("volume"):
+            volume = plain_text(fields["volume"])
+            if fields.get("number"):
+                volume += f"({plain_text(fields['number'])})"
+            details.append(volume)
+        if fields.get("pages"):
+            details.append(plain_text(fields["pages"]))
+        if venue:
+            parts.append(
+                _sentence(", ".join([f"<em>{plain_text(venue)}</em>"] + details))
+            )
+
+    return " ".join(parts)
+
+
+def format_authors(names: str) -> str:
+    """Format a BibTeX name list as "Last, F. M., & Last, F."."""
+    if not names.strip():
+        return ""
+
+    authors = []
+    for name in _split_names(names):
+        if name.lower() == "others":
+            authors.append("et al.")
+        else:
+            authors.append(_format_name(name))
+
+    if len(authors) == 1:
+        return authors[0]
+    if authors[-1] == "et al.":
+        return ", ".join(authors[:-1]) + ", et al."
+    return ", ".join(authors[:-1]) + ", & " + authors[-1]
+
+
+def _split_names(names: str) -> List[str]:
+    """Split a name list at top-level "and" separators."""
+    result = []
+    depth = 0
+    start = 0
+    pos = 0
+    while pos < len(names):
+        char = names[pos]
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif depth == 0:
+            match = _AUTHOR_SEPARATOR.match(names, pos)
+            if match:
+                result.append(names[start:pos].strip())
+                start = pos = match.end()
+                continue
+        pos += 1
+    result.append(names[start:].strip())
+    return [name for name in result if name]
+
+
+def _format_name(name: str) -> str:
+    """Format one name as "Last, F. M."."""
+    # Names in braces, such as organisations, are used as they are
+    if name.startswith("{") and _group_end(name, 1, "}") == len(name) - 1:
+        return plain_text(name)
+
+    if "," in name:
+        last, first = name.split(",", 1)
+        if "," in first:
+            first = first.split(",", 1)[1]  # "von Last, Jr, First"
+    else:
+        words = name.split()
+        last, first = words[-1], " ".join(words[:-1])
+
+    last = plain_text(last.strip())
+    initials = [_initials(word) for word in plain_text(first).split()]
+    initials = [initial for initial in initials if initial]
+    if not initials:
+        return last
+    return f"{last}, {' '.join(initials)}"
+
+
+def _initials(word: str) -> str:
+    """Return the initials of a first name, keeping hyphens."""
+    parts = [part for part in word.split("-") if part]
+    letters = [next((c for c in part if c.isalpha()), "") for part in parts]
+    return "-".join(f"{letter}." for letter in letters if letter)
+
+
+def plain_text(text: str) -> str:
+    """Convert a BibTeX field value to HTML-escaped plain text."""
+    text = _ACCENT.sub(_compose_accent, text)
+    text = _SYMBOLS.sub(_symbol, text)
+    text = _COMMAND.sub("", text)
+    text = text.replace("{", "").replace("}", "")
+    text = " ".join(text.split())
+    return html.escape(unicodedata.normalize("NFC", text), quote=False)
+
+
+def _compose_accent(match: Match[str]) -> str:
+    """Return the accented character for an accent command."""
+    accent = match.group(1) or match.group(4)
+    letter = match.group(2) or match.group(3) or match.group(5) or match.group(6)
+    return letter + _ACCENTS[accent]
+
+
+def _symbol(match: Match[str]) -> str:
+    """Return the character for an escaped symbol or dash ligature."""
+    text = match.group(0)
+    if match.group(1):
+        return match.group(1)
+    return {"---": "\u2014", "--": "\u2013", "~": " "}[text]
+
+
+def _sentence(text: str) -> str:
+    """Return text ending with a full stop."""
+    return text if text.endswith((".", "?", "!")) else f"{text}."
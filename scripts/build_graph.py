@@ -0,0 +1,195 @@
+"""
+Running build stages in the order their dependencies require.
+
+The stages of a build form a small dependency graph. A stage starts as
+soon as every stage it needs has finished, so stages that do not depend
+on each other run at the same time on a pool of threads; the CPU-heavy
+work inside a stage, such as converting sections or resizing figures,
+already runs in worker processes. A stage that fails is reported with
+its error, and the stages that need it do not run.
+
+What a stage prints is kept apart from the other stages and printed in
+one piece once it finishes, so the progress of concurrent stages does not
+interleave.
+"""
+
+import io
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+
+@dataclass
+class Stage:
+    """A step of the build and the stages it needs."""
+
+    name: str
+    # Returns whether the stage did any work
+    run: Callable[[], bool]
+    needs: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageResult:
+    """Outcome of one stage: done, failed, or blocked by a failed stage."""
+
+    name: str
+    status: str
+    ran: bool = False
+    seconds: float = 0.0
+    error: str = ""
+    # What the stage printed, when it ran alongside other stages
+    output: str = ""
+
+    @property
+    def ok(self) -> bool:
+        """Return whether the stage finished."""
+        return self.status == "done"
+
+
+def order_stages(stages: Sequence[Stage]) -> List[Stage]:
+    """Return the stages in an order that runs every stage after its needs.
+
+    Raises ValueError for a need that is not a stage or for a cycle.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    ordered: List[Stage] = []
+    state: Dict[str, str] = {}
+
+    def visit(stage: Stage, path: Tuple[str, ...]) -> None:
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            cycle = " -> ".join(path[path.index(stage.name) :] + (stage.name,))
+            raise ValueError(f"Build stages depend on each other: {cycle}")
+        state[stage.name] = "visiting"
+        for need in stage.needs:
+            if need not in by_name:
+                raise ValueError(f"Stage {stage.name} needs unknown stage {need}")
+            visit(by_name[need], path + (stage.name,))
+        state[stage.name] = "done"
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage, ())
+    return ordered
+
+
+def run_stages(stages: Sequence[Stage], workers: int = 4) -> Dict[str, StageResult]:
+    """Run the stages, each once its needs are done, and return their outcomes.
+
+    With one worker the stages run one after another in the calling thread.
+    """
+    ordered = order_stages(stages)
+    results: Dict[str, StageResult] = {}
+
+    def blocked(stage: Stage) -> List[str]:
+        return [need for need in stage.needs if not results[need].ok]
+
+    if workers <= 1:
+        for stage in ordered:
+            failed = blocked(stage)
+            if failed:
+                results[stage.name] = _blocked(stage, failed)
+            else:
+                results[stage.name] = _run(stage)
+        return results
+
+    waiting = list(ordered)
+    running: Dict[Future, Stage] = {}
+    with _stage_output() as stage_output, ThreadPoolExecutor(
+        workers, thread_name_prefix="stage"
+    ) as executor:
+        while waiting or running:
+            for stage in list(waiting):
+                if any(need not in results for need in stage.needs):
+                    continue
+                waiting.remove(stage)
+                failed = blocked(stage)
+                if failed:
+                    results[stage.name] = _blocked(stage, failed)
+                else:
+                    running[executor.submit(_run, stage, stage_output)] = stage
+            if not running:
+                # Every remaining stage was blocked by the ones just decided
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                result = results[stage.name] = future.result()
+                stage_output.stream.write(result.output)
+                stage_output.stream.flush()
+    return {stage.name: results[stage.name] for stage in ordered}
+
+
+class _StageOutput(io.TextIOBase):
+    """Standard output that collects what each stage thread prints."""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._local = threading.local()
+
+    @contextmanager
+    def collect(self) -> Iterator[io.StringIO]:
+        """Collect what the current thread prints in the block."""
+        buffer = io.StringIO()
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self) -> None:
+        if getattr(self._local, "buffer", None) is None:
+            self.stream.flush()
+
+
+@contextmanager
+def _stage_output() -> Iterator[_StageOutput]:
+    """Replace standard output with one that keeps stages apart."""
+    output = _StageOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        yield output
+    finally:
+        sys.stdout = output.stream
+
+
+def _run(stage: Stage, output: Optional[_StageOutput] = None) -> StageResult:
+    """Run one stage, catching its failure and collecting what it prints."""
+    started = time.perf_counter()
+    buffer = None
+    try:
+        if output is None:
+            ran = bool(stage.run())
+        else:
+            with output.collect() as buffer:
+                ran = bool(stage.run())
+    except Exception as error:
+        return StageResult(
+            stage.name,
+            "failed",
+            seconds=time.perf_counter() - started,
+            error=f"{type(error).__name__}: {error}",
+            output="" if buffer is None else buffer.getvalue(),
+        )
+    return StageResult(
+        stage.name,
+        "done",
+        ran,
+        time.perf_counter() - started,
+        output="" if buffer is None else buffer.getvalue(),
+    )
+
+
+def _blocked(stage: Stage, failed: List[str]) -> StageResult:
+    """Return the outcome of a stage whose needs did not finish."""
+    return StageResult(stage.name, "blocked", error=f"needs {', '.join(failed)}")
@@ -0,0 +1,278 @@
+"""
+Profiling where the time of a build goes.
+
+A profiler records timed spans for the build stages and for every section
+converted, including sections converted in worker processes. The spans
+are written in the Chrome trace-event format, which chrome://tracing and
+https://ui.perfetto.dev open, and summarized as a table of the spans that
+took the most time themselves. One span at a time can also be run under
+cProfile, whose statistics are dumped for pstats or snakeviz.
+
+With memory accounting on, every span also records the peak memory traced
+by tracemalloc while it ran, and every stage the allocation sites that
+grew the most. Sections only record their peaks, since snapshotting every
+allocation is too slow to do for each of them. The figures can be exported
+as JSON to keep stages within a memory budget.
+"""
+
+import cProfile
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from output_files import write_atomic
+
+DEFAULT_TRACE = "build-trace.json"
+DEFAULT_MEMORY_REPORT = "memory-report.json"
+
+# Allocations of the profiler itself, left out of the sites
+_PROFILER_FILES = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+]
+
+
+class Profiler:
+    """Collector of the timed spans of one build."""
+
+    def __init__(
+        self,
+        cprofile: Optional[str] = None,
+        memory: bool = False,
+        sites: int = 5,
+        enabled: bool = True,
+    ):
+        """Create an empty profile.
+
+        ``cprofile`` names a span to run under cProfile. ``memory`` traces
+        allocations until ``close`` is called, keeping the ``sites`` largest
+        allocation sites of every stage. A profiler that is not ``enabled``
+        records nothing, for converters that run for a long time.
+        """
+        self.enabled = enabled
+        self.events: List[Dict] = []
+        self.cprofile = cprofile
+        self.stats_files: List[str] = []
+        self.memory = memory
+        self.sites = sites
+        self.memory_stats: List[Dict] = []
+        # Highest peak seen so far by each open span, since tracemalloc
+        # has a single peak that every span resets
+        self._peaks: List[int] = []
+        # Memory held by the snapshots of the open spans
+        self._held = 0
+        self._pid = os.getpid()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **args: Any) -> Iterator[None]:
+        """Time the enclosed code as a span."""
+        if not self.enabled:
+            yield
+            return
+        profile = None
+        if name == self.cprofile:
+            profile = cProfile.Profile()
+            profile.enable()
+        memory = self._memory_span(name, category) if self.memory else nullcontext()
+        with memory:
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                finished = time.perf_counter()
+                if profile is not None:
+                    profile.disable()
+                    path = re.sub(r"[^\w.-]+", "_", name) + ".pstats"
+                    profile.dump_stats(path)
+                    self.stats_files.append(path)
+                self.add(name, started, finished, category, **args)
+
+    @contextmanager
+    def _memory_span(self, name: str, category: str) -> Iterator[None]:
+        """Record the peak memory of a span, and the largest sites of a stage.
+
+        The snapshots the sites are compared with are left out of the peaks.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        self._note_peak(peak)
+        before = None
+        if category == "stage":
+            before = tracemalloc.take_snapshot().filter_traces(_PROFILER_FILES)
+        start = tracemalloc.get_traced_memory()[0]
+        overhead = start - current
+        self._held += overhead
+        _reset_peak()
+        self._peaks.append(start)
+        try:
+            yield
+        finally:
+            peak = max(tracemalloc.get_traced_memory()[1], self._peaks.pop())
+            sites = []
+            if before is not None:
+                after = tracemalloc.take_snapshot().filter_traces(_PROFILER_FILES)
+                for stat in after.compare_to(before, "lineno")[: self.sites]:
+                    if stat.size_diff > 0:
+                        frame = stat.traceback[0]
+                        sites.append(
+                            {
+                                "site": f"{frame.filename}:{frame.lineno}",
+                                "size": stat.size_diff,
+                                "count": stat.count_diff,
+                            }
+                        )
+                del before, after
+            _reset_peak()
+            self._note_peak(peak - overhead)
+            held, self._held = self._held, self._held - overhead
+            self.memory_stats.append(
+                {
+                    "name": name,
+                    "category": category,
+                    "peak": peak - held,
+                    "growth": peak - start,
+                    "sites": sites,
+                }
+            )
+
+    def _note_peak(self, peak: int) -> None:
+        """Raise the peak of the innermost open span."""
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+
+    def close(self) -> None:
+        """Stop tracing allocations."""
+        if self.memory:
+            tracemalloc.stop()
+
+    def add(
+        self,
+        name: str,
+        started: float,
+        finished: float,
+        category: str = "stage",
+        tid: Optional[int] = None,
+        **args: Any,
+    ) -> None:
+        """Record a span measured with ``time.perf_counter``.
+
+        ``tid`` is the thread that ran it, by default the current one; spans
+        from worker processes pass the worker's, which the clock is shared with.
+        """
+        if not self.enabled:
+            return
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": started * 1e6,
+            "dur": (finished - started) * 1e6,
+            "pid": self._pid,
+            "tid": threading.get_native_id() if tid is None else tid,
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def write(self, path: str = DEFAULT_TRACE) -> None:
+        """Write the spans as a Chrome trace-event file."""
+        trace = {"traceEvents": self.events, "displayTimeUnit": "ms"}
+        write_atomic(path, [json.dumps(trace)])
+
+    def write_memory(self, path: str = DEFAULT_MEMORY_REPORT) -> None:
+        """Write the memory of every span as JSON, in bytes."""
+        report = {"spans": self.memory_stats}
+        write_atomic(path, [json.dumps(report, indent=2)])
+
+    def memory_summary(self, top: int = 10) -> str:
+        """Return a table of the ``top`` spans with the highest peaks."""
+        rows = sorted(self.memory_stats, key=lambda stats: -stats["peak"])[:top]
+        width = max([len("Span")] + [len(stats["name"]) for stats in rows])
+        lines = [f"{'Span':<{width}}  {'Peak MiB':>9}  {'Growth MiB':>10}"]
+        for stats in rows:
+            lines.append(
+                f"{stats['name']:<{width}}  {stats['peak'] / 2**20:>9.1f}"
+                f"  {stats['growth'] / 2**20:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def totals(self) -> Dict[str, Tuple[int, float, float]]:
+        """Return the calls, total and self seconds of every span name.
+
+        Self time excludes the time spent in spans nested inside a span.
+        """
+        totals: Dict[str, Tuple[int, float, float]] = {}
+        # Parents start first, and before their children when they start
+        # at the same time, so each span's parent is on top of the stack
+        events = sorted(
+            self.events, key=lambda event: (event["tid"], event["ts"], -event["dur"])
+        )
+        stack: List[Dict] = []
+        own: Dict[int, float] = {}
+        for event in events:
+            while stack and (
+                stack[-1]["tid"] != event["tid"]
+                or event["ts"] >= stack[-1]["ts"] + stack[-1]["dur"]
+            ):
+                stack.pop()
+            own[id(event)] = event["dur"]
+            if stack:
+                own[id(stack[-1])] -= event["dur"]
+            stack.append(event)
+
+        for event in events:
+            calls, total, self_time = totals.get(event["name"], (0, 0.0, 0.0))
+            totals[event["name"]] = (
+                calls + 1,
+                total + event["dur"] / 1e6,
+                self_time + max(0.0, own[id(event)]) / 1e6,
+            )
+        return totals
+
+    def summary(self, top: int = 10) -> str:
+        """Return a table of the ``top`` spans taking the most time themselves."""
+        rows = sorted(self.totals().items(), key=lambda item: -item[1][2])[:top]
+        width = max([len("Span")] + [len(name) for name, _ in rows])
+        lines = [f"{'Span':<{width}}  {'Calls':>5}  {'Total ms':>9}  {'Self ms':>9}"]
+        for name, (calls, total, self_time) in rows:
+            lines.append(
+                f"{name:<{width}}  {calls:>5}  {total * 1000:>9.1f}"
+                f"  {self_time * 1000:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+def _reset_peak() -> None:
+    """Start measuring the peak from the current traced memory."""
+    # Before Python 3.9 the peak can only grow, so spans report the
+    # highest peak since tracing started
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+
+def report(
+    profiler: Profiler,
+    trace: Optional[str],
+    memory_report: Optional[str] = None,
+    top: int = 10,
+) -> None:
+    """Write and summarize a profile as requested on the command line."""
+    profiler.close()
+    if trace:
+        profiler.write(trace)
+        print(profiler.summary(top))
+        print(f"Wrote trace to {trace}")
+    if memory_report:
+        profiler.write_memory(memory_report)
+        print(profiler.memory_summary(top))
+        print(f"Wrote memory report to {memory_report}")
+    if profiler.cprofile and not profiler.stats_files:
+        print(f"Stage {profiler.cprofile} did not run, so it was not profiled")
+    for path in profiler.stats_files:
+        print(f"Wrote cProfile statistics to {path}")
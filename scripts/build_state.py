@@ -0,0 +1,135 @@
+"""
+Record of what each build stage read and wrote, to skip unchanged stages.
+
+For every stage the builder records its settings, a hash of every input
+file and the size and modification time of every output. A stage only runs
+again when one of those differs, so a build of an unchanged paper returns
+without converting anything. Inputs are compared by size and modification
+time first and only hashed when those change, so checking an unchanged
+build does not read the sources.
+
+Stages also keep the asset manifest entries they published, so that the
+manifest can be written in full when some of them are skipped. Inputs
+that were looked for but did not exist are recorded too, so that a
+figure or bibliography appearing later triggers a rebuild.
+"""
+
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional
+
+from file_sync import file_hash
+
+STATE_FILE = "build-state.json"
+
+
+class BuildState:
+    """Inputs, settings and outputs recorded for each build stage."""
+
+    def __init__(self, path: Optional[str] = None):
+        """Initialize the state stored in ``path``; without one nothing is kept."""
+        self.path = path
+        self.stages: Dict[str, Dict] = {}
+        self._pending: Dict[str, List[str]] = {}
+        self._dirty = False
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.stages = json.load(f)
+            except (OSError, ValueError):
+                self.stages = {}
+
+    def reason(self, stage: str, settings: Dict[str, str]) -> Optional[str]:
+        """Return why a stage has to run, or None if it is up to date."""
+        if not self.path:
+            return "no build cache configured"
+        record = self.stages.get(stage)
+        if record is None:
+            return "not built before"
+
+        recorded = record["settings"]
+        for key in sorted(set(settings) | set(recorded)):
+            if settings.get(key) != recorded.get(key):
+                return f"setting {key} changed"
+
+        for path, fingerprint in record["inputs"].items():
+            current = _stat(path)
+            if current is None or fingerprint is None:
+                if current != fingerprint:
+                    return f"{path} {'appeared' if current else 'was removed'}"
+            elif current != fingerprint[:2]:
+                if file_hash(path) != fingerprint[2]:
+                    return f"{path} changed"
+                # Touched but identical, so only the stat is out of date
+                fingerprint[:2] = current
+                self._dirty = True
+
+        for path, stat in record["outputs"].items():
+            current = _stat(path)
+            if current is None:
+                return f"output {path} is missing"
+            if current != stat:
+                return f"output {path} was modified"
+        return None
+
+    def record(
+        self,
+        stage: str,
+        settings: Dict[str, str],
+        inputs: Iterable[str],
+        outputs: Iterable[str],
+        published: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Record a stage that ran; its outputs are examined when saving.
+
+        ``published`` holds the asset manifest entries the stage added.
+        """
+        fingerprints = {}
+        for path in inputs:
+            stat = _stat(path)
+            fingerprints[path] = None if stat is None else stat + [file_hash(path)]
+        self.stages[stage] = {
+            "settings": dict(settings),
+            "inputs": fingerprints,
+            "outputs": {},
+            "published": dict(published or {}),
+        }
+        self._pending[stage] = list(outputs)
+        self._dirty = True
+
+    def published(self, stage: str) -> Dict[str, str]:
+        """Return the asset manifest entries recorded for a stage."""
+        published: Dict[str, str] = self.stages.get(stage, {}).get("published", {})
+        return published
+
+    def save(self) -> None:
+        """Write the state, with the outputs as the build left them."""
+        if not self.path or not self._dirty:
+            return
+        for stage, outputs in self._pending.items():
+            self.stages[stage]["outputs"] = {
+                path: stat for path, stat in zip(outputs, map(_stat, outputs)) if stat
+            }
+        self._pending = {}
+
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.stages, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._dirty = False
+
+
+def _stat(path: str) -> Optional[List[int]]:
+    """Return the size and modification time of a file, or None if missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
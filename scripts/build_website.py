@@ -3,22 +3,84 @@
 Main website builder script that orchestrates the entire build process.
 """
 
-import shutil
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
 import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import yaml
+from asset_manifest import AssetManifest
+from build_graph import Stage, run_stages
+from build_profile import DEFAULT_MEMORY_REPORT, DEFAULT_TRACE, Profiler, report
+from build_state import STATE_FILE, BuildState
+from file_sync import sync_tree
+from file_watch import create_watcher, wait_for_changes
 from latex_to_html import LatexToHtmlConverter
+from live_server import LiveReloadServer
+from minify import (
+    describe_savings,
+    inline_critical_css,
+    minify_css,
+    minify_html,
+    minify_tree,
+)
+from output_files import OutputChanges, write_atomic
+from page_templates import template_environment
 
 
 class WebsiteBuilder:
-    def __init__(self, config_path: str = "config.yaml"):
-        """Initialize the website builder."""
-        self.config = self._load_config(config_path)
-        self.source_dir = Path("src")
-        self.output_dir = Path("docs")
+    def __init__(
+        self,
+        config_path: str = "config.yaml",
+        jobs: int = 1,
+        optimize: Optional[bool] = None,
+        profiler: Optional[Profiler] = None,
+        root: str = ".",
+        cache_dir: Optional[str] = None,
+    ):
+        """Initialize the website builder for the project in ``root``.
+
+        ``optimize`` enables minification and critical CSS inlining; by
+        default it follows build.optimize in the configuration. The build
+        stages are timed in ``profiler``. ``cache_dir`` replaces the
+        project's build.cache_dir for the caches that can be shared between
+        projects; the record of previous builds stays in the project's own.
+        """
+        self.root = Path(root)
+        self.config_path = str(self.root / config_path)
+        self.config = self._load_config(self.config_path)
+        self.jobs = jobs
+        if optimize is None:
+            optimize = bool(self.config.get("build", {}).get("optimize"))
+        self.optimize = optimize
+        self.source_dir = self.root / "src"
+        self.output_dir = self.root / "docs"
         self.paper_dir = self.source_dir / "paper"
         self.web_dir = self.source_dir / "web"
+        self.manifest = AssetManifest()
+        self.changed_files: List[Tuple[str, str]] = []
+        self.profiler = profiler or Profiler(enabled=False)
+
+        # What the previous builds read and wrote, kept with the other caches
+        project_cache = self.config.get("build", {}).get("cache_dir")
+        if project_cache:
+            project_cache = os.path.join(
+                os.path.dirname(self.config_path), project_cache
+            )
+        self.cache_dir = cache_dir or project_cache
+        self.state = BuildState(
+            os.path.join(project_cache, STATE_FILE) if project_cache else None
+        )
 
     def _load_config(self, config_path: str) -> dict:
         """Load configuration from YAML file."""
@@ -29,44 +91,182 @@ class WebsiteBuilder:
             print(f"Config file {config_path} not found")
             return {}
 
-    def build(self):
-        """Build the complete website."""
+    def build(self, explain: bool = False, changed_files: Optional[str] = None):
+        """Build the complete website.
+
+        Stages whose inputs, settings and outputs are unchanged since the
+        previous build are skipped. ``explain`` prints why each stage runs,
+        and the files the build changed are listed in ``changed_files``.
+
+        The pages are built at the same time once the assets are published.
+        A stage that fails is reported and the build returns False.
+        """
         print("Building research paper website...")
 
         # Create output directory
         self.output_dir.mkdir(exist_ok=True)
-
-        # Copy static assets
-        self._copy_assets()
-
-        # Find main LaTeX file
+        self.manifest = AssetManifest()
+        changes = OutputChanges(str(self.output_dir))
         main_tex = self._find_main_tex()
+        page_settings: Dict[str, str] = {}
+
+        def assets() -> bool:
+            assets_src = self.web_dir / "assets"
+            ran = self._run_stage(
+                "assets",
+                {
+                    "optimize": str(self.optimize),
+                    "hardlink": str(self._hardlink()),
+                    "sources": _digest(
+                        os.path.relpath(path, assets_src) for path in _files(assets_src)
+                    ),
+                },
+                self._build_assets,
+                explain,
+            )
+            # Pages link the assets by their published names, so the asset
+            # entries are all the manifest holds at this point
+            page_settings["optimize"] = str(self.optimize)
+            page_settings["assets"] = _digest(
+                f"{logical}={published}"
+                for logical, published in sorted(self.manifest.entries.items())
+            )
+            return ran
+
+        stages = [Stage("assets", assets)]
+        if main_tex:
+            stages.append(
+                Stage(
+                    "paper",
+                    lambda: self._run_stage(
+                        "paper",
+                        dict(page_settings, main=main_tex),
+                        lambda: self._build_paper(main_tex),
+                        explain,
+                    ),
+                    ("assets",),
+                )
+            )
+            stages.append(
+                Stage(
+                    "bibtex",
+                    lambda: self._generate_additional_pages(page_settings, explain),
+                    ("assets",),
+                )
+            )
+
+        # Allocations of stages running together cannot be told apart
+        workers = 1 if self.profiler.memory else len(stages)
+        results = run_stages(stages, workers)
+        ran = any(result.ran for result in results.values())
+
         if not main_tex:
             print("No main.tex file found in src/paper/")
             return False
 
-        # Convert LaTeX to HTML
-        self._convert_latex_to_html(main_tex)
+        failed = [result for result in results.values() if not result.ok]
+        if failed:
+            # What the finished stages did is kept for the next build
+            self.state.save()
+            for result in failed:
+                print(f"Stage {result.name} {result.status}: {result.error}")
+            print(f"Build failed in {', '.join(result.name for result in failed)}")
+            return False
 
-        # Copy figures
-        self._copy_figures()
+        if ran:
+            # Record where every fingerprinted asset was published
+            self.manifest.save(str(self.output_dir))
+        self.state.save()
 
-        # Generate additional pages
-        self._generate_additional_pages()
+        # Deploys only need to upload what changed
+        if changed_files:
+            changes.write(changed_files)
+        if not ran:
+            print("Website is up to date")
+            return True
 
+        self.changed_files = changes.changes()
+        print(f"Changed {len(self.changed_files)} files in {self.output_dir}")
         print("Website built successfully!")
         return True
 
+    def _run_stage(
+        self,
+        name: str,
+        settings: Dict[str, str],
+        run: Callable[[], Tuple[List[str], List[str]]],
+        explain: bool = False,
+    ) -> bool:
+        """Run a stage unless it is up to date, and return whether it ran.
+
+        ``run`` returns the files the stage read and the files it wrote. A
+        skipped stage adds the assets it published before to the manifest.
+        """
+        reason = self.state.reason(name, settings)
+        if explain:
+            print(f"{name}: {reason or 'up to date'}")
+        if reason is None:
+            for logical, url in self.state.published(name).items():
+                self.manifest.add(logical, url)
+            return False
+
+        with self.manifest.recording() as published:
+            with self.profiler.span(name, reason=reason):
+                inputs, outputs = run()
+
+        # Every stage depends on the configuration and the builder itself
+        code = _files(Path(__file__).resolve().parent, "*.py")
+        self.state.record(
+            name, settings, [self.config_path, *code, *inputs], outputs, published
+        )
+        return True
+
+    def _build_assets(self) -> Tuple[List[str], List[str]]:
+        """Publish the static assets."""
+        self._copy_assets()
+        return _files(self.web_dir / "assets"), _files(self.output_dir / "assets")
+
+    def _build_paper(self, main_tex: str) -> Tuple[List[str], List[str]]:
+        """Convert the paper and publish its figures."""
+        converter = self._convert_latex_to_html(main_tex)
+        index = self.output_dir / "index.html"
+
+        outputs = [str(index)]
+        for image in converter.figure_images.values():
+            urls = [image.src]
+            urls.extend(
+                url for variants in image.srcsets.values() for url, _ in variants
+            )
+            outputs.extend(str(self.output_dir / url) for url in dict.fromkeys(urls))
+        templates = _files(self.web_dir / "templates")
+        return [*converter.inputs, *templates], outputs
+
     def _copy_assets(self):
         """Copy static assets to output directory."""
         assets_src = self.web_dir / "assets"
         assets_dst = self.output_dir / "assets"
 
-        if assets_src.exists():
-            if assets_dst.exists():
-                shutil.rmtree(assets_dst)
-            shutil.copytree(assets_src, assets_dst)
-            print("Copied assets")
+        if assets_src.exists() and self.optimize:
+            # Minified copies keep their sources' mtimes, so the sync from
+            # the staging directory is still incremental
+            with tempfile.TemporaryDirectory() as staging:
+                for name, before, after in minify_tree(str(assets_src), staging):
+                    print(describe_savings(f"assets/{name}", before, after))
+                stats = sync_tree(
+                    staging,
+                    assets_dst,
+                    self._hardlink(),
+                    self.manifest.fingerprinter(staging, "assets"),
+                )
+            print(f"Synced assets: {stats}")
+        elif assets_src.exists():
+            stats = sync_tree(
+                assets_src,
+                assets_dst,
+                self._hardlink(),
+                self.manifest.fingerprinter(str(assets_src), "assets"),
+            )
+            print(f"Synced assets: {stats}")
         else:
             # Create default assets
             self._create_default_assets()
@@ -78,13 +278,12 @@ class WebsiteBuilder:
 
         # Create default CSS
         css_content = self._generate_default_css()
-        with open(assets_dir / "style.css", "w") as f:
-            f.write(css_content)
-
-        # Create theme CSS
         theme_css = self._generate_theme_css()
-        with open(assets_dir / "theme.css", "w") as f:
-            f.write(theme_css)
+        for name, content in (("style.css", css_content), ("theme.css", theme_css)):
+            if self.optimize:
+                before, content = len(content), minify_css(content)
+                print(describe_savings(f"assets/{name}", before, len(content)))
+            self.manifest.write(str(assets_dir), "assets", name, content)
 
         print("Created default assets")
 
@@ -331,63 +530,357 @@ body {
 
     def _convert_latex_to_html(self, main_tex: str):
         """Convert LaTeX to HTML."""
-        converter = LatexToHtmlConverter()
+        # Optimizing before the page is written keeps an unchanged page as it is
+        postprocess = None
+        if self.optimize:
+            postprocess = partial(self._optimize_html, name="index.html")
+        converter = LatexToHtmlConverter(
+            self.config_path,
+            self.cache_dir,
+            jobs=self.jobs,
+            manifest=self.manifest,
+            postprocess=postprocess,
+            profiler=self.profiler,
+        )
         converter.convert_file(main_tex, str(self.output_dir))
-        print(f"Converted {main_tex} to HTML")
-
-    def _copy_figures(self):
-        """Copy figures from paper directory to output."""
-        figures_src = self.paper_dir / "figures"
-        figures_dst = self.output_dir / "figures"
-
-        if figures_src.exists():
-            if figures_dst.exists():
-                shutil.rmtree(figures_dst)
-            shutil.copytree(figures_src, figures_dst)
-            print("Copied figures")
-
-    def _generate_additional_pages(self):
+        print(f"Converted {main_tex} to HTML ({converter.describe_timings()})")
+        return converter
+
+    def _optimize_pages(self, pages: Optional[List[Path]] = None) -> None:
+        """Minify the generated pages and inline their critical CSS."""
+        if pages is None:
+            pages = sorted(self.output_dir.glob("*.html"))
+        for page in pages:
+            if not page.is_file():
+                continue
+            with open(page, "r", encoding="utf-8") as f:
+                original = f.read()
+            write_atomic(str(page), [self._optimize_html(original, page.name)])
+
+    def _optimize_html(self, original: str, name: str) -> str:
+        """Return a page minified and with its critical CSS inlined."""
+        with self.profiler.span(f"optimize {name}"):
+            minified = minify_html(original)
+            optimized = inline_critical_css(minified, self._read_stylesheet)
+
+        size = len(minified.encode("utf-8"))
+        print(describe_savings(name, len(original.encode("utf-8")), size))
+        if len(optimized) > len(minified):
+            inlined = len(optimized.encode("utf-8")) - size
+            print(f"Inlined {inlined} bytes of critical CSS into {name}")
+        return optimized
+
+    def _read_stylesheet(self, href: str) -> Optional[str]:
+        """Return the CSS of a local stylesheet linked from a page."""
+        if "//" in href:
+            return None
+        path = self.output_dir / href
+        if not path.is_file():
+            return None
+        return path.read_text(encoding="utf-8")
+
+    def _hardlink(self) -> bool:
+        """Return whether synced files may be hardlinked to their sources."""
+        return bool(self.config.get("build", {}).get("hardlink_assets", False))
+
+    def _generate_additional_pages(
+        self, settings: Dict[str, str], explain: bool = False
+    ) -> bool:
         """Generate additional pages like BibTeX, etc."""
         # Generate BibTeX page
         bib_file = self.paper_dir / "bibliography.bib"
-        if bib_file.exists():
+        if not bib_file.exists():
+            return False
+
+        def run() -> Tuple[List[str], List[str]]:
+            page = self.output_dir / "bibtex.html"
             self._generate_bibtex_page(bib_file)
+            return [str(bib_file), *_files(self.web_dir / "templates")], [str(page)]
+
+        return self._run_stage("bibtex", settings, run, explain)
 
     def _generate_bibtex_page(self, bib_file: Path):
         """Generate a BibTeX citation page."""
         with open(bib_file, "r") as f:
             bib_content = f.read()
 
-        html_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>BibTeX Citation</title>
-    <link rel="stylesheet" href="assets/style.css">
-    <link rel="stylesheet" href="assets/theme.css">
-</head>
-<body>
-    <div class="paper-content">
-        <h1>BibTeX Citation</h1>
-        <pre><code>{bib_content}</code></pre>
-        <a href="index.html" class="btn btn-primary">Back to Paper</a>
-    </div>
-</body>
-</html>
-"""
-
-        with open(self.output_dir / "bibtex.html", "w") as f:
-            f.write(html_content)
+        templates = template_environment(
+            [str(self.web_dir / "templates")], self.cache_dir
+        )
+        html_content = templates.get_template("bibtex.html").render(
+            title="BibTeX Citation",
+            asset_url=self.manifest.url,
+            syntax_highlighting=self.config.get("website", {}).get(
+                "syntax_highlighting", False
+            ),
+            bib_content=bib_content,
+        )
+
+        if self.optimize:
+            html_content = self._optimize_html(html_content, "bibtex.html")
+        write_atomic(str(self.output_dir / "bibtex.html"), [html_content])
 
         print("Generated BibTeX page")
 
 
+def _files(directory: Path, pattern: str = "**/*") -> List[str]:
+    """Return the sorted paths of the files in a directory matching a pattern."""
+    return sorted(str(path) for path in directory.glob(pattern) if path.is_file())
+
+
+def _digest(items: Iterable[str]) -> str:
+    """Return a short hash of a sequence of strings."""
+    return hashlib.sha256(json.dumps(list(items)).encode("utf-8")).hexdigest()[:16]
+
+
+def watch(
+    config_path: str = "config.yaml",
+    jobs: int = 1,
+    optimize: Optional[bool] = None,
+    explain: bool = False,
+    server: Optional[LiveReloadServer] = None,
+) -> None:
+    """Rebuild the website whenever its sources change, until interrupted.
+
+    Only the stages whose inputs changed run again, and pages open through
+    ``server`` reload when a rebuild changes the output.
+    """
+    builder = WebsiteBuilder(config_path, jobs, optimize)
+    builder.build(explain)
+    watcher = create_watcher([builder.paper_dir, builder.web_dir, config_path])
+    print(f"Watching {builder.paper_dir}, {builder.web_dir} and {config_path}")
+
+    try:
+        while True:
+            changed = wait_for_changes(watcher)
+            print(f"Changed: {', '.join(changed)}")
+            started = time.perf_counter()
+
+            # The configuration may have changed too
+            builder = WebsiteBuilder(config_path, jobs, optimize)
+            try:
+                built = builder.build(explain)
+            except Exception as error:
+                # A half-finished edit must not end the session
+                print(f"Build failed: {error}")
+                continue
+            if not built:
+                continue
+
+            print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if server is not None and builder.changed_files:
+                server.reload()
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        watcher.close()
+
+
+@dataclass
+class PaperResult:
+    """Outcome of building one paper of a batch."""
+
+    root: str
+    ok: bool
+    seconds: float
+    changed: int = 0
+    error: str = ""
+
+
+def load_batch(path: str) -> Tuple[List[str], Optional[str]]:
+    """Return the project roots and the shared cache directory of a batch file.
+
+    The file lists the roots under ``papers`` and may name a ``cache_dir``
+    shared by all of them; paths are relative to the file.
+    """
+    with open(path, "r") as f:
+        batch = yaml.safe_load(f) or {}
+    if isinstance(batch, list):
+        batch = {"papers": batch}
+
+    base = os.path.dirname(os.path.abspath(path))
+    roots = [os.path.join(base, str(root)) for root in batch.get("papers") or []]
+    cache_dir = batch.get("cache_dir")
+    return roots, os.path.join(base, cache_dir) if cache_dir else None
+
+
+def build_batch(
+    roots: List[str],
+    jobs: int = 1,
+    cache_dir: Optional[str] = None,
+    optimize: Optional[bool] = None,
+) -> List[PaperResult]:
+    """Build many papers in ``jobs`` worker processes.
+
+    Each worker imports the builder once and builds one paper after
+    another, and the papers share the template, equation, bibliography and
+    section caches in ``cache_dir``. A paper that fails is reported
+    without stopping the others.
+    """
+    if jobs <= 1 or len(roots) < 2:
+        return [_build_paper(root, cache_dir, optimize) for root in roots]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(roots))) as executor:
+        futures = [
+            executor.submit(_build_paper, root, cache_dir, optimize) for root in roots
+        ]
+        for root, future in zip(roots, futures):
+            try:
+                results.append(future.result())
+            except Exception as error:
+                # The worker itself died, e.g. killed for running out of memory
+                results.append(PaperResult(root, False, 0.0, error=repr(error)))
+    return results
+
+
+def _build_paper(
+    root: str, cache_dir: Optional[str], optimize: Optional[bool]
+) -> PaperResult:
+    """Build one paper of a batch, keeping its progress output to itself."""
+    started = time.perf_counter()
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            builder = WebsiteBuilder(optimize=optimize, root=root, cache_dir=cache_dir)
+            ok = builder.build()
+    except Exception as error:
+        seconds = time.perf_counter() - started
+        return PaperResult(
+            root, False, seconds, error=f"{type(error).__name__}: {error}"
+        )
+
+    seconds = time.perf_counter() - started
+    if not ok:
+        # The builder prints why it gave up last
+        lines = log.getvalue().strip().splitlines()
+        return PaperResult(root, False, seconds, error=lines[-1] if lines else "")
+    return PaperResult(root, True, seconds, len(builder.changed_files))
+
+
+def describe_batch(results: List[PaperResult]) -> str:
+    """Return a table of the status and build time of every paper."""
+    names = [os.path.relpath(result.root) for result in results]
+    width = max([len("Paper")] + [len(name) for name in names])
+    lines = [f"{'Paper':<{width}}  {'Status':<6}  {'Time':>8}  Details"]
+    for name, result in zip(names, results):
+        if result.ok:
+            status, details = "ok", f"{result.changed} files changed"
+        else:
+            status, details = "failed", result.error
+        lines.append(
+            f"{name:<{width}}  {status:<6}  {result.seconds:>6.2f} s  {details}"
+        )
+    failed = sum(not result.ok for result in results)
+    lines.append(f"Built {len(results) - failed} of {len(results)} papers")
+    return "\n".join(lines)
+
+
 def main():
     """Main function."""
-    builder = WebsiteBuilder()
-    success = builder.build()
+    parser = argparse.ArgumentParser(description="Build the paper website.")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="number of processes used to convert sections, or to build the "
+        "papers of a --batch",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_const",
+        const=True,
+        help="minify assets and pages and inline critical CSS",
+    )
+    parser.add_argument(
+        "--no-optimize",
+        dest="optimize",
+        action="store_const",
+        const=False,
+        help="skip optimization even if build.optimize is set",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="print which input caused each build stage to run",
+    )
+    parser.add_argument(
+        "--changed-files",
+        metavar="FILE",
+        help="write the added (A), modified (M) and removed (D) output files",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="rebuild whenever src/paper, src/web or config.yaml change",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="watch and serve docs/ with live reload",
+    )
+    parser.add_argument(
+        "--port", type=int, default=8000, help="port of the --serve server"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_TRACE,
+        metavar="TRACE",
+        help=f"write a Chrome trace of the build stages (default {DEFAULT_TRACE})",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="STAGE",
+        help="dump cProfile statistics of one stage, e.g. paper, to STAGE.pstats",
+    )
+    parser.add_argument(
+        "--memory-report",
+        nargs="?",
+        const=DEFAULT_MEMORY_REPORT,
+        metavar="REPORT",
+        help="write the peak memory and top allocation sites of every stage "
+        f"and section as JSON (default {DEFAULT_MEMORY_REPORT})",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="build every project listed in a YAML batch file",
+    )
+    args = parser.parse_args()
+
+    if args.batch:
+        roots, cache_dir = load_batch(args.batch)
+        results = build_batch(roots, args.jobs, cache_dir, args.optimize)
+        print(describe_batch(results))
+        if not all(result.ok for result in results):
+            sys.exit(1)
+        return
+
+    if args.watch or args.serve:
+        server = None
+        if args.serve:
+            server = LiveReloadServer("docs", port=args.port)
+            server.start()
+            print(f"Serving the website at {server.url}")
+        try:
+            watch(
+                jobs=args.jobs,
+                optimize=args.optimize,
+                explain=args.explain,
+                server=server,
+            )
+        finally:
+            if server is not None:
+                server.stop()
+        return
+
+    profiler = Profiler(args.cprofile, memory=bool(args.memory_report))
+    builder = WebsiteBuilder(jobs=args.jobs, optimize=args.optimize, profiler=profiler)
+    with profiler.span("build"):
+        success = builder.build(explain=args.explain, changed_files=args.changed_files)
+    report(profiler, args.profile, args.memory_report)
 
     if not success:
         sys.exit(1)
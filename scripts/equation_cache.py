@@ -0,0 +1,175 @@
+"""
+Persistent cache of rendered equations shared between builds.
+
+Rendered equations are stored in a SQLite database keyed by the
+normalized TeX, the display mode and the renderer with its version, so
+papers that reuse the same notation render each equation only once. The
+database runs in WAL mode with a busy timeout, so one cache directory can
+be shared by concurrent builds, and the least recently used entries are
+evicted once the cache grows past its size limit. A cache can be used
+from several threads of one process.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+DEFAULT_MAX_ENTRIES = 50000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS equations (
+    key TEXT PRIMARY KEY,
+    output TEXT NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS equations_used ON equations (used);
+"""
+
+
+class EquationCache:
+    """SQLite store of rendered equations."""
+
+    def __init__(
+        self, path: str, renderer: str, max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        """Initialize the cache in the database file ``path``.
+
+        ``renderer`` names the renderer and its version; entries written by
+        other renderers are never returned.
+        """
+        self.path = Path(path)
+        self.renderer = renderer
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._new: Dict[str, str] = {}
+        self._used: Set[str] = set()
+        # Guards the connection and the pending entries across threads
+        self._lock = threading.RLock()
+
+    def key(self, tex: str, display: bool) -> str:
+        """Return the cache key for normalized TeX in the given mode."""
+        mode = "block" if display else "inline"
+        text = f"{self.renderer}\0{mode}\0{tex}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached output for ``key``, or None on a miss.
+
+        An empty string records an equation the renderer could not convert.
+        """
+        with self._lock:
+            output = self._new.get(key)
+            if output is None:
+                output = self._select(key)
+            if output is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._used.add(key)
+            return output
+
+    def put(self, key: str, output: str) -> None:
+        """Store rendered output; it is written to disk by flush."""
+        with self._lock:
+            self._new[key] = output
+
+    def flush(self) -> None:
+        """Write new entries and usage times, then evict old entries."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write the pending entries while holding the lock."""
+        if not (self._new or self._used):
+            return
+        now = time.time()
+        try:
+            connection = self._connect()
+            if connection is None:
+                return
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO equations (key, output, used) "
+                    "VALUES (?, ?, ?)",
+                    [(key, output, now) for key, output in self._new.items()],
+                )
+                connection.executemany(
+                    "UPDATE equations SET used = ? WHERE key = ?",
+                    [(now, key) for key in self._used],
+                )
+                connection.execute(
+                    "DELETE FROM equations WHERE key IN (SELECT key FROM equations "
+                    "ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+        self._new.clear()
+        self._used.clear()
+
+    def close(self) -> None:
+        """Flush pending entries and close the database."""
+        with self._lock:
+            self._flush()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def size(self) -> int:
+        """Return the number of entries stored on disk."""
+        with self._lock:
+            try:
+                connection = self._connect()
+                if connection is None:
+                    return 0
+                row = connection.execute("SELECT COUNT(*) FROM equations").fetchone()
+                return int(row[0])
+            except sqlite3.Error as e:
+                self._disable(e)
+                return 0
+
+    def _select(self, key: str) -> Optional[str]:
+        """Read one entry from the database."""
+        try:
+            connection = self._connect()
+            if connection is None:
+                return None
+            row = connection.execute(
+                "SELECT output FROM equations WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        return row[0] if row else None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the database on first use, or return None if it is unusable."""
+        if self._connection is None and not self._disabled:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                connection = sqlite3.connect(
+                    str(self.path), timeout=30, check_same_thread=False
+                )
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(_SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                self._disable(e)
+                return None
+            self._connection = connection
+        return self._connection
+
+    def _disable(self, error: Exception) -> None:
+        """Stop using a database that cannot be read or written."""
+        # A broken cache only costs re-rendering, so the build carries on
+        print(f"Warning: equation cache {self.path} disabled: {error}")
+        self._disabled = True
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
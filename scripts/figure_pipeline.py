@@ -0,0 +1,351 @@
+"""
+Responsive figure pipeline.
+
+Only the images a paper references are published. Each raster image is
+resized to several widths and encoded as WebP plus its original format,
+so that pages can offer a ``srcset`` and browsers download the smallest
+image that fits. Encoded variants are cached by the hash of the source
+image, so unchanged figures are never encoded twice, and figures that
+need encoding are processed in parallel. Files Pillow cannot resize, such
+as PDF or SVG figures, are copied unchanged. Published names are
+fingerprinted with the hash of the source, like other assets, and every
+figure is published below the figures directory of the output, wherever
+its source lies. The files each run publishes are recorded there, so the
+next run removes the versions it no longer needs and nothing else.
+
+Every figure also records its intrinsic size, read from the image header,
+and opaque images get a tiny blurred placeholder to inline in the page, so
+that the layout does not shift while the images load.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from asset_manifest import fingerprint
+from file_sync import copy_file, file_hash
+from output_files import write_atomic
+
+try:
+    from PIL import Image, ImageFilter, ImageOps
+except ImportError:  # pragma: no cover - pillow is a declared dependency
+    _PILLOW = False
+else:
+    _PILLOW = True
+
+# Pillow 9.1 moved the resampling filters into an enum
+_LANCZOS = (
+    getattr(getattr(Image, "Resampling", Image), "LANCZOS", None) if _PILLOW else None
+)
+
+DEFAULT_WIDTHS = (480, 960, 1600)
+
+# Directory of the output the figures are published to
+FIGURES_DIR = "figures"
+
+# Record of the files published in the figures directory by the last run
+PUBLISHED_FILE = ".published.json"
+
+# Extensions graphicx tries when \includegraphics omits one
+_GRAPHICS_EXTENSIONS = (".png", ".jpg", ".jpeg", ".pdf", ".eps", ".svg")
+
+# Pillow formats that are resized, with the fallback format they keep
+_RESIZABLE = {"PNG": ("png", "image/png"), "JPEG": ("jpg", "image/jpeg")}
+_WEBP = ("webp", "image/webp")
+
+# Width of the inlined placeholder, which the browser scales up
+_PLACEHOLDER_WIDTH = 16
+
+
+@dataclass
+class FigureImage:
+    """A published figure and the variants generated for it."""
+
+    src: str  # URL of the largest variant in the fallback format
+    width: Optional[int] = None
+    height: Optional[int] = None
+    srcsets: Dict[str, List[Tuple[str, int]]] = field(default_factory=dict)
+    placeholder: Optional[str] = None  # data URI of a blurred preview
+
+
+def process_figures(
+    paths: Sequence[str],
+    source_dir: str,
+    output_dir: str,
+    widths: Sequence[int] = DEFAULT_WIDTHS,
+    cache_dir: Optional[str] = None,
+    jobs: int = 1,
+) -> Dict[str, FigureImage]:
+    """Publish the referenced figures and return them by LaTeX path.
+
+    Published names contain a hash of the source and settings, so the
+    earlier versions the previous run published are removed.
+    """
+    settings = _settings(widths)
+    figures: Dict[str, FigureImage] = {}
+    published: Set[str] = set()
+    pending = []
+
+    with tempfile.TemporaryDirectory() as scratch:
+        for path in dict.fromkeys(paths):
+            source = find_figure(source_dir, path)
+            if source is None:
+                print(f"Warning: figure {path} not found")
+                continue
+
+            digest = hashlib.sha256(
+                f"{settings}\0{file_hash(source)}".encode()
+            ).hexdigest()
+            variants_dir = os.path.join(cache_dir or scratch, "figures", digest)
+            relative = _published_stem(path)
+
+            manifest = _read_manifest(variants_dir, os.path.basename(relative))
+            if manifest is not None:
+                figures[path] = _publish(
+                    manifest, variants_dir, relative, output_dir, published
+                )
+            else:
+                pending.append((path, source, variants_dir, relative, digest))
+
+        encoded = _map(
+            _encode,
+            [
+                (source, variants_dir, os.path.basename(relative), digest, widths)
+                for _, source, variants_dir, relative, digest in pending
+            ],
+            jobs,
+        )
+        for (path, source, variants_dir, relative, digest), manifest in zip(
+            pending, encoded
+        ):
+            if manifest is None:
+                # Not an image Pillow can resize, so it is published as it is
+                name = fingerprint(
+                    os.path.basename(relative) + os.path.splitext(source)[1], digest
+                )
+                url = os.path.join(os.path.dirname(relative), name)
+                _copy(source, os.path.join(output_dir, url), published)
+                figures[path] = FigureImage(_url(url), *_dimensions(source))
+            else:
+                figures[path] = _publish(
+                    manifest, variants_dir, relative, output_dir, published
+                )
+
+    _remove_stale(output_dir, published)
+    return figures
+
+
+def _settings(widths: Sequence[int]) -> str:
+    """Return the settings that determine the encoded variants."""
+    version = getattr(Image, "__version__", "") if _PILLOW else ""
+    return json.dumps({"widths": list(widths), "pillow": version, "format": 3})
+
+
+def find_figure(source_dir: str, path: str) -> Optional[str]:
+    """Return the image file for a LaTeX path, trying graphicx extensions."""
+    candidate = os.path.join(source_dir, path)
+    if os.path.isfile(candidate):
+        return candidate
+    for extension in _GRAPHICS_EXTENSIONS:
+        if os.path.isfile(candidate + extension):
+            return candidate + extension
+    return None
+
+
+def _published_stem(path: str) -> str:
+    """Return where below the output a LaTeX figure path is published.
+
+    Parent directories and absolute roots are dropped, so that figures
+    outside the paper's directory still land in the figures directory.
+    """
+    stem = Path(os.path.splitext(os.path.normpath(path))[0])
+    parts = [part for part in stem.parts if part not in (stem.anchor, "..")]
+    if len(parts) > 1 and parts[0] == FIGURES_DIR:
+        parts = parts[1:]
+    return os.path.join(FIGURES_DIR, *parts)
+
+
+def _map(function: Callable[..., Any], arguments: List[Tuple], jobs: int) -> List:
+    """Apply a function to argument tuples, in worker processes when jobs > 1."""
+    if jobs <= 1 or len(arguments) < 2:
+        return [function(*args) for args in arguments]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(arguments))) as executor:
+        return list(executor.map(function, *zip(*arguments)))
+
+
+def _encode(
+    source: str, variants_dir: str, stem: str, digest: str, widths: Sequence[int]
+) -> Optional[Dict]:
+    """Write the resized variants of one image and return their manifest."""
+    if not _PILLOW:
+        return None
+    try:
+        with Image.open(source) as opened:
+            if opened.format not in _RESIZABLE or getattr(opened, "is_animated", False):
+                return None
+            extension, mime = _RESIZABLE[opened.format]
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    width, height = image.size
+    sizes = sorted({w for w in widths if w < width} | {width})
+    os.makedirs(variants_dir, exist_ok=True)
+    srcsets: Dict[str, List[Tuple[str, int]]] = {_WEBP[1]: [], mime: []}
+
+    for size in sizes:
+        resized = image
+        if size != width:
+            resized = image.resize(
+                (size, max(1, round(height * size / width))), _LANCZOS
+            )
+        for ext, kind in (_WEBP, (extension, mime)):
+            name = fingerprint(f"{stem}-{size}w.{ext}", digest)
+            _save(resized, os.path.join(variants_dir, name), ext)
+            srcsets[kind].append((name, size))
+
+    manifest = {
+        "width": width,
+        "height": height,
+        "fallback": mime,
+        "srcsets": srcsets,
+        "placeholder": _placeholder(image),
+    }
+    with open(os.path.join(variants_dir, f"{stem}.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def _dimensions(source: str) -> Tuple[Optional[int], Optional[int]]:
+    """Return the size of an image from its header, without decoding it."""
+    if not _PILLOW:
+        return None, None
+    try:
+        with Image.open(source) as image:
+            return image.size
+    except (OSError, SyntaxError, ValueError):
+        return None, None
+
+
+def _placeholder(image: "Image.Image") -> Optional[str]:
+    """Return a blurred preview of an opaque image as a data URI."""
+    # A preview behind a transparent figure would show through it
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        return None
+
+    width, height = image.size
+    size = (_PLACEHOLDER_WIDTH, max(1, round(height * _PLACEHOLDER_WIDTH / width)))
+    preview = image.convert("RGB").resize(size, _LANCZOS)
+    preview = preview.filter(ImageFilter.GaussianBlur(1))
+
+    buffer = io.BytesIO()
+    preview.save(buffer, "WEBP", quality=40)
+    encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+    return f"data:image/webp;base64,{encoded}"
+
+
+def _save(image: "Image.Image", path: str, extension: str) -> None:
+    """Encode one variant."""
+    if extension == "jpg":
+        image.convert("RGB").save(
+            path, "JPEG", quality=85, optimize=True, progressive=True
+        )
+    elif extension == "webp":
+        image.save(path, "WEBP", quality=80, method=4)
+    else:
+        image.save(path, "PNG", optimize=True)
+
+
+def _read_manifest(variants_dir: str, stem: str) -> Optional[Dict]:
+    """Return the manifest of previously encoded variants, if complete."""
+    try:
+        with open(
+            os.path.join(variants_dir, f"{stem}.json"), "r", encoding="utf-8"
+        ) as f:
+            manifest: Dict = json.load(f)
+    except (OSError, ValueError):
+        return None
+    for variants in manifest["srcsets"].values():
+        for name, _ in variants:
+            if not os.path.isfile(os.path.join(variants_dir, name)):
+                return None
+    return manifest
+
+
+def _publish(
+    manifest: Dict,
+    variants_dir: str,
+    relative: str,
+    output_dir: str,
+    published: Set[str],
+) -> FigureImage:
+    """Copy encoded variants into the output and describe them."""
+    url_dir = os.path.dirname(relative)
+
+    srcsets: Dict[str, List[Tuple[str, int]]] = {}
+    for mime, variants in manifest["srcsets"].items():
+        srcsets[mime] = []
+        for name, size in variants:
+            url = os.path.join(url_dir, name)
+            _copy(
+                os.path.join(variants_dir, name),
+                os.path.join(output_dir, url),
+                published,
+            )
+            srcsets[mime].append((_url(url), size))
+
+    return FigureImage(
+        src=srcsets[manifest["fallback"]][-1][0],
+        width=manifest["width"],
+        height=manifest["height"],
+        srcsets=srcsets,
+        placeholder=manifest.get("placeholder"),
+    )
+
+
+def _copy(source: str, target: str, published: Set[str]) -> None:
+    """Publish a file under its fingerprinted name, unless already there."""
+    published.add(target)
+    # The name identifies the content, so an existing file is up to date
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        copy_file(source, target)
+
+
+def _remove_stale(output_dir: str, published: Set[str]) -> None:
+    """Remove the files the previous run published that this one did not.
+
+    Only files recorded in the figures directory are removed, so files
+    published by other means are left alone.
+    """
+    figures_dir = os.path.join(output_dir, FIGURES_DIR)
+    record = os.path.join(figures_dir, PUBLISHED_FILE)
+    names = sorted(_url(os.path.relpath(path, figures_dir)) for path in published)
+    try:
+        with open(record, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = []
+    if not names and not previous:
+        return
+
+    root = os.path.abspath(figures_dir)
+    for name in set(previous) - set(names):
+        path = os.path.abspath(os.path.join(figures_dir, name))
+        if os.path.commonpath([root, path]) == root and os.path.isfile(path):
+            os.unlink(path)
+    os.makedirs(figures_dir, exist_ok=True)
+    write_atomic(record, [json.dumps(names, indent=1)])
+
+
+def _url(path: str) -> str:
+    """Return a relative URL for a path below the output directory."""
+    return Path(path).as_posix()
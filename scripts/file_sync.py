@@ -0,0 +1,213 @@
+"""
+Incremental synchronisation of asset and figure directories.
+
+Files are compared by size and modification time first, and by content
+hash only when those disagree, so syncing an unchanged tree costs one
+``stat`` per file. New and changed files are cloned with a reflink or
+``os.copy_file_range`` where the filesystem supports it, and files that
+no longer exist in the source are removed from the destination.
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from types import ModuleType
+from typing import BinaryIO, Callable, Dict, Optional, Union
+
+fcntl: Optional[ModuleType]
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# ioctl request that clones a file's extents on Linux (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+# Errors meaning that a fast copy method is not supported for these files
+_UNSUPPORTED = {
+    errno.EBADF,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EXDEV,
+    errno.EPERM,
+}
+
+
+@dataclass
+class SyncStats:
+    """Counts of files handled by a sync."""
+
+    copied: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+    def __str__(self) -> str:
+        """Return a short summary for build output."""
+        return (
+            f"{self.copied} copied, {self.unchanged} unchanged, "
+            f"{self.removed} removed"
+        )
+
+
+def sync_tree(
+    src: Union[str, os.PathLike],
+    dst: Union[str, os.PathLike],
+    hardlink: bool = False,
+    rename: Optional[Callable[[str], str]] = None,
+) -> SyncStats:
+    """Make ``dst`` an exact copy of the directory ``src``.
+
+    With ``hardlink``, files are linked instead of copied where possible;
+    later in-place writes to the destination would then change the source.
+    ``rename`` maps the path of a source file to its name in the destination.
+    """
+    stats = SyncStats()
+    _sync_directory(os.fspath(src), os.fspath(dst), hardlink, rename, stats)
+    return stats
+
+
+def _sync_directory(
+    src: str,
+    dst: str,
+    hardlink: bool,
+    rename: Optional[Callable[[str], str]],
+    stats: SyncStats,
+) -> None:
+    """Sync one directory level and recurse into subdirectories."""
+    if os.path.isfile(dst) or os.path.islink(dst):
+        os.unlink(dst)
+        stats.removed += 1
+    os.makedirs(dst, exist_ok=True)
+
+    existing: Dict[str, os.DirEntry] = {entry.name: entry for entry in os.scandir(dst)}
+
+    for entry in os.scandir(src):
+        name = entry.name
+        if rename is not None and not entry.is_dir():
+            name = rename(entry.path)
+        target = os.path.join(dst, name)
+        current = existing.pop(name, None)
+
+        if entry.is_dir():
+            _sync_directory(entry.path, target, hardlink, rename, stats)
+            continue
+        if current is not None and current.is_dir(follow_symlinks=False):
+            stats.removed += _remove(current)
+            current = None
+
+        if current is not None and _is_unchanged(entry, current):
+            stats.unchanged += 1
+        else:
+            copy_file(entry.path, target, hardlink)
+            stats.copied += 1
+
+    # Whatever is left no longer exists in the source
+    for entry in existing.values():
+        stats.removed += _remove(entry)
+
+
+def _is_unchanged(src: os.DirEntry, dst: os.DirEntry) -> bool:
+    """Return whether the destination already holds the source's content."""
+    src_stat = src.stat()
+    dst_stat = dst.stat(follow_symlinks=False)
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return True
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+
+    # Same size but a different mtime, e.g. after a fresh checkout
+    if file_hash(src.path) != file_hash(dst.path):
+        return False
+    os.utime(dst.path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
+
+
+def copy_file(src: str, dst: str, hardlink: bool = False) -> None:
+    """Replace ``dst`` with a copy of ``src``, keeping its mtime and mode."""
+    directory = os.path.dirname(dst) or "."
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(dst)}.", suffix=".tmp"
+    )
+    try:
+        if hardlink and _link(src, tmp_path):
+            os.close(fd)
+        else:
+            with os.fdopen(fd, "wb") as dst_file, open(src, "rb") as src_file:
+                _clone(src_file, dst_file)
+            shutil.copystat(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _link(src: str, tmp_path: str) -> bool:
+    """Hardlink ``src`` over the temporary file, if the filesystem allows it."""
+    try:
+        os.unlink(tmp_path)
+        os.link(src, tmp_path)
+        return True
+    except OSError:
+        # mkstemp's file is gone, so recreate it for a regular copy
+        open(tmp_path, "wb").close()
+        return False
+
+
+def _clone(src_file: BinaryIO, dst_file: BinaryIO) -> None:
+    """Copy file content with the fastest method the filesystem supports."""
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+            return
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+
+    if hasattr(os, "copy_file_range"):
+        size = os.fstat(src_file.fileno()).st_size
+        copied = 0
+        try:
+            while copied < size:
+                sent = os.copy_file_range(
+                    src_file.fileno(), dst_file.fileno(), size - copied
+                )
+                if sent == 0:
+                    # Stopped short, so the rest is copied by reading it
+                    src_file.seek(copied)
+                    dst_file.seek(copied)
+                    break
+                copied += sent
+            else:
+                return
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED or copied:
+                raise
+
+    shutil.copyfileobj(src_file, dst_file, 1 << 20)
+
+
+def _remove(entry: os.DirEntry) -> int:
+    """Remove a file or directory tree and return the number of files."""
+    if entry.is_dir(follow_symlinks=False):
+        count = sum(len(files) for _, _, files in os.walk(entry.path))
+        shutil.rmtree(entry.path)
+        return count
+    os.unlink(entry.path)
+    return 1
+
+
+def file_hash(path: str) -> str:
+    """Return the SHA-256 hash of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
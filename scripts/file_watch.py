@@ -0,0 +1,210 @@
+"""
+Watching the paper sources for changes.
+
+On Linux the watcher uses inotify through ctypes, so changes are noticed
+as soon as they are written without any extra dependency. Elsewhere, or
+when inotify is unavailable, it falls back to polling file modification
+times. Editors often save a file in several steps, so changes are
+collected until the sources have been quiet for a short debounce delay.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+# Files editors write next to the ones being edited
+_IGNORED_SUFFIXES = ("~", ".swp", ".swx", ".tmp")
+
+# inotify event flags, from <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+)
+_EVENT = struct.Struct("iIII")
+
+
+def _ignored(path: str) -> bool:
+    """Return whether a path is an editor's temporary or backup file."""
+    name = os.path.basename(path)
+    return name.startswith((".#", "4913")) or name.endswith(_IGNORED_SUFFIXES)
+
+
+class PollingWatcher:
+    """Watcher comparing file modification times at a fixed interval."""
+
+    def __init__(self, paths: Iterable[Union[str, os.PathLike]], interval: float = 0.2):
+        """Watch files and directory trees, checking every ``interval`` seconds."""
+        self.paths = [str(path) for path in paths]
+        self.interval = interval
+        self._files = self._scan()
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Return the paths changed within ``timeout`` seconds, or forever."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            files = self._scan()
+            changed = {
+                path
+                for path in set(files) | set(self._files)
+                if files.get(path) != self._files.get(path)
+            }
+            self._files = files
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self) -> None:
+        """Stop watching."""
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Return the size and mtime of every watched file."""
+        files = {}
+        for root in self.paths:
+            if os.path.isfile(root):
+                candidates = [root]
+            else:
+                candidates = [
+                    os.path.join(directory, name)
+                    for directory, _, names in os.walk(root)
+                    for name in names
+                ]
+            for path in candidates:
+                if _ignored(path):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files[path] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+
+class InotifyWatcher:
+    """Watcher receiving change events from the Linux kernel."""
+
+    def __init__(self, paths: Iterable[Union[str, os.PathLike]]):
+        """Watch files and directory trees; raises OSError without inotify."""
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._directories: Dict[int, str] = {}
+        # Files are watched through their directory, since editors often
+        # replace them instead of writing them in place
+        self._files: Dict[str, Set[str]] = {}
+        for path in map(str, paths):
+            if os.path.isdir(path):
+                for directory, _, _ in os.walk(path):
+                    self._watch(directory)
+            else:
+                directory = os.path.dirname(os.path.abspath(path))
+                self._files.setdefault(directory, set()).add(os.path.basename(path))
+                self._watch(directory)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Return the paths changed within ``timeout`` seconds, or forever."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if not readable:
+                return set()
+            changed = self._read()
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        """Stop watching."""
+        os.close(self.fd)
+
+    def _watch(self, directory: str) -> None:
+        """Add a watch for the entries of one directory."""
+        wd = self._add_watch(self.fd, os.fsencode(directory), _IN_MASK)
+        if wd >= 0:
+            self._directories[wd] = directory
+
+    def _read(self) -> Set[str]:
+        """Read the pending events and return the paths they concern."""
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[str] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                # Events were lost, so everything may have changed
+                changed.update(self._directories.values())
+                continue
+            directory = self._directories.get(wd)
+            if directory is None or not name:
+                continue
+            names = self._files.get(directory)
+            if names is not None and name not in names:
+                continue
+            path = os.path.join(directory, name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    for subdirectory, _, _ in os.walk(path):
+                        self._watch(subdirectory)
+                changed.add(path)
+            elif not _ignored(path):
+                changed.add(path)
+        return changed
+
+
+# Either kind of watcher, as returned by create_watcher
+Watcher = Union[InotifyWatcher, PollingWatcher]
+
+
+def create_watcher(paths: Iterable[Union[str, os.PathLike]]) -> Watcher:
+    """Return an inotify watcher where available, or a polling one."""
+    paths = list(paths)
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths)
+
+
+def wait_for_changes(watcher: Watcher, debounce: float = 0.05) -> List[str]:
+    """Block until sources change and stay quiet for ``debounce`` seconds."""
+    changed = watcher.wait()
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return sorted(changed)
+        changed |= more
@@ -0,0 +1,176 @@
+"""
+Resolution of \\input, \\include and \\subfile commands in LaTeX sources.
+
+Each source file is read once and split into text and include references.
+The resulting include graph records a hash of every file, so that a rebuild
+only re-reads files whose size or modification time changed and splices the
+document back together from the cached parts. Files included by the same
+parent are read in parallel.
+"""
+
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+# Comments are matched so that commented-out includes are left alone
+_INCLUDE = re.compile(r"(?<!\\)%[^\n]*|\\(input|include|subfile)\{([^}]+)\}")
+_SUBFILE_BODY = re.compile(r"\\begin\{document\}(.*?)\\end\{document\}", re.DOTALL)
+
+
+@dataclass
+class IncludeNode:
+    """A source file in the include graph."""
+
+    path: str
+    stat: Tuple[int, int]  # modification time and size when the file was read
+    digest: str
+    parts: List[Union[str, Tuple[str, str]]]  # text, or (command, included path)
+    includes: List[str] = field(default_factory=list)
+
+
+class IncludeGraph:
+    """Reads LaTeX documents and the files they include."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """Initialize an empty graph."""
+        self.nodes: Dict[str, IncludeNode] = {}
+        self.root: Optional[str] = None
+        self.reads = 0
+        self.max_workers = max_workers
+
+    def resolve(self, main_file: str) -> str:
+        """Return the content of ``main_file`` with every include spliced in."""
+        root = os.path.abspath(main_file)
+        if self.root and os.path.dirname(root) != os.path.dirname(self.root):
+            # Included paths are relative to the main document's directory
+            self.nodes.clear()
+        self.root = root
+
+        self._refresh(root)
+        if root not in self.nodes:
+            raise FileNotFoundError(f"LaTeX file {main_file} not found")
+        return self._splice(root, [])
+
+    def dependencies(self) -> Dict[str, str]:
+        """Return the hash of every file reachable from the main document."""
+        files = {}
+        pending = [self.root] if self.root else []
+        while pending:
+            path = pending.pop()
+            node = self.nodes.get(path)
+            if node is None or path in files:
+                continue
+            files[path] = node.digest
+            pending.extend(node.includes)
+        return files
+
+    def _refresh(self, root: str) -> None:
+        """Re-read changed files, one level of the include tree at a time."""
+        base = os.path.dirname(root)
+        seen: Set[str] = set()
+        level = [root]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while level:
+                seen.update(level)
+                stale = [path for path in level if self._is_stale(path)]
+                for path, node in zip(
+                    stale, executor.map(self._load, stale, repeat(base))
+                ):
+                    if node is not None:
+                        self.nodes[path] = node
+                    else:
+                        self.nodes.pop(path, None)
+
+                level = [
+                    child
+                    for path in level
+                    if path in self.nodes
+                    for child in self.nodes[path].includes
+                    if child not in seen
+                ]
+                # A file included twice by the same level is read once
+                level = list(dict.fromkeys(level))
+
+    def _is_stale(self, path: str) -> bool:
+        """Return whether a file changed since it was last read."""
+        node = self.nodes.get(path)
+        try:
+            return node is None or node.stat != _stat(path)
+        except OSError:
+            return True
+
+    def _load(self, path: str, base: str) -> Optional[IncludeNode]:
+        """Read a file and split it into text and includes relative to ``base``."""
+        try:
+            stat = _stat(path)
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self.reads += 1
+
+        digest = hashlib.sha256(data).hexdigest()
+        previous = self.nodes.get(path)
+        if previous is not None and previous.digest == digest:
+            # Touched but unchanged, so the parsed parts are still valid
+            previous.stat = stat
+            return previous
+
+        text = data.decode("utf-8")
+        parts: List[Union[str, Tuple[str, str]]] = []
+        includes = []
+        pos = 0
+        for match in _INCLUDE.finditer(text):
+            command = match.group(1)
+            if command is None:
+                continue
+            included = _include_path(base, match.group(2).strip())
+            parts.append(text[pos : match.start()])
+            parts.append((command, included))
+            includes.append(included)
+            pos = match.end()
+        parts.append(text[pos:])
+
+        return IncludeNode(path, stat, digest, parts, includes)
+
+    def _splice(self, path: str, stack: List[str]) -> str:
+        """Return the content of a file with its includes expanded."""
+        pieces = []
+        for part in self.nodes[path].parts:
+            if isinstance(part, str):
+                pieces.append(part)
+                continue
+
+            command, included = part
+            if included in stack or included == path:
+                print(f"Warning: circular \\{command} of {included} skipped")
+            elif included not in self.nodes:
+                print(f"Warning: included file {included} not found")
+            else:
+                text = self._splice(included, stack + [path])
+                if command == "subfile":
+                    body = _SUBFILE_BODY.search(text)
+                    text = body.group(1) if body else text
+                pieces.append(text)
+
+        return "".join(pieces)
+
+
+def _stat(path: str) -> Tuple[int, int]:
+    """Return the modification time and size of a file."""
+    result = os.stat(path)
+    return result.st_mtime_ns, result.st_size
+
+
+def _include_path(base: str, name: str) -> str:
+    """Return the absolute path of an included file, as LaTeX resolves it."""
+    # Included paths are relative to the main document, even in subfiles
+    path = os.path.abspath(os.path.join(base, name))
+    if os.path.exists(path + ".tex"):
+        return path + ".tex"
+    return path
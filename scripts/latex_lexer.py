@@ -0,0 +1,451 @@
+"""
+Single-pass LaTeX lexer used to clean section text for HTML output.
+
+The lexer reads the source once, dispatches every command token to a
+handler table and writes the result into one output buffer.
+"""
+
+import re
+from typing import Callable, Dict, List, Match, NamedTuple, Optional, Tuple
+
+# Tokens that interrupt plain text: commands, display-math delimiters and
+# figure markers left by the document scanner
+_SPECIAL = re.compile(r"\\|\$\$|\x00")
+_MARKER = "\x00"
+_COMMAND_NAME = re.compile(r"[A-Za-z]+")
+_BRACES = re.compile(r"[\\{}]")
+_WHITESPACE_RUN = re.compile(r"\s{2,}")
+_SPACE_RUN = re.compile(r" {2,}")
+_CITE = re.compile(r"\\cite\{([^}]+)\}")
+_LIST_TOKEN = re.compile(
+    r"\\item(?![A-Za-z])\s*|\\(begin|end)\{(?:itemize|enumerate)\}"
+)
+_BLOCK_TOKEN = re.compile(r"\$\$|<(/?)(?:ul|ol)>")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+Handler = Callable[[str, int, List[str]], int]
+
+# Commands whose (single) argument is dropped from the output
+_DROPPED = (
+    "label",
+    "paragraph",
+    "bibliographystyle",
+    "bibliography",
+    "caption",
+)
+_DROPPED_STARRED = ("section", "subsection", "subsubsection")
+
+_FORMATTING = {
+    "textbf": "strong",
+    "textit": "em",
+    "emph": "em",
+    "texttt": "code",
+}
+
+_REPLACEMENTS = {
+    "%": "%",
+    ",": " ",
+    ";": " ",
+    "quad": " ",
+    "qquad": "  ",
+    "centering": "",
+    "textwidth": "",
+}
+
+
+def read_group(text: str, pos: int) -> Optional[Tuple[str, int]]:
+    """Read a balanced ``{...}`` group starting at ``pos``.
+
+    Returns the group content and the position after the closing brace,
+    or None if there is no well-formed group at ``pos``.
+    """
+    if pos >= len(text) or text[pos] != "{":
+        return None
+
+    depth = 0
+    search = _BRACES.search
+    match = search(text, pos)
+    while match is not None:
+        char = match.group()
+        index = match.start()
+        if char == "\\":
+            # Skip escaped characters such as \{ and \}
+            match = search(text, index + 2)
+            continue
+        if char == "{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return text[pos + 1 : index], index + 1
+        match = search(text, index + 1)
+    return None
+
+
+def _skip_optional(text: str, pos: int) -> int:
+    """Skip an optional ``[...]`` argument starting at ``pos``."""
+    if pos < len(text) and text[pos] == "[":
+        end = text.find("]", pos)
+        if end != -1:
+            return end + 1
+    return pos
+
+
+def _squeeze_whitespace(match: Match[str]) -> str:
+    """Collapse blank-line runs to one empty line and space runs to one space."""
+    run = match.group()
+    if run.count("\n") >= 3:
+        first = run.find("\n")
+        last = run.rfind("\n")
+        run = run[:first] + "\n\n" + run[last + 1 :]
+    return _SPACE_RUN.sub(" ", run)
+
+
+class LatexLexer:
+    """Tokenizer that converts section-level LaTeX into HTML in one pass."""
+
+    def __init__(
+        self,
+        cite: Callable[[str], str],
+        figure: Optional[Callable[[int], str]] = None,
+    ):
+        """Initialize the lexer with callbacks for citations and figures."""
+        self._cite = cite
+        self._render_figure = figure
+        self._display_math = False
+
+        self._commands: Dict[str, Handler] = {
+            "\\": self._line_break,
+            "cite": self._citation,
+            "ref": self._reference,
+            "begin": self._begin,
+            "end": self._end,
+            "includegraphics": self._includegraphics,
+        }
+        for name in _DROPPED:
+            self._commands[name] = self._dropped(name, starred=False)
+        for name in _DROPPED_STARRED:
+            self._commands[name] = self._dropped(name, starred=True)
+        for name, tag in _FORMATTING.items():
+            self._commands[name] = self._formatting(name, tag)
+        for name, replacement in _REPLACEMENTS.items():
+            self._commands[name] = self._replacement(replacement)
+
+        self._environments: Dict[str, Callable[[str, List[str]], None]] = {
+            "equation": self._equation,
+            "align": self._align,
+            "itemize": self._list("ul"),
+            "enumerate": self._list("ol"),
+            "figure": self._figure,
+        }
+
+    def render(self, text: str) -> str:
+        """Convert LaTeX text to HTML with normalized whitespace."""
+        out: List[str] = []
+        self._render(text, out)
+        return _WHITESPACE_RUN.sub(_squeeze_whitespace, "".join(out)).strip()
+
+    def _render(self, text: str, out: List[str]) -> None:
+        """Write the HTML for ``text`` into ``out``."""
+        pos = 0
+        length = len(text)
+        search = _SPECIAL.search
+        commands = self._commands
+
+        while pos < length:
+            match = search(text, pos)
+            if match is None:
+                out.append(text[pos:])
+                return
+
+            start = match.start()
+            if start > pos:
+                out.append(text[pos:start])
+
+            if text[start] == _MARKER:
+                end = text.find(_MARKER, start + 1)
+                index = text[start + 1 : end]
+                if end == -1 or not index.isdigit():
+                    pos = start + 1
+                    continue
+                if self._render_figure is not None:
+                    out.append(self._render_figure(int(index)))
+                pos = end + 1
+                continue
+
+            if text[start] == "$":
+                math_end = display_math_end(text, start)
+                if math_end is None:
+                    out.append("$$")
+                    pos = start + 2
+                else:
+                    self._display(text[start + 2 : math_end - 2], out, "$$", "$$")
+                    pos = math_end
+                continue
+
+            # Command token: a run of letters or a single other character
+            pos = start + 1
+            if pos >= length:
+                out.append("\\")
+                return
+            name_match = _COMMAND_NAME.match(text, pos)
+            end = name_match.end() if name_match else pos + 1
+            handler = commands.get(text[pos:end])
+            if handler is None:
+                out.append(text[start:end])
+                pos = end
+            else:
+                pos = handler(text, end, out)
+
+    def _register_citations(self, text: str) -> None:
+        """Number citations inside text that is dropped from the output."""
+        for match in _CITE.finditer(text):
+            self._cite(match.group(1))
+
+    # Command handlers: each takes the position after the command name and
+    # returns the position where lexing continues.
+
+    def _line_break(self, text: str, pos: int, out: List[str]) -> int:
+        out.append("\\\\" if self._display_math else "\n")
+        return pos
+
+    def _citation(self, text: str, pos: int, out: List[str]) -> int:
+        group = read_group(text, pos)
+        if group is None or not group[0]:
+            out.append("\\cite")
+            return pos
+        out.append(self._cite(group[0]))
+        return group[1]
+
+    def _reference(self, text: str, pos: int, out: List[str]) -> int:
+        group = read_group(text, pos)
+        if group is None or not group[0]:
+            out.append("\\ref")
+            return pos
+        # Only the tie of Figure~\ref{...} becomes a plain space, other ties stay
+        start = pos - len("\\ref")
+        if text.endswith("Figure~", 0, start) and out and out[-1].endswith("~"):
+            out[-1] = out[-1][:-1] + " "
+        out.append(group[0])
+        return group[1]
+
+    def _dropped(self, name: str, starred: bool) -> Handler:
+        def handler(text: str, pos: int, out: List[str]) -> int:
+            start = pos + 1 if starred and text.startswith("*", pos) else pos
+            group = read_group(text, start)
+            if group is None:
+                out.append(f"\\{name}")
+                return pos
+            self._register_citations(group[0])
+            return group[1]
+
+        return handler
+
+    def _includegraphics(self, text: str, pos: int, out: List[str]) -> int:
+        group = read_group(text, _skip_optional(text, pos))
+        if group is None:
+            out.append("\\includegraphics")
+            return pos
+        return group[1]
+
+    def _formatting(self, name: str, tag: str) -> Handler:
+        def handler(text: str, pos: int, out: List[str]) -> int:
+            group = read_group(text, pos)
+            if group is None or not group[0]:
+                out.append(f"\\{name}")
+                return pos
+            out.append(f"<{tag}>")
+            self._render(group[0], out)
+            out.append(f"</{tag}>")
+            return group[1]
+
+        return handler
+
+    def _replacement(self, replacement: str) -> Handler:
+        def handler(text: str, pos: int, out: List[str]) -> int:
+            out.append(replacement)
+            return pos
+
+        return handler
+
+    def _begin(self, text: str, pos: int, out: List[str]) -> int:
+        group = read_group(text, pos)
+        environment = self._environments.get(group[0]) if group else None
+        if group is None or environment is None:
+            out.append("\\begin")
+            return pos
+
+        name, body_start = group
+        end = find_environment_end(text, body_start, name)
+        if end is None:
+            out.append("\\begin")
+            return pos
+
+        body_end, after = end
+        environment(text[body_start:body_end], out)
+        return after
+
+    def _end(self, text: str, pos: int, out: List[str]) -> int:
+        if text.startswith("{document}", pos):
+            return pos + len("{document}")
+        out.append("\\end")
+        return pos
+
+    # Environment handlers receive the body between \begin and \end.
+
+    def _equation(self, body: str, out: List[str]) -> None:
+        self._display(body, out, "$$", "$$")
+
+    def _align(self, body: str, out: List[str]) -> None:
+        self._display(body, out, "$$\\begin{align}", "\\end{align}$$")
+
+    def _display(self, body: str, out: List[str], opening: str, closing: str) -> None:
+        previous = self._display_math
+        self._display_math = True
+        out.append(opening)
+        self._render(body, out)
+        out.append(closing)
+        self._display_math = previous
+
+    def _figure(self, body: str, out: List[str]) -> None:
+        # Figures are rendered separately from the extracted figure list
+        self._register_citations(body)
+
+    def _list(self, tag: str) -> Callable[[str, List[str]], None]:
+        def environment(body: str, out: List[str]) -> None:
+            items = []
+            for chunk in split_items(body):
+                item: List[str] = []
+                self._render(chunk, item)
+                rendered = "".join(item).strip()
+                if rendered:
+                    items.append(f"<li>{rendered}</li>")
+            if items:
+                out.append(f"<{tag}>{''.join(items)}</{tag}>")
+
+        return environment
+
+
+def figure_marker(index: int) -> str:
+    """Return the marker that stands in for an already extracted figure."""
+    return f"{_MARKER}{index}{_MARKER}"
+
+
+def find_environment_end(text: str, pos: int, name: str) -> Optional[Tuple[int, int]]:
+    """Find the ``\\end{name}`` matching an environment opened before ``pos``.
+
+    Returns the position where the body ends and the position after the
+    closing command, or None if the environment is never closed.
+    """
+    opening = f"\\begin{{{name}}}"
+    closing = f"\\end{{{name}}}"
+    depth = 1
+    while True:
+        end = text.find(closing, pos)
+        if end == -1:
+            return None
+        nested = text.find(opening, pos, end)
+        if nested != -1:
+            depth += 1
+            pos = nested + len(opening)
+            continue
+        depth -= 1
+        if depth == 0:
+            return end, end + len(closing)
+        pos = end + len(closing)
+
+
+def split_items(body: str) -> List[str]:
+    """Split a list body at its top-level ``\\item`` commands."""
+    chunks = []
+    depth = 0
+    start = 0
+    for match in _LIST_TOKEN.finditer(body):
+        kind = match.group(1)
+        if kind == "begin":
+            depth += 1
+        elif kind == "end":
+            depth -= 1
+        elif depth == 0:
+            chunks.append(body[start : match.start()])
+            start = match.end()
+    chunks.append(body[start:])
+    return chunks
+
+
+class Segment(NamedTuple):
+    """A run of cleaned section content."""
+
+    kind: str  # "text", "math" or "list"
+    text: str
+
+
+def display_math_end(text: str, start: int) -> Optional[int]:
+    """Return the position after the ``$$`` closing the block at ``start``."""
+    end = text.find("$$", start + 2)
+    return None if end == -1 else end + 2
+
+
+def segment_content(content: str) -> List[Segment]:
+    """Split cleaned content into text, display-math and list segments.
+
+    The content is scanned once; ``$$`` blocks and top-level ``<ul>``/``<ol>``
+    lists become single segments so that nothing inside them is split.
+    Unclosed blocks are left as text.
+    """
+    segments = []
+    text_start = 0
+    list_start = 0
+    depth = 0
+    pos = 0
+
+    def add_text(end: int) -> None:
+        if end > text_start:
+            segments.append(Segment("text", content[text_start:end]))
+
+    while True:
+        match = _BLOCK_TOKEN.search(content, pos)
+        if match is None:
+            break
+        start, pos = match.span()
+
+        if match.group() == "$$":
+            if depth:
+                continue
+            end = display_math_end(content, start)
+            if end is None:
+                break
+            add_text(start)
+            segments.append(Segment("math", content[start:end]))
+            text_start = pos = end
+        elif match.group(1):
+            if depth:
+                depth -= 1
+                if depth == 0:
+                    add_text(list_start)
+                    segments.append(Segment("list", content[list_start:pos]))
+                    text_start = pos
+        else:
+            if depth == 0:
+                list_start = start
+            depth += 1
+
+    add_text(len(content))
+    return segments
+
+
+def split_paragraphs(content: str) -> List[str]:
+    """Split cleaned content at blank lines outside math blocks and lists."""
+    paragraphs = []
+    current: List[str] = []
+    for segment in segment_content(content):
+        if segment.kind != "text":
+            current.append(segment.text)
+            continue
+        pieces = _PARAGRAPH_BREAK.split(segment.text)
+        current.append(pieces[0])
+        for piece in pieces[1:]:
+            paragraphs.append("".join(current).strip())
+            current = [piece]
+    paragraphs.append("".join(current).strip())
+    return [paragraph for paragraph in paragraphs if paragraph]
@@ -0,0 +1,150 @@
+"""
+Single-scan extraction of document structure from LaTeX source.
+
+The whole document is walked once to find the title, author block,
+abstract, section boundaries, figures, equations and labels, so that every
+environment is located exactly once.
+"""
+
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, List, Match, NamedTuple, Optional, Tuple
+
+from latex_lexer import find_environment_end, read_group
+
+_DOCUMENT_TOKEN = re.compile(
+    r"\\(?:(title|author)\{"
+    r"|(section|subsection|subsubsection)\{"
+    r"|(label)\{"
+    r"|begin\{(abstract|figure|equation|align)\})"
+)
+_INCLUDEGRAPHICS = re.compile(r"\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\}")
+_CAPTION = re.compile(r"\\caption(?:\[[^\]]*\])?(?=\{)")
+_LABEL = re.compile(r"\\label\{([^}]+)\}")
+_CITE = re.compile(r"\\cite\{([^}]+)\}")
+
+
+class SectionSpan(NamedTuple):
+    """A sectioning command and the source range of its content."""
+
+    level: str
+    title: str
+    start: int
+    end: int
+
+
+class FigureSpan(NamedTuple):
+    """A figure environment located in the source."""
+
+    start: int
+    end: int
+    citations: List[str]
+    figure: Optional[int]  # index into DocumentScan.figures, if it has an image
+
+
+@dataclass
+class DocumentScan:
+    """Structure of a LaTeX document found in a single pass."""
+
+    title: Optional[str] = None
+    author: Optional[str] = None
+    abstract: Optional[str] = None
+    sections: List[SectionSpan] = field(default_factory=list)
+    figures: List[Dict] = field(default_factory=list)
+    figure_spans: List[FigureSpan] = field(default_factory=list)
+    equations: List[Dict] = field(default_factory=list)
+    labels: Dict[str, Tuple[str, Optional[int]]] = field(default_factory=dict)
+
+    def figures_in(self, start: int, end: int) -> List[FigureSpan]:
+        """Return the figure spans that begin inside ``[start, end)``."""
+        first = bisect_left(self.figure_spans, (start,))
+        last = bisect_left(self.figure_spans, (end,), first)
+        return self.figure_spans[first:last]
+
+
+def scan_document(content: str) -> DocumentScan:
+    """Walk LaTeX source once and return its structure."""
+    scan = DocumentScan()
+    headings: List[Tuple[str, str, int, int]] = []
+    search = _DOCUMENT_TOKEN.search
+    pos = 0
+
+    while True:
+        match = search(content, pos)
+        if match is None:
+            break
+        command, level, label, environment = match.groups()
+        group_start = match.end() - 1
+
+        if environment:
+            pos = _scan_environment(content, match, environment, scan)
+            continue
+
+        group = read_group(content, group_start)
+        if group is None:
+            pos = match.end()
+            continue
+        text, pos = group
+
+        if level:
+            headings.append((level, text, match.start(), pos))
+        elif label:
+            if headings:
+                scan.labels.setdefault(text, ("section", len(headings) - 1))
+        elif command == "title":
+            if scan.title is None:
+                scan.title = text
+        elif scan.author is None:
+            scan.author = text
+
+    # Each section runs until the next heading or the end of the document
+    for i, (level, title, _, start) in enumerate(headings):
+        end = headings[i + 1][2] if i + 1 < len(headings) else len(content)
+        scan.sections.append(SectionSpan(level, title, start, end))
+
+    return scan
+
+
+def _scan_environment(
+    content: str, match: Match[str], name: str, scan: DocumentScan
+) -> int:
+    """Record one environment and return the position after it."""
+    body_start = match.end()
+    end = find_environment_end(content, body_start, name)
+    if end is None:
+        return body_start
+    body_end, after = end
+    body = content[body_start:body_end]
+
+    if name == "abstract":
+        if scan.abstract is None:
+            scan.abstract = body
+    elif name == "figure":
+        index = None
+        image = _INCLUDEGRAPHICS.search(body)
+        if image:
+            caption = _CAPTION.search(body)
+            # Captions often contain citations and formatting, so the whole
+            # balanced group is read
+            group = read_group(body, caption.end()) if caption else None
+            label_match = _LABEL.search(body)
+            index = len(scan.figures)
+            scan.figures.append(
+                {
+                    "path": image.group(1),
+                    "caption": group[0] if group else "",
+                    "label": label_match.group(1) if label_match else "",
+                }
+            )
+        for label in _LABEL.findall(body):
+            scan.labels.setdefault(label, ("figure", index))
+        scan.figure_spans.append(
+            FigureSpan(match.start(), after, _CITE.findall(body), index)
+        )
+    else:
+        for label in _LABEL.findall(body):
+            scan.labels.setdefault(label, ("equation", len(scan.equations)))
+        scan.equations.append({"content": body.strip(), "type": name})
+
+    return after
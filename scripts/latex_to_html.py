@@ -5,21 +5,176 @@ Converts LaTeX source to clean HTML while preserving math equations,
 figures, and references.
 """
 
+import argparse
+import hashlib
+import html
+import json
 import os
 import re
-import sys
-from typing import Dict, List
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Match,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import yaml
+from asset_manifest import AssetManifest
+from bibliography import Bibliography, BibliographyStore, load_bibliography
+from build_profile import DEFAULT_MEMORY_REPORT, DEFAULT_TRACE, Profiler, report
+from latex_includes import IncludeGraph
+from latex_lexer import LatexLexer, figure_marker, split_paragraphs
+from latex_scanner import DocumentScan, FigureSpan, SectionSpan, scan_document
+from equation_cache import DEFAULT_MAX_ENTRIES, EquationCache
+from figure_pipeline import DEFAULT_WIDTHS, FigureImage, find_figure, process_figures
+from math_render import MathPrerenderer, is_display_block, renderer_version
+from output_files import write_atomic
+from page_templates import TEMPLATES_DIR, template_environment
+from section_cache import SectionCache
+
+# Modules whose code determines the converted HTML
+_SOURCE_FILES = ("latex_to_html.py", "latex_lexer.py", "latex_scanner.py")
+
+# Bibliography files named by \bibliography or biblatex's \addbibresource
+_BIBLIOGRAPHY = re.compile(r"\\(?:bibliography|addbibresource)\{([^}]+)\}")
+
+# Numbering-independent stand-in for a citation in cleaned text
+_CITATION_SLOT = re.compile("\x01(\\d+)\x01")
+
+# Placeholder for a figure, filled in when the page is generated
+_FIGURE_SLOT = re.compile("\x02(\\d+)\x02")
+
+
+@lru_cache(maxsize=None)
+def converter_version() -> str:
+    """Return a hash of the converter sources, used to invalidate caches."""
+    digest = hashlib.sha256()
+    for filename in _SOURCE_FILES:
+        with open(os.path.join(os.path.dirname(__file__), filename), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def render_latex(
+    text: str, figures: Sequence[FigureSpan] = ()
+) -> Tuple[str, List[str]]:
+    """Clean LaTeX into HTML whose citations are still unnumbered slots.
+
+    Returns the HTML and the citation keys in the order they occur,
+    including citations inside figures that were removed from the text.
+    Rendering does not depend on any other part of the document, so
+    sections can be rendered in any order or in separate processes.
+    """
+    citations: List[str] = []
+
+    def citation_slot(cite_key: str) -> str:
+        citations.append(cite_key)
+        return f"\x01{len(citations) - 1}\x01"
+
+    def render_figure(index: int) -> str:
+        # Citations in figures are numbered where the figure occurs, and
+        # figures with an image become a paragraph of their own
+        citations.extend(figures[index].citations)
+        if figures[index].figure is None:
+            return ""
+        return f"\n\n\x02{index}\x02\n\n"
+
+    return LatexLexer(citation_slot, render_figure).render(text), citations
+
+
+def render_section(
+    source: str, figures: Sequence[FigureSpan] = ()
+) -> Tuple[str, List[str]]:
+    """Clean the LaTeX of one section, see render_latex."""
+    html, citations = render_latex(source, figures)
+
+    # Remove empty lines and clean up
+    return re.sub(r"\n\s*\n", "\n\n", html).strip(), citations
+
+
+def _render_section_timed(
+    source: str, figures: Sequence[FigureSpan] = ()
+) -> Tuple[Tuple[str, List[str]], float, float, int]:
+    """Render a section in a worker, and return when and where it was rendered."""
+    started = time.perf_counter()
+    rendered = render_section(source, figures)
+    return rendered, started, time.perf_counter(), threading.get_native_id()
+
+
+@dataclass
+class _Document:
+    """State of the document a thread is converting."""
+
+    # Directory bibliography names are relative to
+    base_dir: str = "."
+    # Number of every cited key, in order of first citation
+    citations: Dict[str, int] = field(default_factory=dict)
 
 
 class LatexToHtmlConverter:
-    def __init__(self, config_path: str = "config.yaml"):
-        """Initialize the converter with configuration."""
+    def __init__(
+        self,
+        config_path: str = "config.yaml",
+        cache_dir: Optional[str] = None,
+        jobs: int = 1,
+        manifest: Optional[AssetManifest] = None,
+        postprocess: Optional[Callable[[str], str]] = None,
+        profiler: Optional[Profiler] = None,
+    ):
+        """Initialize the converter with configuration.
+
+        ``manifest`` maps asset paths to their published names; by default it
+        is read from the output directory. ``postprocess`` transforms the
+        finished page before it is written. The stages and sections are
+        timed in ``profiler``.
+
+        Documents parsed in different threads are numbered independently,
+        so one converter can serve concurrent ``convert_text`` calls.
+        """
         self.config = self._load_config(config_path)
-        self.figures = {}
-        self.references = {}
-        self.equations = {}
+        self.figure_images: Dict[str, FigureImage] = {}
+        self.inputs: List[str] = []
+        self.asset_manifest = manifest
+        self.postprocess = postprocess
+        self.timings: Dict[str, float] = {}
+        self.profiler = profiler or Profiler(enabled=False)
+        self.jobs = jobs
+        self.include_graph = IncludeGraph()
+        self._local = threading.local()
+
+        # Caches of cleaned sections and rendered equations, enabled by
+        # the argument or build.cache_dir, relative to the configuration
+        build_config = self.config.get("build", {})
+        if not cache_dir and build_config.get("cache_dir"):
+            cache_dir = os.path.join(
+                os.path.dirname(config_path), build_config["cache_dir"]
+            )
+        self.cache_dir = cache_dir
+        # Parsed bibliographies kept in memory, for long-running converters
+        self.bibliographies: Optional[BibliographyStore] = None
+        self.section_cache = None
+        self.equation_cache = None
+        if cache_dir:
+            self.section_cache = SectionCache(cache_dir, self._cache_settings())
+            self.equation_cache = EquationCache(
+                os.path.join(cache_dir, "equations.sqlite"),
+                renderer_version(),
+                build_config.get("equation_cache_size", DEFAULT_MAX_ENTRIES),
+            )
+        # The project's templates are found next to its configuration
+        self.templates = template_environment(
+            [os.path.join(os.path.dirname(config_path), TEMPLATES_DIR)], cache_dir
+        )
 
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from YAML file."""
@@ -43,47 +198,156 @@ class LatexToHtmlConverter:
 
     def convert_file(self, latex_file: str, output_dir: str = "docs") -> str:
         """Convert a LaTeX file to HTML."""
-        # Read the LaTeX file
-        with open(latex_file, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # Parse LaTeX content
-        parsed_content = self._parse_latex(content)
-
-        # Convert to HTML
-        html_content = self._convert_to_html(parsed_content)
+        started = time.perf_counter()
+
+        with self.profiler.span("parse"):
+            # Read the LaTeX file together with the files it includes
+            content = self.include_graph.resolve(latex_file)
+
+            # Parse LaTeX content
+            parsed_content = self._parse_latex(content)
+        self.timings["parse"] = time.perf_counter() - started
+        started = time.perf_counter()
+
+        # Publish the referenced figures before the page that shows them
+        figure_paths = [figure["path"] for figure in parsed_content["figures"]]
+        source_dir = os.path.dirname(os.path.abspath(latex_file))
+        with self.profiler.span("figures", figures=len(figure_paths)):
+            self.figure_images = process_figures(
+                figure_paths,
+                source_dir,
+                output_dir,
+                self.config.get("website", {}).get("figure_widths", DEFAULT_WIDTHS),
+                cache_dir=self.cache_dir,
+                jobs=self.jobs,
+            )
+        self.timings["figures"] = time.perf_counter() - started
+        self.inputs = self._input_files(parsed_content, figure_paths, source_dir)
+        if self.asset_manifest is None:
+            self.asset_manifest = AssetManifest.load(output_dir)
+        for path, image in self.figure_images.items():
+            self.asset_manifest.add(path, image.src)
 
         # Generate output filename
         output_file = os.path.join(output_dir, "index.html")
 
-        # Write HTML file
+        # Stream the HTML into place without holding the whole page, unless
+        # it has to be post-processed as a whole
         os.makedirs(output_dir, exist_ok=True)
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(html_content)
+        self.timings["templates"] = 0.0
+        with self.profiler.span("templates"):
+            chunks: Iterable[str] = self._timed(
+                self._iter_html(parsed_content), "templates"
+            )
+            if self.postprocess is not None:
+                chunks = [self.postprocess("".join(chunks))]
+            write_atomic(output_file, chunks)
+        self.asset_manifest.save(output_dir)
 
         return output_file
 
-    def _parse_latex(self, content: str) -> Dict:
-        """Parse LaTeX content and extract components."""
-        parsed = {
-            "title": self._extract_title(content),
-            "authors": self._extract_authors(content),
-            "abstract": self._extract_abstract(content),
-            "sections": self._extract_sections(content),
-            "figures": self._extract_figures(content),
+    def _input_files(
+        self, parsed_content: Dict, figure_paths: List[str], source_dir: str
+    ) -> List[str]:
+        """Return the files the page was generated from, found or not."""
+        inputs = list(self.include_graph.dependencies())
+        inputs.extend(parsed_content["references"])
+        for path in dict.fromkeys(figure_paths):
+            inputs.append(
+                find_figure(source_dir, path) or os.path.join(source_dir, path)
+            )
+        return inputs
+
+    def describe_timings(self) -> str:
+        """Return how long each stage of the last conversion took."""
+        return ", ".join(
+            f"{stage} {seconds * 1000:.1f} ms"
+            for stage, seconds in self.timings.items()
+        )
+
+    def convert_text(self, content: str, base_dir: str = ".") -> str:
+        """Convert LaTeX source to an HTML page without writing any files.
+
+        Bibliography files are found relative to ``base_dir``; figures are
+        shown as they are referenced, since none are published.
+        """
+        return self._convert_to_html(self._parse_latex(content, base_dir))
+
+    @property
+    def citation_map(self) -> Dict[str, int]:
+        """Return the citation numbers of the document this thread converts."""
+        return self._document().citations
+
+    def _document(self) -> _Document:
+        """Return the document this thread converts, starting one if needed."""
+        document = getattr(self._local, "document", None)
+        if document is None:
+            document = self._local.document = _Document(self._include_dir())
+        return document
+
+    def _include_dir(self) -> str:
+        """Return the directory of the main file read by the include graph."""
+        # Bibliography names are relative to the main document, like includes
+        root = self.include_graph.root
+        return os.path.dirname(root) if root else "."
+
+    def _parse_latex(self, content: str, base_dir: Optional[str] = None) -> Dict:
+        """Parse LaTeX content and extract components.
+
+        Parsing starts a new document, with its own citation numbering.
+        """
+        document = _Document(self._include_dir() if base_dir is None else base_dir)
+        self._local.document = document
+        scan = scan_document(content)
+        parsed: Dict = {
+            "title": self._extract_title(content, scan),
+            "authors": self._extract_authors(content, scan),
+            "abstract": self._extract_abstract(content, scan),
+            "sections": self._extract_sections(content, scan),
+            "figures": self._extract_figures(content, scan),
             "references": self._extract_references(content),
-            "equations": self._extract_equations(content),
+            "equations": self._extract_equations(content, scan),
+            "citations": document.citations,
         }
+
+        # Captions are cleaned after the sections, so their citations are
+        # numbered in reading order and listed in the bibliography
+        for figure in parsed["figures"]:
+            figure["caption_html"] = self._clean_latex_text(figure.get("caption", ""))
+
+        if self._math_renderer() == "prerender":
+            self._prerender_math(parsed)
         return parsed
 
-    def _extract_title(self, content: str) -> str:
+    def _math_renderer(self) -> str:
+        """Return the configured math renderer."""
+        renderer: str = self.config.get("website", {}).get("math_renderer", "katex")
+        return renderer
+
+    def _prerender_math(self, parsed: Dict) -> None:
+        """Convert the math of the abstract, sections and captions to MathML."""
+        renderer = MathPrerenderer(self.equation_cache)
+        parsed["abstract"] = renderer.render(parsed["abstract"])
+        for section in parsed["sections"]:
+            section["content"] = renderer.render(section["content"])
+        for figure in parsed["figures"]:
+            figure["caption_html"] = renderer.render(figure["caption_html"])
+        if self.equation_cache is not None:
+            self.equation_cache.flush()
+
+        # Spans that could not be converted are typeset in the browser
+        parsed["math_fallback"] = renderer.fallbacks > 0
+
+    def _extract_title(self, content: str, scan: Optional[DocumentScan] = None) -> str:
         """Extract title from LaTeX content."""
-        title_match = re.search(r"\\title\{([^}]+)\}", content)
-        if title_match:
-            return title_match.group(1)
+        scan = scan or scan_document(content)
+        if scan.title:
+            return scan.title
         return self.config.get("paper", {}).get("title", "Research Paper")
 
-    def _extract_authors(self, content: str) -> List[Dict]:
+    def _extract_authors(
+        self, content: str, scan: Optional[DocumentScan] = None
+    ) -> List[Dict]:
         """Extract authors from LaTeX content with affiliations and links."""
         # LaTeX author parsing is complex, so let's use config primarily
         # and enhance with any successfully parsed LaTeX data
@@ -94,11 +358,10 @@ class LatexToHtmlConverter:
             return config_authors
 
         # Fallback: try simple LaTeX parsing
-        author_match = re.search(r"\\author\{(.*?)\}", content, re.DOTALL)
-        if not author_match:
+        authors_text = (scan or scan_document(content)).author
+        if not authors_text:
             return []
 
-        authors_text = author_match.group(1)
         authors = []
 
         # Simple parsing - split by \and and clean up
@@ -128,419 +391,311 @@ class LatexToHtmlConverter:
 
     def _clean_latex_text(self, text: str) -> str:
         """Clean LaTeX commands from text while preserving math and citations."""
-        
-        # FIRST: Handle citations before any other processing
-        # Create numbered citations instead of showing citation keys
-        if not hasattr(self, 'citation_map'):
-            self.citation_map = {}
-            self.citation_counter = 0
-        
-        def replace_citation(match):
-            cite_key = match.group(1)
-            if cite_key not in self.citation_map:
-                self.citation_counter += 1
-                self.citation_map[cite_key] = self.citation_counter
-            
-            citation_num = self.citation_map[cite_key]
-            return f'<span class="citation" style="display: inline-block; white-space: nowrap; color: #0066cc;">[{citation_num}]</span>'
-        
-        text = re.sub(r"\\cite\{([^}]+)\}", replace_citation, text)
-        
-        # Handle percentage symbols
-        text = re.sub(r"\\%", "%", text)
-        
-        # Convert LaTeX equation environments to KaTeX-compatible display math
-        # Remove labels first
-        text = re.sub(r"\\label\{[^}]+\}", "", text)
-        
-        # Convert equation environments to $$ display math
-        text = re.sub(
-            r"\\begin\{equation\}(.*?)\\end\{equation\}",
-            r"$$\1$$",
-            text,
-            flags=re.DOTALL
-        )
-        
-        # Convert align environments to $$ display math  
-        def fix_align_content(match):
-            content = match.group(1)
-            # Don't convert \\ to newlines inside align environments
-            return f"$$\\begin{{align}}{content}\\end{{align}}$$"
-        
-        text = re.sub(
-            r"\\begin\{align\}(.*?)\\end\{align\}",
-            fix_align_content,
-            text,
-            flags=re.DOTALL
-        )
-        
-        # Handle common LaTeX formatting
-        text = re.sub(r"\\textbf\{([^}]+)\}", r"<strong>\1</strong>", text)
-        text = re.sub(r"\\textit\{([^}]+)\}", r"<em>\1</em>", text)
-        text = re.sub(r"\\emph\{([^}]+)\}", r"<em>\1</em>", text)
-        text = re.sub(r"\\texttt\{([^}]+)\}", r"<code>\1</code>", text)
-
-        # Handle itemize/enumerate
-        text = re.sub(
-            r"\\begin\{itemize\}(.*?)\\end\{itemize\}",
-            self._convert_itemize,
+        return self._resolve_citations(*render_latex(text))
+
+    def _resolve_citations(self, text: str, citations: List[str]) -> str:
+        """Number the citations of cleaned text and fill in their slots."""
+        numbers = [self._citation_number(cite_key) for cite_key in citations]
+        return _CITATION_SLOT.sub(
+            lambda match: self._format_citation(numbers[int(match.group(1))]),
             text,
-            flags=re.DOTALL,
         )
-        text = re.sub(
-            r"\\begin\{enumerate\}(.*?)\\end\{enumerate\}",
-            self._convert_enumerate,
-            text,
-            flags=re.DOTALL,
+
+    def _citation_number(self, cite_key: str) -> int:
+        """Return the number of a citation, assigning the next one to new keys."""
+        # Citation numbers are shared by every section of the document
+        citations = self.citation_map
+        if cite_key not in citations:
+            citations[cite_key] = len(citations) + 1
+        return citations[cite_key]
+
+    def _format_citation(self, citation_num: int) -> str:
+        """Return the HTML for a numbered citation."""
+        return f'<span class="citation" style="display: inline-block; white-space: nowrap; color: #0066cc;">[{citation_num}]</span>'
+
+    def _cache_settings(self) -> str:
+        """Return the converter settings that affect cached section HTML."""
+        return json.dumps(
+            {
+                "converter": converter_version(),
+                "math_renderer": self._math_renderer(),
+            },
+            sort_keys=True,
         )
-        # \item is now handled in list conversion functions
-
-        # Handle figure references
-        text = re.sub(r"Figure~\\ref\{([^}]+)\}", r"Figure \1", text)
-        text = re.sub(r"\\ref\{([^}]+)\}", r"\1", text)
-
-        # Remove remaining LaTeX commands but preserve math
-        text = re.sub(r"\\section\*?\{[^}]*\}", "", text)
-        text = re.sub(r"\\subsection\*?\{[^}]*\}", "", text)
-        text = re.sub(r"\\subsubsection\*?\{[^}]*\}", "", text)
-        text = re.sub(r"\\paragraph\{[^}]*\}", "", text)
-        
-        # Remove bibliography and document commands
-        text = re.sub(r"\\bibliographystyle\{[^}]*\}", "", text)
-        text = re.sub(r"\\bibliography\{[^}]*\}", "", text)
-        text = re.sub(r"\\end\{document\}", "", text)
-        
-        # Remove figure commands that aren't properly converted
-        text = re.sub(r"\\begin\{figure\}.*?\\end\{figure\}", "", text, flags=re.DOTALL)
-        text = re.sub(r"\\includegraphics\[[^\]]*\]\{[^}]*\}", "", text)
-        text = re.sub(r"\\caption\{[^}]*\}", "", text)
-        text = re.sub(r"\\centering", "", text)
-        
-        # Remove other LaTeX formatting commands
-        text = re.sub(r"\\textwidth", "", text)
-        text = re.sub(r"width=[0-9.]+\\textwidth", "", text)
-        
-        # Remove spacing commands but be careful with math
-        # Don't convert \\ to newlines if we're inside $$ blocks
-        def replace_double_backslash(text):
-            result = ""
-            in_math = False
-            i = 0
-            while i < len(text):
-                if i < len(text) - 1 and text[i:i+2] == "$$":
-                    in_math = not in_math
-                    result += text[i:i+2]
-                    i += 2
-                elif i < len(text) - 1 and text[i:i+2] == "\\\\" and not in_math:
-                    result += "\n"
-                    i += 2
-                else:
-                    result += text[i]
-                    i += 1
-            return result
-        
-        text = replace_double_backslash(text)
-        text = re.sub(r"\\,", " ", text)
-        text = re.sub(r"\\;", " ", text)
-        text = re.sub(r"\\quad", " ", text)
-        text = re.sub(r"\\qquad", "  ", text)
-
-        # Clean up whitespace
-        text = re.sub(r"\n\s*\n\s*\n", "\n\n", text)
-        text = re.sub(r" +", " ", text)
-
-        return text.strip()
-
-    def _convert_itemize(self, match):
-        """Convert itemize environment to HTML."""
-        items_text = match.group(1)
-        # Split by \item and process each item
-        items = re.split(r"\\item\s*", items_text)
-        # Remove empty first item (before first \item)
-        items = [item.strip() for item in items if item.strip()]
-        
-        if not items:
-            return ""
-            
-        # Create proper HTML unordered list
-        html_items = [f"<li>{item}</li>" for item in items]
-        return f"<ul>{''.join(html_items)}</ul>"
-
-    def _convert_enumerate(self, match):
-        """Convert enumerate environment to HTML."""
-        items_text = match.group(1)
-        # Split by \item and process each item
-        items = re.split(r"\\item\s*", items_text)
-        # Remove empty first item (before first \item)
-        items = [item.strip() for item in items if item.strip()]
-        
-        if not items:
-            return ""
-            
-        # Create proper HTML ordered list
-        html_items = [f"<li>{item}</li>" for item in items]
-        return f"<ol>{''.join(html_items)}</ol>"
 
-    def _extract_abstract(self, content: str) -> str:
+    def _extract_abstract(
+        self, content: str, scan: Optional[DocumentScan] = None
+    ) -> str:
         """Extract abstract from LaTeX content."""
-        abstract_match = re.search(
-            r"\\begin\{abstract\}(.*?)\\end\{abstract\}", content, re.DOTALL
-        )
-        if abstract_match:
-            abstract_text = abstract_match.group(1).strip()
-            return self._clean_latex_text(abstract_text)
+        abstract_text = (scan or scan_document(content)).abstract
+        if abstract_text is not None:
+            return self._clean_latex_text(abstract_text.strip())
         return self.config.get("paper", {}).get("abstract", "")
 
-    def _extract_sections(self, content: str) -> List[Dict]:
+    def _extract_sections(
+        self, content: str, scan: Optional[DocumentScan] = None
+    ) -> List[Dict]:
         """Extract sections from LaTeX content."""
+        scan = scan or scan_document(content)
         sections = []
 
-        # Find all section commands with their content
-        section_pattern = r"\\(section|subsection|subsubsection)\{([^}]+)\}"
-        matches = list(re.finditer(section_pattern, content))
-
-        for i, match in enumerate(matches):
-            level = match.group(1)
-            title = match.group(2)
-
-            # Extract content between this section and the next
-            start_pos = match.end()
-            if i + 1 < len(matches):
-                end_pos = matches[i + 1].start()
-            else:
-                # For the last section, go to the end of the document
-                end_pos = len(content)
-
-            section_content = content[start_pos:end_pos]
-
-            # Clean up the content
-            section_content = self._clean_latex_text(section_content)
-
-            # Remove empty lines and clean up
-            section_content = re.sub(r"\n\s*\n", "\n\n", section_content).strip()
-
+        # Citations are numbered in document order once every section has
+        # been cleaned, whatever order the sections were converted in
+        converted = self._convert_sections(content, scan)
+        for section, (section_html, citations) in zip(scan.sections, converted):
+            # Figure slots are numbered within the section, like the markers
+            figures = self._section_figures(section, scan)
+            section_html = _FIGURE_SLOT.sub(
+                lambda match: f"\x02{figures[int(match.group(1))].figure}\x02",
+                section_html,
+            )
             sections.append(
                 {
-                    "level": level,
-                    "title": title,
-                    "content": section_content,
+                    "level": section.level,
+                    "title": section.title,
+                    "content": self._resolve_citations(section_html, citations),
                 }
             )
 
         return sections
 
-    def _extract_figures(self, content: str) -> List[Dict]:
-        """Extract figures from LaTeX content."""
+    def _convert_sections(
+        self, content: str, scan: DocumentScan
+    ) -> List[Tuple[str, List[str]]]:
+        """Clean every section, reusing cached HTML when its source is unchanged."""
+        converted: Dict[int, Tuple[str, List[str]]] = {}
+        pending = []
+
+        for i, section in enumerate(scan.sections):
+            cache_key = None
+            if self.section_cache is not None:
+                cache_key = self.section_cache.key(content[section.start : section.end])
+                entry = self.section_cache.get(cache_key)
+                if entry is not None:
+                    converted[i] = (entry["content"], entry["citations"])
+                    continue
+            pending.append((i, cache_key, self._section_source(content, section, scan)))
+
+        rendered = self._render_sections(
+            [source for _, _, source in pending],
+            [scan.sections[i].title for i, _, _ in pending],
+        )
+        for (i, cache_key, _), (section_html, citations) in zip(pending, rendered):
+            converted[i] = (section_html, citations)
+            if self.section_cache is not None and cache_key is not None:
+                self.section_cache.put(
+                    cache_key, {"content": section_html, "citations": citations}
+                )
+
+        return [converted[i] for i in range(len(scan.sections))]
+
+    def _section_source(
+        self, content: str, section: SectionSpan, scan: DocumentScan
+    ) -> Tuple[str, List[FigureSpan]]:
+        """Return the LaTeX of a section and the figures replaced by markers."""
+        # Figures already found by the scanner are replaced with markers so
+        # that they are not searched for again while cleaning
+        parts = []
+        figures = self._section_figures(section, scan)
+        pos = section.start
+        for i, span in enumerate(figures):
+            parts.append(content[pos : span.start])
+            parts.append(figure_marker(i))
+            pos = span.end
+        parts.append(content[pos : section.end])
+
+        return "".join(parts), figures
+
+    def _section_figures(
+        self, section: SectionSpan, scan: DocumentScan
+    ) -> List[FigureSpan]:
+        """Return the outermost figures of a section in document order."""
         figures = []
+        pos = section.start
+        for span in scan.figures_in(section.start, section.end):
+            if span.start >= pos:
+                figures.append(span)
+                pos = span.end
+        return figures
 
-        # Find figure environments
-        figure_pattern = r"\\begin\{figure\}(.*?)\\end\{figure\}"
-        matches = re.finditer(figure_pattern, content, re.DOTALL)
-
-        for match in matches:
-            figure_content = match.group(1)
-
-            # Extract image path
-            includegraphics_match = re.search(
-                r"\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\}", figure_content
+    def _render_sections(
+        self, sources: List[Tuple[str, List[FigureSpan]]], titles: Sequence[str]
+    ) -> List[Tuple[str, List[str]]]:
+        """Render section sources, in worker processes when jobs > 1.
+
+        Each section is profiled as a span named after its title. Worker
+        processes only report their timings, so sections are rendered in
+        this process when their memory is traced.
+        """
+        if self.jobs <= 1 or len(sources) < 2 or self.profiler.memory:
+            rendered = []
+            for source, title in zip(sources, titles):
+                with self.profiler.span(f"section {title}", "section"):
+                    rendered.append(render_section(*source))
+            return rendered
+
+        workers = min(self.jobs, len(sources))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    _render_section_timed,
+                    *zip(*sources),
+                    chunksize=max(1, len(sources) // (workers * 4)),
+                )
             )
-            if includegraphics_match:
-                image_path = includegraphics_match.group(1)
-
-                # Extract caption
-                caption_match = re.search(r"\\caption\{([^}]+)\}", figure_content)
-                caption = caption_match.group(1) if caption_match else ""
-
-                # Extract label
-                label_match = re.search(r"\\label\{([^}]+)\}", figure_content)
-                label = label_match.group(1) if label_match else ""
-
-                figures.append({"path": image_path, "caption": caption, "label": label})
 
-        return figures
-
-    def _extract_references(self, content: str) -> List[str]:
-        """Extract bibliography references."""
-        # This would typically parse a .bib file
-        # For now, return empty list
-        return []
+        for title, (_, started, finished, tid) in zip(titles, results):
+            self.profiler.add(f"section {title}", started, finished, "section", tid)
+        return [rendered for rendered, _, _, _ in results]
 
-    def _extract_equations(self, content: str) -> List[Dict]:
+    def _extract_figures(
+        self, content: str, scan: Optional[DocumentScan] = None
+    ) -> List[Dict]:
+        """Extract figures from LaTeX content."""
+        return (scan or scan_document(content)).figures
+
+    def bibliography_files(self, content: str, base_dir: str = ".") -> List[str]:
+        """Return the bibliography files LaTeX source reads from ``base_dir``."""
+        return self._extract_references(content, base_dir)
+
+    def _extract_references(
+        self, content: str, base_dir: Optional[str] = None
+    ) -> List[str]:
+        """Extract the paths of the bibliography files used by the document."""
+        base = self._document().base_dir if base_dir is None else base_dir
+        references = []
+        for match in _BIBLIOGRAPHY.finditer(content):
+            for name in match.group(1).split(","):
+                name = name.strip()
+                if not name:
+                    continue
+                if not name.endswith(".bib"):
+                    name += ".bib"
+                references.append(os.path.join(base, name))
+        return references
+
+    def _extract_equations(
+        self, content: str, scan: Optional[DocumentScan] = None
+    ) -> List[Dict]:
         """Extract equations from LaTeX content."""
-        equations = []
-
-        # Find equation environments
-        equation_pattern = r"\\begin\{equation\}(.*?)\\end\{equation\}"
-        matches = re.finditer(equation_pattern, content, re.DOTALL)
-
-        for match in matches:
-            equation_content = match.group(1).strip()
-            equations.append({"content": equation_content, "type": "equation"})
-
-        return equations
+        return (scan or scan_document(content)).equations
 
     def _convert_to_html(self, parsed_content: Dict) -> str:
         """Convert parsed LaTeX to HTML."""
-        html_parts = []
-
-        # HTML head
-        html_parts.append(self._generate_html_head(parsed_content))
-
-        # HTML body
-        html_parts.append("<body>")
-        html_parts.append(self._generate_header(parsed_content))
-        html_parts.append(self._generate_abstract(parsed_content))
-        html_parts.append(self._generate_content(parsed_content))
-        html_parts.append(self._generate_bibliography())
-        html_parts.append(self._generate_footer())
-        html_parts.append("</body>")
-        html_parts.append("</html>")
+        return "".join(self._iter_html(parsed_content))
+
+    def _iter_html(self, parsed_content: Dict) -> Iterator[str]:
+        """Yield the HTML page in chunks, one section at a time."""
+        context = self._head_context(parsed_content)
+        context.update(self._header_context(parsed_content))
+        return self.templates.get_template("index.html").generate(
+            context,
+            content=self._iter_content(parsed_content),
+            references=self._bibliography_entries(
+                parsed_content.get("references", []), parsed_content.get("citations")
+            ),
+        )
 
-        return "\n".join(html_parts)
+    def _render(self, name: str, context: Dict) -> str:
+        """Render a template with the given variables."""
+        return self.templates.get_template(name).render(context)
+
+    def _timed(self, chunks: Iterable[str], stage: str) -> Iterator[str]:
+        """Yield chunks, adding the time spent producing them to a stage."""
+        iterator = iter(chunks)
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.timings[stage] += time.perf_counter() - started
+            yield chunk
+
+    def _head_context(self, parsed_content: Dict) -> Dict:
+        """Return the variables of the page head."""
+        website = self.config.get("website", {})
+        domain = self.config.get("pages", {}).get("custom_domain") or ""
+        return {
+            "title": parsed_content.get("title", "Research Paper"),
+            "abstract": parsed_content.get("abstract", ""),
+            "keywords": self.config.get("paper", {}).get("keywords", []),
+            "page_url": f"https://{domain.strip('/')}" if domain else "",
+            "icons": True,
+            "math_renderer": self._math_renderer(),
+            "math_fallback": parsed_content.get("math_fallback", False),
+            "syntax_highlighting": website.get("syntax_highlighting", False),
+            "asset_url": self._asset_url,
+        }
 
     def _generate_html_head(self, parsed_content: Dict) -> str:
         """Generate HTML head section."""
-        title = parsed_content.get("title", "Research Paper")
-        math_renderer = self.config.get("website", {}).get("math_renderer", "katex")
-
-        head = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <link rel="stylesheet" href="assets/style.css?v=3">
-    <link rel="stylesheet" href="assets/theme.css?v=3">
-    """
+        return self._render("partials/head.html", self._head_context(parsed_content))
 
-        # Add Font Awesome icons
-        head += """
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    """
+    def _asset_url(self, path: str) -> str:
+        """Return the published URL of an asset."""
+        if self.asset_manifest is None:
+            return path
+        return self.asset_manifest.url(path)
 
-        if math_renderer == "katex":
-            head += """
-    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/katex.min.css">
-    <script defer src="https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/katex.min.js"></script>
-    <script defer src="https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/contrib/auto-render.min.js"></script>
-    <script>
-        document.addEventListener("DOMContentLoaded", function() {
-            renderMathInElement(document.body, {
-                delimiters: [
-                    {left: "$$", right: "$$", display: true},
-                    {left: "$", right: "$", display: false},
-                    {left: "\\(", right: "\\)", display: false},
-                    {left: "\\[", right: "\\]", display: true}
-                ],
-                throwOnError: false,
-                errorColor: "#cc0000",
-                strict: false
-            });
-        });
-    </script>
-    """
-        elif math_renderer == "mathjax":
-            head += """
-    <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
-    <script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
-    """
-
-        head += """
-</head>"""
-
-        return head
-
-    def _generate_header(self, parsed_content: Dict) -> str:
-        """Generate header section."""
-        title = parsed_content.get("title", "Research Paper")
-        authors = parsed_content.get("authors", [])
-
-        # Generate author HTML with links and affiliations
-        author_html_parts = []
-        affiliations = {}
+    def _header_context(self, parsed_content: Dict) -> Dict:
+        """Return the title, authors and numbered affiliations of the header."""
+        authors = []
+        affiliations = []
 
-        for i, author in enumerate(authors):
+        for i, author in enumerate(parsed_content.get("authors", [])):
             if isinstance(author, dict):
-                name = author.get("name", "")
-                url = author.get("url", "")
-                affiliation = author.get("affiliation", "")
-
-                # Create author link if available
-                if url:
-                    author_link = f'<a href="{url}" target="_blank">{name}</a>'
-                else:
-                    author_link = name
+                entry = {"name": author.get("name", ""), "url": author.get("url", "")}
 
                 # Add superscript for affiliation
-                if affiliation:
-                    affiliation_num = i + 1
-                    affiliations[affiliation_num] = affiliation
-                    author_link += f"<sup>{affiliation_num}</sup>"
-
-                author_html_parts.append(author_link)
+                if author.get("affiliation"):
+                    entry["affiliation"] = i + 1
+                    affiliations.append((i + 1, author["affiliation"]))
+                authors.append(entry)
             else:
                 # Fallback for old format
-                author_html_parts.append(str(author))
-
-        authors_html = ", ".join(author_html_parts)
-
-        # Generate affiliations HTML
-        affiliations_html = ""
-        if affiliations:
-            affiliation_parts = []
-            for num, affiliation in affiliations.items():
-                affiliation_parts.append(f"<sup>{num}</sup>{affiliation}")
-            affiliations_html = f"""
-    <div class="paper-affiliations">
-        {" • ".join(affiliation_parts)}
-    </div>"""
-
-        header = f"""
-<header class="paper-header">
-    <h1 class="paper-title">{title}</h1>
-    <div class="paper-authors">
-        {authors_html}
-    </div>{affiliations_html}
-    <div class="paper-links">
-        <a href="paper.pdf"><i class="fas fa-file-pdf"></i> PDF</a>
-        <a href="#bibtex"><i class="fas fa-quote-right"></i> BibTeX</a>
-        <a href="https://github.com/repo"><i class="fab fa-github"></i> Code</a>
-        <a href="https://arxiv.org/abs/placeholder"><i class="fas fa-scroll"></i> arXiv</a>
-    </div>
-</header>
-"""
-        return header
+                authors.append({"name": str(author)})
+
+        return {
+            "title": parsed_content.get("title", "Research Paper"),
+            "authors": authors,
+            "affiliations": affiliations,
+        }
+
+    def _generate_header(self, parsed_content: Dict) -> str:
+        """Generate header section."""
+        return self._render(
+            "partials/header.html", self._header_context(parsed_content)
+        )
 
     def _generate_abstract(self, parsed_content: Dict) -> str:
         """Generate abstract section."""
-        abstract = parsed_content.get("abstract", "")
-
-        if abstract:
-            return f"""
-<section class="abstract">
-    <h2>Abstract</h2>
-    <p>{abstract}</p>
-</section>
-"""
-        return ""
+        return self._render(
+            "partials/abstract.html",
+            {"abstract": parsed_content.get("abstract", "")},
+        )
 
     def _generate_content(self, parsed_content: Dict) -> str:
         """Generate main content."""
+        return "".join(self._iter_content(parsed_content))
+
+    def _iter_content(self, parsed_content: Dict) -> Iterator[str]:
+        """Yield the main content, one section at a time."""
         sections = parsed_content.get("sections", [])
+        return self.templates.get_template("partials/content.html").generate(
+            empty=not sections, sections=self._iter_sections(parsed_content)
+        )
 
-        if not sections:
-            return """
-<main class="paper-content">
-    <section class="content-section">
-        <h2>Content</h2>
-        <p>Paper content will be rendered here...</p>
-    </section>
-</main>
-"""
+    def _iter_sections(self, parsed_content: Dict) -> Iterator[Dict]:
+        """Yield the heading, title and HTML content of each section."""
+        figures = parsed_content.get("figures", [])
 
-        content_html = ['<main class="paper-content">']
+        def figure_html(match: Match[str]) -> str:
+            index = int(match.group(1))
+            return self._generate_figure(figures[index], index + 1)
 
-        for section in sections:
+        for section in parsed_content.get("sections", []):
             level = section.get("level", "section")
             title = section.get("title", "")
             content = section.get("content", "")
@@ -555,69 +710,17 @@ class LatexToHtmlConverter:
             else:
                 heading = "h2"
 
-            # Convert content to paragraphs with proper math handling
+            # Convert content to paragraphs, keeping math blocks and lists intact
             paragraphs = []
             if content:
-                # Parse content to properly separate text and math
-                # Split by $$ math blocks first to preserve them
-                import re
-                
-                # Find all $$ math blocks and their positions
-                math_blocks = []
-                text_parts = []
-                
-                # Split by $$ while preserving the delimiters
-                current_pos = 0
-                while True:
-                    start = content.find('$$', current_pos)
-                    if start == -1:
-                        # No more math blocks, add remaining text
-                        if current_pos < len(content):
-                            text_parts.append(content[current_pos:])
-                        break
-                    
-                    # Add text before math block
-                    if start > current_pos:
-                        text_parts.append(content[current_pos:start])
-                    
-                    # Find end of math block
-                    end = content.find('$$', start + 2)
-                    if end == -1:
-                        # Unclosed math block, treat as text
-                        text_parts.append(content[start:])
-                        break
-                    
-                    # Add math block
-                    math_block = content[start:end + 2]
-                    math_blocks.append(math_block)
-                    text_parts.append(f"MATHBLOCK{len(math_blocks)-1}")
-                    
-                    current_pos = end + 2
-                
-                # Now process the text parts and restore math blocks
-                combined_content = ''.join(text_parts)
-                
-                # Split by double newlines for paragraphs
-                parts = re.split(r'\n\s*\n', combined_content)
-                
-                for part in parts:
-                    part = part.strip()
-                    if not part:
-                        continue
-                    
-                    # Restore math blocks
-                    for i, math_block in enumerate(math_blocks):
-                        part = part.replace(f"MATHBLOCK{i}", math_block)
-                    
+                for part in split_paragraphs(content):
                     # Handle HTML lists that were converted from LaTeX
                     if part.startswith("<ol>") or part.startswith("<ul>"):
                         paragraphs.append(part)
                     # Handle simple text lists (fallback)
                     elif part.startswith("- ") or part.startswith("• "):
                         items = [
-                            item.strip()
-                            for item in part.split("\n")
-                            if item.strip()
+                            item.strip() for item in part.split("\n") if item.strip()
                         ]
                         list_html = (
                             "<ul>"
@@ -630,79 +733,154 @@ class LatexToHtmlConverter:
                     # Handle pure math blocks
                     elif part.startswith("$$") and part.endswith("$$"):
                         paragraphs.append(part)
+                    elif is_display_block(part):
+                        paragraphs.append(part)
+                    elif _FIGURE_SLOT.fullmatch(part):
+                        paragraphs.append(_FIGURE_SLOT.sub(figure_html, part))
                     else:
-                        paragraphs.append(f"<p>{part}</p>")
-
-            section_html = f"""
-    <section class="content-section">
-        <{heading}>{title}</{heading}>
-        {"".join(paragraphs)}
-    </section>"""
-
-            content_html.append(section_html)
-
-        content_html.append("</main>")
+                        paragraphs.append(
+                            _FIGURE_SLOT.sub(figure_html, f"<p>{part}</p>")
+                        )
 
-        return "\n".join(content_html)
+            yield {"heading": heading, "title": title, "content": "".join(paragraphs)}
+
+    def _generate_figure(self, figure: Dict, number: int) -> str:
+        """Generate a figure with responsive image sources."""
+        caption = figure.get("caption_html")
+        if caption is None:
+            caption = self._clean_latex_text(figure.get("caption", ""))
+        # The caption is HTML already, so its text is unescaped before quoting
+        alt = html.escape(html.unescape(re.sub(r"<[^>]+>", "", caption)))
+        image = self.figure_images.get(figure["path"])
+        context = {
+            "label": figure.get("label", ""),
+            "number": number,
+            "caption": caption,
+            "alt": alt,
+            "image": image,
+            "src": figure["path"] if image is None else image.src,
+        }
+        if image is not None and image.srcsets:
+            # The fallback format is the one the largest variant is in
+            context["sources"] = [
+                (mime, variants)
+                for mime, variants in image.srcsets.items()
+                if variants[-1][0] != image.src
+            ]
+            context["fallback"] = next(
+                variants
+                for variants in image.srcsets.values()
+                if variants[-1][0] == image.src
+            )
+        return self._render("partials/figure.html", context)
 
-    def _generate_bibliography(self) -> str:
+    def _generate_bibliography(self, references: Sequence[str] = ()) -> str:
         """Generate bibliography section with numbered references."""
-        # Create bibliography entries based on citation map
-        bibliography_data = {
-            'wertz2011space': 'Wertz, J. R., Everett, D. F., & Puschell, J. J. (2011). <em>Space Mission Analysis and Design</em>. Microcosm Press.',
-            'nasa2019europa': 'NASA JPL. (2019). Europa Clipper Mission: Overview. <em>NASA Technical Publication</em>, 2019-220449.',
-            'chien2005autonomous': 'Chien, S., Sherwood, R., & Tran, D. (2005). Autonomous science operations for the Mars Express mission. <em>IEEE Transactions on Aerospace and Electronic Systems</em>, 41(4), 1324-1340.',
-            'thornton2009radiometric': 'Thornton, C. L., & Border, J. S. (2009). <em>Radiometric tracking techniques for deep-space navigation</em>. Wiley-Interscience.',
-            'bhaskaran2012autonomous': 'Bhaskaran, S., Desai, S., & Dumont, P. (2012). Autonomous optical navigation for interplanetary missions. <em>Journal of Guidance, Control, and Dynamics</em>, 35(4), 1166-1176.',
-            'owen2011optical': 'Owen, W. M., Vaughan, A. T., & Synnott, S. P. (2011). Optical navigation for proximity operations at asteroid Vesta. <em>AAS/AIAA Astrodynamics Specialist Conference</em>.',
-            'izzo2019machine': 'Izzo, D., Märtens, M., & Pan, B. (2019). A survey of machine learning applications to spacecraft operations. <em>Acta Astronautica</em>, 162, 401-418.',
-            'calinon2016tutorial': 'Calinon, S. (2016). A tutorial on task-parameterized movement learning and retrieval. <em>Intelligent Service Robotics</em>, 9(1), 1-29.',
-            'pervez2017learning': 'Pervez, A., & Lee, D. (2017). Learning deep movement primitives using convolutional neural networks. <em>2017 IEEE-RAS 17th International Conference on Humanoid Robotics</em>, 191-197.',
-            'silverstein2018gaussian': 'Silverstein, B., & Crassidis, J. L. (2018). Gaussian mixture model-based spacecraft attitude estimation. <em>Journal of Guidance, Control, and Dynamics</em>, 41(6), 1408-1415.'
-        }
-        
-        html = ['<section id="bibtex" class="content-section">',
-                '    <h2>References</h2>',
-                '    <div class="bibliography">']
-        
-        # Get citation map if it exists, otherwise create default numbering
-        if hasattr(self, 'citation_map') and self.citation_map:
+        return self._render(
+            "partials/bibliography.html",
+            {"references": self._bibliography_entries(references)},
+        )
+
+    def _bibliography_entries(
+        self, references: Sequence[str], citations: Optional[Dict[str, int]] = None
+    ) -> List[Tuple[int, str]]:
+        """Return the number and formatted entry of every cited reference.
+
+        ``citations`` numbers the cited keys, by default those of the
+        document this thread converts.
+        """
+        bibliographies = self._load_bibliographies(references)
+        entries = []
+        if citations is None:
+            citations = self.citation_map
+
+        # Only cited entries are formatted, in citation order
+        if citations:
             # Sort by citation number
-            sorted_citations = sorted(self.citation_map.items(), key=lambda x: x[1])
+            sorted_citations = sorted(citations.items(), key=lambda x: x[1])
             for cite_key, cite_num in sorted_citations:
-                if cite_key in bibliography_data:
-                    html.append(f'        <div class="ref-item"><span class="ref-num">[{cite_num}]</span> {bibliography_data[cite_key]}</div>')
-        else:
-            # Fallback if no citation map exists
-            for i, (cite_key, entry) in enumerate(bibliography_data.items(), 1):
-                html.append(f'        <div class="ref-item"><span class="ref-num">[{i}]</span> {entry}</div>')
-        
-        html.extend(['    </div>', '</section>'])
-        
-        return '\n'.join(html)
+                entry = self._format_reference(cite_key, bibliographies)
+                if entry is None:
+                    print(f"Warning: citation {cite_key} not found in bibliography")
+                    continue
+                entries.append((cite_num, entry))
+
+        for bibliography in bibliographies:
+            bibliography.save()
+
+        return entries
+
+    def _load_bibliographies(self, references: Sequence[str]) -> List[Bibliography]:
+        """Load the bibliography files, skipping ones that do not exist."""
+        bibliographies = []
+        for path in references:
+            try:
+                if self.bibliographies is not None:
+                    bibliographies.append(self.bibliographies.load(path))
+                else:
+                    bibliographies.append(load_bibliography(path, self.cache_dir))
+            except FileNotFoundError:
+                print(f"Warning: bibliography {path} not found")
+        return bibliographies
+
+    def _format_reference(
+        self, cite_key: str, bibliographies: Sequence[Bibliography]
+    ) -> Optional[str]:
+        """Return the formatted entry for a key from the first file that has it."""
+        for bibliography in bibliographies:
+            entry = bibliography.format(cite_key)
+            if entry is not None:
+                return entry
+        return None
 
     def _generate_footer(self) -> str:
         """Generate footer section."""
-        return """
-<footer class="paper-footer">
-    <p>Generated with Research Paper Template</p>
-</footer>
-"""
+        return self._render("partials/footer.html", {})
 
 
 def main():
     """Main function to run the converter."""
-    if len(sys.argv) < 2:
-        print("Usage: python latex_to_html.py <input_file> [output_dir]")
-        sys.exit(1)
-
-    input_file = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "docs"
-
-    converter = LatexToHtmlConverter()
-    output_file = converter.convert_file(input_file, output_dir)
-
-    print(f"Converted {input_file} to {output_file}")
+    parser = argparse.ArgumentParser(description="Convert a LaTeX paper to HTML.")
+    parser.add_argument("input_file", help="main LaTeX file")
+    parser.add_argument(
+        "output_dir", nargs="?", default="docs", help="output directory"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="number of processes used to convert sections",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_TRACE,
+        metavar="TRACE",
+        help=f"write a Chrome trace of the stages (default {DEFAULT_TRACE})",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="STAGE",
+        help="dump cProfile statistics of one stage to STAGE.pstats",
+    )
+    parser.add_argument(
+        "--memory-report",
+        nargs="?",
+        const=DEFAULT_MEMORY_REPORT,
+        metavar="REPORT",
+        help="write the peak memory and top allocation sites of every stage "
+        f"as JSON (default {DEFAULT_MEMORY_REPORT})",
+    )
+    args = parser.parse_args()
+
+    profiler = Profiler(args.cprofile, memory=bool(args.memory_report))
+    converter = LatexToHtmlConverter(jobs=args.jobs, profiler=profiler)
+    output_file = converter.convert_file(args.input_file, args.output_dir)
+
+    print(f"Converted {args.input_file} to {output_file}")
+    print(converter.describe_timings())
+    report(profiler, args.profile, args.memory_report)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+"""
+Local preview server that reloads open pages after a rebuild.
+
+The server serves the output directory and adds a small script to every
+HTML page it sends. The script listens on a server-sent events endpoint,
+and ``reload`` makes every connected browser refresh.
+"""
+
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+RELOAD_PATH = "/__livereload"
+
+_RELOAD_SCRIPT = (
+    f'<script>new EventSource("{RELOAD_PATH}")'
+    ".onmessage = function() { location.reload(); };</script>"
+).encode("utf-8")
+
+# Seconds between keep-alive comments, which also notice closed browsers
+_KEEPALIVE = 15.0
+
+
+class LiveReloadServer:
+    """HTTP server for the built site with a live-reload endpoint."""
+
+    def __init__(self, directory: str, host: str = "127.0.0.1", port: int = 8000):
+        """Serve ``directory`` on ``host`` and ``port``; port 0 picks a free one."""
+        self.directory = str(directory)
+        self.version = 0
+        self.changed = threading.Condition()
+        handler = partial(_Handler, self, directory=self.directory)
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Return the address of the served site."""
+        host, port = self.httpd.socket.getsockname()[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> None:
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def reload(self) -> None:
+        """Make every open page reload."""
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    """Static file handler that injects the reload script into pages."""
+
+    def __init__(self, server: LiveReloadServer, *args: Any, **kwargs: Any):
+        self.live = server
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        """Serve the reload events, pages with the script, or plain files."""
+        path = urlsplit(self.path).path
+        if path == RELOAD_PATH:
+            self._events()
+            return
+
+        filename = self.translate_path(self.path)
+        if os.path.isdir(filename):
+            if not path.endswith("/"):
+                # Relative links on its page only resolve inside it with the slash
+                self._redirect_to_directory()
+                return
+            filename = os.path.join(filename, "index.html")
+        if not filename.endswith(".html") or not os.path.isfile(filename):
+            super().do_GET()
+            return
+
+        with open(filename, "rb") as f:
+            page = f.read()
+        position = page.rfind(b"</body>")
+        if position < 0:
+            position = len(page)
+        page = page[:position] + _RELOAD_SCRIPT + page[position:]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(page)
+
+    def _redirect_to_directory(self) -> None:
+        """Redirect a directory request to its path with a trailing slash."""
+        parts = urlsplit(self.path)
+        location = urlunsplit(parts._replace(path=parts.path + "/"))
+        self.send_response(301)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _events(self) -> None:
+        """Stream a reload event each time the site is rebuilt."""
+        # Rebuilds finishing while the headers are sent still count
+        seen = self.live.version
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        try:
+            while True:
+                with self.live.changed:
+                    self.live.changed.wait_for(
+                        lambda: self.live.version != seen, _KEEPALIVE
+                    )
+                    version = self.live.version
+                if version != seen:
+                    seen = version
+                    self.wfile.write(f"data: {version}\n\n".encode("utf-8"))
+                else:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep the build output free of request logs."""
@@ -0,0 +1,113 @@
+"""
+Build-time rendering of TeX math in converted HTML to MathML.
+
+Math spans delimited by ``$``, ``$$``, ``\\(..\\)`` and ``\\[..\\]`` are
+converted with latex2mathml, so that readers' browsers do not have to
+typeset them. Spans that cannot be converted are kept as TeX inside a
+``math-fallback`` element for client-side rendering. Identical formulas are
+converted once per document, and once across builds with an equation cache.
+"""
+
+import re
+from typing import Callable, Dict, Match, Optional, Tuple
+
+from equation_cache import EquationCache
+
+_to_mathml: Optional[Callable[..., str]]
+try:
+    from latex2mathml.converter import convert as _to_mathml
+except ImportError:  # pragma: no cover - latex2mathml is a declared dependency
+    _to_mathml = None
+
+# Escaped dollars are matched first so that they never open a span
+_MATH_SPAN = re.compile(
+    r"\\\$|\$\$(.+?)\$\$|\\\[(.+?)\\\]|\$(.+?)\$|\\\((.+?)\\\)", re.DOTALL
+)
+_WHITESPACE = re.compile(r"\s+")
+_DISPLAY_BLOCK = re.compile(
+    r"<math [^>]*display=\"block\">(?:(?!<math ).)*</math>", re.DOTALL
+)
+
+
+class MathPrerenderer:
+    """Converts the math spans of HTML text to MathML."""
+
+    def __init__(self, cache: Optional[EquationCache] = None):
+        """Initialize the renderer, optionally backed by an equation cache."""
+        self.cache = cache
+        self.converted = 0
+        self.fallbacks = 0
+        self._rendered: Dict[Tuple[str, bool], Optional[str]] = {}
+
+    def render(self, text: str) -> str:
+        """Return ``text`` with its math spans replaced by MathML."""
+        return _MATH_SPAN.sub(self._render_span, text)
+
+    def _render_span(self, match: Match[str]) -> str:
+        """Convert one math span, keeping it as TeX if that fails."""
+        display_tex = match.group(1) or match.group(2)
+        tex = display_tex or match.group(3) or match.group(4)
+        if tex is None:
+            return match.group(0)
+
+        mathml = self.convert(tex, display_tex is not None)
+        if mathml is None:
+            self.fallbacks += 1
+            return f'<span class="math-fallback">{match.group(0)}</span>'
+
+        self.converted += 1
+        return mathml
+
+    def convert(self, tex: str, display: bool) -> Optional[str]:
+        """Convert a formula, reusing earlier results for the same TeX."""
+        tex = normalize_tex(tex)
+        if (tex, display) in self._rendered:
+            return self._rendered[tex, display]
+
+        if self.cache is None:
+            mathml = to_mathml(tex, display)
+        else:
+            key = self.cache.key(tex, display)
+            output = self.cache.get(key)
+            if output is None:
+                output = to_mathml(tex, display) or ""
+                self.cache.put(key, output)
+            mathml = output or None
+
+        self._rendered[tex, display] = mathml
+        return mathml
+
+
+def normalize_tex(tex: str) -> str:
+    """Collapse whitespace, which TeX ignores in math, for use as a key."""
+    return _WHITESPACE.sub(" ", tex).strip()
+
+
+def renderer_version() -> str:
+    """Return the name and version of the MathML converter."""
+    try:
+        from importlib.metadata import version
+
+        return f"latex2mathml {version('latex2mathml')}"
+    except Exception:
+        return "latex2mathml unknown"
+
+
+def to_mathml(tex: str, display: bool = False) -> Optional[str]:
+    """Convert TeX to MathML, or return None if it cannot be converted."""
+    if _to_mathml is None:
+        return None
+    try:
+        mathml = _to_mathml(tex, display="block" if display else "inline")
+    except Exception:
+        return None
+
+    # Unsupported commands are passed through as text instead of failing
+    if "\\" in mathml:
+        return None
+    return mathml
+
+
+def is_display_block(text: str) -> bool:
+    """Return whether text is a single display-mode MathML element."""
+    return _DISPLAY_BLOCK.fullmatch(text) is not None
@@ -0,0 +1,388 @@
+"""
+Build-time minification of CSS, JavaScript and HTML.
+
+The minifiers are conservative and pure Python. CSS loses comments and
+insignificant whitespace. JavaScript keeps its line breaks, so automatic
+semicolon insertion is unaffected, but loses comments and indentation.
+HTML has whitespace collapsed except inside ``<pre>``, ``<code>``,
+``<textarea>`` and math spans, whose whitespace can be significant.
+
+``inline_critical_css`` inlines the rules that can apply to the top of
+the page (the header and abstract) and loads the full stylesheets
+asynchronously, so that the first paint does not wait for them.
+"""
+
+import os
+import re
+import shutil
+from typing import Callable, Dict, List, Match, Optional, Tuple
+
+# CSS strings are kept as they are; comments starting with /*! are licenses
+_CSS_TOKEN = re.compile(
+    r"(\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|/\*!.*?\*/)|/\*.*?\*/", re.DOTALL
+)
+_CSS_PUNCTUATION = re.compile(r" ?([{};,>]) ?")
+_CSS_URL = re.compile(r"url\((['\"]?)(?![a-z]+:|/|#|\x00)([^'\")]+)\1\)", re.IGNORECASE)
+_SLOT = re.compile("\x00(\\d+)\x00")
+_WHITESPACE = re.compile(r"[ \t\n\r\f\v]+")
+
+# JavaScript: strings, template literals, comments and candidate regexes
+_JS_TOKEN = re.compile(
+    r"(\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)"
+    r"|(//[^\n]*|/\*.*?\*/)"
+    r"|(/(?![*/])(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*)",
+    re.DOTALL,
+)
+_JS_REGEX_PREFIX = re.compile(
+    r"(?:^|[(,=:\[!&|?{};+\-*%<>~^]|\b(?:return|typeof|case|in|of|new|delete|"
+    r"void|throw|else|do))\s*$"
+)
+
+# HTML elements whose content is kept, and math spans inside text
+_HTML_PRESERVED = re.compile(
+    r"<(pre|code|textarea|script|style)\b([^>]*)>(.*?)</\1\s*>",
+    re.DOTALL | re.IGNORECASE,
+)
+_HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_HTML_MATH = re.compile(
+    r"\$\$.+?\$\$|\\\[.+?\\\]|\\\(.+?\\\)|(?<!\\)\$[^$]+?(?<!\\)\$"
+    r"|<math\b.*?</math>",
+    re.DOTALL,
+)
+_HTML_BLOCK = re.compile(
+    r"\s*(</?(?:html|head|body|title|meta|link|base|div|section|header|footer|"
+    r"main|nav|article|aside|p|h[1-6]|ul|ol|li|dl|dt|dd|figure|figcaption|"
+    r"picture|source|table|thead|tbody|tfoot|tr|td|th|br|hr|blockquote|form|"
+    r"noscript|script|style|pre|!DOCTYPE)\b[^>]*>)\s*",
+    re.IGNORECASE,
+)
+_JS_TYPES = ("", "text/javascript", "application/javascript", "module")
+
+# Top-of-page content: everything before the main content
+_FOLD = re.compile(r"<body\b.*?(?=<main\b|</body>|$)", re.DOTALL | re.IGNORECASE)
+_ELEMENT = re.compile(r"<([a-zA-Z][\w-]*)([^>]*)>")
+_CLASS = re.compile(r"\bclass\s*=\s*(?:\"([^\"]*)\"|'([^']*)')", re.IGNORECASE)
+_ID = re.compile(r"\bid\s*=\s*(?:\"([^\"]*)\"|'([^']*)')", re.IGNORECASE)
+_STYLESHEET = re.compile(
+    r"<link\b(?=[^>]*\brel=\"stylesheet\")[^>]*\bhref=\"([^\"]+)\"[^>]*>",
+    re.IGNORECASE,
+)
+_PSEUDO = re.compile(r"::?[\w-]+(?:\([^)]*\))?|\[[^\]]*\]")
+_COMPOUND = re.compile(r"([\w-]+|\*)?((?:[.#][\w-]+)*)")
+
+
+def minify_css(css: str) -> str:
+    """Remove comments and insignificant whitespace from CSS."""
+    kept: List[str] = []
+    css = _CSS_TOKEN.sub(lambda match: _keep(match.group(1), kept), css)
+    css = _squeeze(css)
+    css = _CSS_PUNCTUATION.sub(r"\1", css)
+    css = css.replace(": ", ":").replace(";}", "}")
+    return _restore(css.strip(), kept)
+
+
+def minify_js(js: str) -> str:
+    """Remove comments and indentation from JavaScript, keeping line breaks."""
+    parts: List[str] = []
+    code: List[str] = []
+    pos = 0
+    while True:
+        match = _JS_TOKEN.search(js, pos)
+        if match is None:
+            break
+        code.append(js[pos : match.start()])
+        literal, comment, regex = match.groups()
+        if comment is not None:
+            line_break = "\n" in comment or comment.startswith("//")
+            code.append("\n" if line_break else " ")
+            pos = match.end()
+        elif regex is not None and not _JS_REGEX_PREFIX.search(
+            js[max(0, match.start() - 20) : match.start()]
+        ):
+            # A division, so only the slash is consumed
+            code.append("/")
+            pos = match.start() + 1
+        else:
+            # Whitespace is only squeezed outside literals
+            parts.append(_squeeze_js("".join(code)))
+            parts.append(match.group(0))
+            code = []
+            pos = match.end()
+    code.append(js[pos:])
+    parts.append(_squeeze_js("".join(code)))
+    return "".join(parts).strip()
+
+
+def _squeeze_js(code: str) -> str:
+    """Strip indentation and blank lines from code without literals."""
+    lines = code.split("\n")
+    if len(lines) == 1:
+        return _squeeze(code)
+
+    # The first and last lines continue next to literals, so keep their
+    # outer spaces; lines in between stand alone
+    middle = [_squeeze(line).strip() for line in lines[1:-1]]
+    first = _squeeze(lines[0]).rstrip()
+    last = _squeeze(lines[-1]).lstrip()
+    return "\n".join([first] + [line for line in middle if line] + [last])
+
+
+def _squeeze(text: str) -> str:
+    """Collapse runs of ASCII whitespace, leaving non-breaking spaces alone."""
+    return _WHITESPACE.sub(" ", text)
+
+
+def minify_html(html: str) -> str:
+    """Collapse whitespace in HTML, keeping preformatted content and math."""
+    kept: List[str] = []
+
+    def preserve(match: Match[str]) -> str:
+        tag, attributes, content = match.groups()
+        name = tag.lower()
+        if name == "style":
+            content = minify_css(content)
+        elif name == "script" and _script_type(attributes) in _JS_TYPES:
+            content = minify_js(content)
+        return f"<{tag}{attributes}>{_keep(content, kept)}</{tag}>"
+
+    html = _HTML_PRESERVED.sub(preserve, html)
+    html = _HTML_COMMENT.sub("", html)
+    html = _HTML_MATH.sub(lambda match: _keep(match.group(0), kept), html)
+    html = _squeeze(html)
+    html = _HTML_BLOCK.sub(r"\1", html)
+    return _restore(html.strip(), kept)
+
+
+def _script_type(attributes: str) -> str:
+    """Return the type attribute of a script element."""
+    match = re.search(r"\btype\s*=\s*[\"']?([^\"'\s>]*)", attributes, re.IGNORECASE)
+    return match.group(1).lower() if match else ""
+
+
+def _keep(text: Optional[str], kept: List[str]) -> str:
+    """Replace text with a placeholder that minification leaves alone."""
+    if text is None:
+        return " "
+    kept.append(text)
+    return f"\x00{len(kept) - 1}\x00"
+
+
+def _restore(text: str, kept: List[str]) -> str:
+    """Put kept text back in place of its placeholders."""
+    return _SLOT.sub(lambda match: kept[int(match.group(1))], text)
+
+
+def inline_critical_css(html: str, load: Callable[[str], Optional[str]]) -> str:
+    """Inline the CSS the top of the page needs and defer full stylesheets.
+
+    ``load`` returns the CSS of a stylesheet URL, or None for stylesheets
+    that cannot be read, such as CDN stylesheets, which are left alone.
+    """
+    fold = _FOLD.search(html)
+    elements = _elements(fold.group(0) if fold else "")
+    elements += [("html", set(), ""), ("body", set(), "")]
+
+    critical = []
+    deferred = {}
+    for match in _STYLESHEET.finditer(html):
+        href = match.group(1)
+        css = load(href)
+        if css is None:
+            continue
+        critical.append(
+            _rebase_urls(critical_css(css, elements), os.path.dirname(href))
+        )
+        deferred[match.group(0)] = (
+            f'<link rel="preload" href="{href}" as="style" '
+            "onload=\"this.onload=null;this.rel='stylesheet'\">"
+            f'<noscript><link rel="stylesheet" href="{href}"></noscript>'
+        )
+
+    if not deferred:
+        return html
+    first = True
+    for link, replacement in deferred.items():
+        if first:
+            replacement = f"<style>{''.join(critical)}</style>" + replacement
+            first = False
+        html = html.replace(link, replacement, 1)
+    return html
+
+
+def critical_css(css: str, elements: List[Tuple[str, set, str]]) -> str:
+    """Return the rules of CSS whose selectors can match one of the elements.
+
+    Matching is approximate: pseudo-classes and attribute selectors are
+    ignored, so a rule may be included that does not apply, but a rule that
+    applies to the elements is never left out.
+    """
+    kept: List[str] = []
+    css = _CSS_TOKEN.sub(lambda match: _keep(match.group(1), kept), css)
+    return minify_css(_restore(_critical_rules(css, elements), kept))
+
+
+def _critical_rules(css: str, elements: List[Tuple[str, set, str]]) -> str:
+    """Select the matching rules of CSS whose strings are placeholders."""
+    rules = []
+    for prelude, body in _blocks(css):
+        if prelude.startswith("@media") or prelude.startswith("@supports"):
+            inner = _critical_rules(body, elements)
+            if inner:
+                rules.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@"):
+            # Fonts, keyframes and imports arrive with the full stylesheet
+            continue
+        elif _applies(prelude, elements):
+            rules.append(f"{prelude}{{{body}}}")
+    return "".join(rules)
+
+
+def _blocks(css: str) -> List[Tuple[str, str]]:
+    """Split CSS into top-level (prelude, body) blocks."""
+    blocks = []
+    pos = 0
+    depth = 0
+    start = 0
+    prelude = ""
+    for i, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                prelude = css[pos:i].strip()
+                start = i + 1
+            depth += 1
+        elif char == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[start:i]))
+                pos = i + 1
+        elif char == ";" and depth == 0:
+            # Statements such as @import or @charset
+            pos = i + 1
+    return blocks
+
+
+def _elements(html: str) -> List[Tuple[str, set, str]]:
+    """Return the tag, classes and id of every element in an HTML fragment."""
+    elements = []
+    for match in _ELEMENT.finditer(html):
+        attributes = match.group(2)
+        classes = _CLASS.search(attributes)
+        element_id = _ID.search(attributes)
+        elements.append(
+            (
+                match.group(1).lower(),
+                set(_attribute_value(classes).split()) if classes else set(),
+                _attribute_value(element_id) if element_id else "",
+            )
+        )
+    return elements
+
+
+def _attribute_value(match: Match[str]) -> str:
+    """Return the value of a double or single quoted attribute."""
+    value = match.group(1)
+    return match.group(2) if value is None else value
+
+
+def _applies(selectors: str, elements: List[Tuple[str, set, str]]) -> bool:
+    """Return whether any selector in a list could match the elements."""
+    for selector in _split_selectors(selectors):
+        compounds = re.split(r"\s*[>+~]\s*|\s+", _PSEUDO.sub("", selector).strip())
+        if all(_matches(compound, elements) for compound in compounds):
+            return True
+    return False
+
+
+def _split_selectors(selectors: str) -> List[str]:
+    """Split a selector list at commas outside parentheses."""
+    parts = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(selectors):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(selectors[start:i])
+            start = i + 1
+    parts.append(selectors[start:])
+    return parts
+
+
+def _matches(compound: str, elements: List[Tuple[str, set, str]]) -> bool:
+    """Return whether a compound selector matches at least one element."""
+    match = _COMPOUND.fullmatch(compound)
+    if match is None:
+        return True
+    tag, qualifiers = match.groups()
+    tag = (tag or "*").lower()
+    classes = set(re.findall(r"\.([\w-]+)", qualifiers))
+    ids = re.findall(r"#([\w-]+)", qualifiers)
+    for element_tag, element_classes, element_id in elements:
+        if tag not in ("*", element_tag):
+            continue
+        if classes <= element_classes and all(i == element_id for i in ids):
+            return True
+    return False
+
+
+def _rebase_urls(css: str, base: str) -> str:
+    """Make relative url() references work from the page instead of the CSS."""
+    if not base:
+        return css
+    return _CSS_URL.sub(
+        lambda match: f"url({match.group(1)}{base}/{match.group(2)}{match.group(1)})",
+        css,
+    )
+
+
+def minify_tree(src: str, dst: str) -> List[Tuple[str, int, int]]:
+    """Copy a directory with its stylesheets and scripts minified.
+
+    Minified files keep the modification time of their source, so syncing
+    them onward stays incremental. Returns the relative path, original size
+    and minified size of every minified file.
+    """
+    minifiers: Dict[str, Callable[[str], str]] = {".css": minify_css, ".js": minify_js}
+    report = []
+    for directory, _, names in os.walk(src):
+        target_dir = os.path.join(dst, os.path.relpath(directory, src))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in names:
+            source = os.path.join(directory, name)
+            target = os.path.join(target_dir, name)
+            minifier = minifiers.get(os.path.splitext(name)[1])
+            if minifier is None:
+                _link_or_copy(source, target)
+                continue
+
+            with open(source, "r", encoding="utf-8") as f:
+                original = f.read()
+            minified = minifier(original)
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(minified)
+            shutil.copystat(source, target)
+            report.append(
+                (
+                    os.path.relpath(source, src),
+                    len(original.encode("utf-8")),
+                    len(minified.encode("utf-8")),
+                )
+            )
+    return report
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    """Hardlink a file that needs no minification, or copy it."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def describe_savings(name: str, before: int, after: int) -> str:
+    """Return a line reporting the bytes minification saved on a file."""
+    saved = before - after
+    percent = saved * 100 / before if before else 0
+    return f"Minified {name}: {before} -> {after} bytes ({saved} saved, {percent:.0f}%)"
@@ -0,0 +1,108 @@
+"""
+Output layer for the published site.
+
+Every generated file is written through ``write_atomic``: the content is
+streamed to a temporary file next to the target and renamed over it, and
+when the target already holds the same bytes it is left alone. Unchanged
+pages therefore keep their modification times, and a rebuild that
+produces the same site changes nothing on disk.
+
+``OutputChanges`` lists the files of the output directory that a build
+added, modified or removed, including files published by other means
+such as the asset sync, so that a deploy can upload only those.
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Dict, Iterable, List, Tuple
+
+from file_sync import file_hash
+
+
+def write_atomic(path: str, chunks: Iterable[str]) -> bool:
+    """Stream chunks to ``path`` unless it already holds the same content.
+
+    Readers of ``path`` see either the old file or the complete new one,
+    even if generating the chunks fails halfway. Returns whether the file
+    was written.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                data = chunk.encode("utf-8")
+                digest.update(data)
+                size += len(data)
+                f.write(data)
+
+        if _has_content(path, size, digest.hexdigest()):
+            os.unlink(tmp_path)
+            return False
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+def _has_content(path: str, size: int, digest: str) -> bool:
+    """Return whether a file exists with the given size and hash."""
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        return file_hash(path) == digest
+    except OSError:
+        return False
+
+
+class OutputChanges:
+    """Files of an output directory changed since the object was created."""
+
+    def __init__(self, root: str):
+        """Take a snapshot of the files below ``root``."""
+        self.root = root
+        self.before = _snapshot(root)
+
+    def changes(self) -> List[Tuple[str, str]]:
+        """Return (status, path) pairs sorted by path.
+
+        The status is ``A`` for added, ``M`` for modified and ``D`` for
+        removed files; paths are relative to the root.
+        """
+        after = _snapshot(self.root)
+        changes = []
+        for path in sorted(set(self.before) | set(after)):
+            if path not in after:
+                changes.append(("D", path))
+            elif path not in self.before:
+                changes.append(("A", path))
+            elif after[path] != self.before[path]:
+                changes.append(("M", path))
+        return changes
+
+    def write(self, path: str) -> None:
+        """Write the changes to a file, one tab-separated pair per line."""
+        lines = [f"{status}\t{name}\n" for status, name in self.changes()]
+        write_atomic(path, lines)
+
+
+def _snapshot(root: str) -> Dict[str, Tuple[int, int, int]]:
+    """Return the size, mtime and inode of every file below ``root``."""
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            relative = os.path.relpath(path, root).replace(os.sep, "/")
+            files[relative] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    return files
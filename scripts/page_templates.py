@@ -0,0 +1,50 @@
+"""
+Jinja2 environment for the page templates in ``src/web/templates``.
+
+Compiled templates are cached as bytecode in the build cache, so later
+builds, and every page of a batch build, load them without parsing and
+compiling the template sources again. A template whose source changes is
+recompiled automatically.
+
+Templates receive HTML produced by the converter, so output is not
+escaped unless a template asks for it with the ``e`` filter.
+"""
+
+import os
+from typing import Optional, Sequence
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+# Templates of the project being built, relative to its root
+TEMPLATES_DIR = os.path.join("src", "web", "templates")
+
+# The project's own templates, used when a build runs from another directory
+DEFAULT_TEMPLATES = os.path.normpath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "src", "web", "templates"
+    )
+)
+
+
+def template_environment(
+    directories: Sequence[str] = (), cache_dir: Optional[str] = None
+) -> Environment:
+    """Return an environment loading from ``directories``, then the defaults.
+
+    With a ``cache_dir`` compiled templates are kept in its templates
+    subdirectory.
+    """
+    bytecode_cache = None
+    if cache_dir:
+        directory = os.path.join(cache_dir, "templates")
+        os.makedirs(directory, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(directory)
+
+    search_path = list(dict.fromkeys([*map(str, directories), DEFAULT_TEMPLATES]))
+    return Environment(
+        loader=FileSystemLoader(search_path),
+        bytecode_cache=bytecode_cache,
+        autoescape=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
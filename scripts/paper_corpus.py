@@ -0,0 +1,225 @@
+"""
+Synthetic LaTeX papers for benchmarking the converter.
+
+Papers are generated from a seed, so a given size always produces the
+same document. They use the constructs real papers are made of: nested
+sections, inline and display math, citations, cross-references, figures,
+nested lists and nested formatting, together with a bibliography and the
+figure images, so that the whole website can be built from them.
+"""
+
+import os
+import random
+from dataclasses import dataclass
+from typing import Dict, List
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    _PILLOW = False
+else:
+    _PILLOW = True
+
+_WORDS = (
+    "model data method result system analysis approach network training "
+    "performance error signal sample estimate distribution parameter "
+    "optimization trajectory feature baseline experiment accuracy structure "
+    "process function measurement control dynamics uncertainty energy"
+).split()
+
+_INLINE_MATH = (
+    r"$x_{{{i}}}^2 + y_{{{i}}}$",
+    r"$\alpha_{{{i}}} \leq \beta$",
+    r"$\mathbf{{r}}_{{{i}}}(t) \in \mathbb{{R}}^3$",
+    r"$\sum_{{k=1}}^{{{i}}} w_k = 1$",
+)
+
+_DISPLAY_MATH = (
+    r"\mathcal{{L}}_{{{i}}} = \sum_{{k=1}}^{{N}} \log p(x_k \mid \theta_{{{i}}})",
+    r"\frac{{d\mathbf{{v}}}}{{dt}} = -\frac{{\mu \mathbf{{r}}}}{{|\mathbf{{r}}|^3}}"
+    r" + \mathbf{{a}}_{{{i}}}",
+    r"\hat{{\theta}}_{{{i}}} = \arg\min_\theta \|A\theta - b\|_2^2"
+    r" + \lambda \|\theta\|_1",
+)
+
+
+@dataclass
+class PaperSpec:
+    """Size of a generated paper."""
+
+    sections: int = 10
+    subsections: int = 2
+    paragraphs: int = 3
+    equations: int = 2
+    citations: int = 4
+    figures: int = 1
+    lists: int = 1
+    seed: int = 0
+
+
+# Named sizes used by the benchmark suite
+SIZES: Dict[str, PaperSpec] = {
+    "small": PaperSpec(sections=4, subsections=1, paragraphs=2, citations=2),
+    "medium": PaperSpec(),
+    "large": PaperSpec(sections=40, subsections=3, paragraphs=4, equations=4),
+}
+
+
+class _Writer:
+    """Generator of the text of one paper."""
+
+    def __init__(self, spec: PaperSpec):
+        self.spec = spec
+        self.random = random.Random(spec.seed)
+        self.keys = [f"ref{i}" for i in range(max(1, spec.citations * 4))]
+        self.equations: List[str] = []
+        self.figures: List[str] = []
+
+    def words(self, count: int) -> str:
+        """Return ``count`` random words."""
+        return " ".join(self.random.choice(_WORDS) for _ in range(count))
+
+    def sentence(self) -> str:
+        """Return a sentence with some nested formatting or inline math."""
+        parts = [self.words(self.random.randint(4, 10))]
+        kind = self.random.randrange(5)
+        if kind == 0:
+            parts.append(rf"\textbf{{{self.words(2)} \emph{{{self.words(2)}}}}}")
+        elif kind == 1:
+            math = self.random.choice(_INLINE_MATH)
+            parts.append(math.format(i=self.random.randint(1, 9)))
+        elif kind == 2:
+            parts.append(rf"\texttt{{{self.random.choice(_WORDS)}\_{kind}}}")
+        elif kind == 3 and self.equations:
+            parts.append(rf"in Equation~\ref{{{self.random.choice(self.equations)}}}")
+        parts.append(self.words(self.random.randint(3, 8)))
+        text = " ".join(parts)
+        return text[0].upper() + text[1:] + "."
+
+    def paragraph(self, citations: int) -> str:
+        """Return a paragraph citing ``citations`` references."""
+        sentences = [self.sentence() for _ in range(self.random.randint(3, 6))]
+        for _ in range(citations):
+            i = self.random.randrange(len(sentences))
+            cited = ",".join(self.random.sample(self.keys, self.random.randint(1, 2)))
+            sentences[i] = sentences[i][:-1] + rf" \cite{{{cited}}}."
+        return " ".join(sentences)
+
+    def equation(self) -> str:
+        """Return a numbered display equation."""
+        label = f"eq:{len(self.equations) + 1}"
+        self.equations.append(label)
+        math = self.random.choice(_DISPLAY_MATH).format(i=len(self.equations))
+        return f"\\begin{{equation}}\n{math}\n\\label{{{label}}}\n\\end{{equation}}"
+
+    def figure(self) -> str:
+        """Return a figure showing one of the generated images."""
+        name = f"figure{len(self.figures) + 1}"
+        self.figures.append(name)
+        caption = f"{self.sentence()} \\cite{{{self.random.choice(self.keys)}}}"
+        return (
+            "\\begin{figure}[h]\n\\centering\n"
+            f"\\includegraphics[width=0.8\\textwidth]{{figures/{name}.png}}\n"
+            f"\\caption{{{caption}}}\n"
+            f"\\label{{fig:{name}}}\n\\end{{figure}}"
+        )
+
+    def items(self, depth: int = 0) -> str:
+        """Return an itemize or enumerate list, nested one level deep."""
+        environment = self.random.choice(("itemize", "enumerate"))
+        lines = [f"\\begin{{{environment}}}"]
+        for i in range(self.random.randint(2, 4)):
+            lines.append(f"    \\item {self.sentence()}")
+            if depth == 0 and i == 1:
+                lines.append(self.items(depth + 1))
+        lines.append(f"\\end{{{environment}}}")
+        return "\n".join(lines)
+
+    def body(self) -> List[str]:
+        """Return the blocks of one section or subsection."""
+        spec = self.spec
+        blocks = []
+        # Spread the citations over the paragraphs of the section
+        per_paragraph = -(-spec.citations // max(1, spec.paragraphs))
+        for i in range(spec.paragraphs):
+            blocks.append(self.paragraph(per_paragraph))
+            if i < spec.equations:
+                blocks.append(self.equation())
+            if i < spec.lists:
+                blocks.append(self.items())
+        for _ in range(spec.equations - spec.paragraphs):
+            blocks.append(self.equation())
+        return blocks
+
+    def paper(self) -> str:
+        """Return the LaTeX of the whole paper."""
+        spec = self.spec
+        blocks = [
+            "\\documentclass{article}",
+            "\\usepackage{graphicx}\n\\usepackage{amsmath}\n\\usepackage{amssymb}",
+            f"\\title{{{self.words(6).title()}}}",
+            "\\author{Ada Example \\\\ University of Examples \\and "
+            "Alan Sample \\\\ Institute of Samples}",
+            "\\begin{document}\n\\maketitle",
+            f"\\begin{{abstract}}\n{self.paragraph(0)}\n\\end{{abstract}}",
+        ]
+        for section in range(spec.sections):
+            blocks.append(f"\\section{{{self.words(3).title()}}}")
+            blocks.extend(self.body())
+            if section < spec.figures:
+                blocks.append(self.figure())
+            for _ in range(spec.subsections):
+                blocks.append(f"\\subsection{{{self.words(2).title()}}}")
+                blocks.extend(self.body())
+        blocks.append("\\bibliographystyle{plain}\n\\bibliography{bibliography}")
+        blocks.append("\\end{document}")
+        return "\n\n".join(blocks) + "\n"
+
+    def bibliography(self) -> str:
+        """Return a BibTeX entry for every key the paper may cite."""
+        entries = []
+        for i, key in enumerate(self.keys):
+            entries.append(
+                f"@article{{{key},\n"
+                f"  title={{{self.words(5).title()}}},\n"
+                f"  author={{Author, Number{i} and Writer, Second}},\n"
+                f"  journal={{Journal of {self.words(2).title()}}},\n"
+                f"  volume={{{i + 1}}},\n"
+                f"  pages={{{i * 10 + 1}--{i * 10 + 9}}},\n"
+                f"  year={{{1990 + i % 35}}}\n"
+                "}\n"
+            )
+        return "\n".join(entries)
+
+
+def generate_paper(spec: PaperSpec) -> str:
+    """Return the LaTeX of a paper of the given size."""
+    return _Writer(spec).paper()
+
+
+def write_project(root: str, spec: PaperSpec) -> str:
+    """Write a paper project under ``root`` and return its main file.
+
+    The project has the layout the website builder expects: the paper,
+    its bibliography and figures under src/paper and a config.yaml.
+    """
+    writer = _Writer(spec)
+    paper = writer.paper()
+    paper_dir = os.path.join(root, "src", "paper")
+    os.makedirs(os.path.join(paper_dir, "figures"), exist_ok=True)
+
+    main_tex = os.path.join(paper_dir, "main.tex")
+    with open(main_tex, "w", encoding="utf-8") as f:
+        f.write(paper)
+    with open(os.path.join(paper_dir, "bibliography.bib"), "w", encoding="utf-8") as f:
+        f.write(writer.bibliography())
+    for i, name in enumerate(writer.figures):
+        path = os.path.join(paper_dir, "figures", f"{name}.png")
+        if _PILLOW:
+            Image.new("RGB", (1200, 800), (40 * i % 256, 120, 200)).save(path)
+        else:
+            # Without Pillow figures are published as they are
+            open(path, "wb").close()
+    with open(os.path.join(root, "config.yaml"), "w", encoding="utf-8") as f:
+        f.write("website:\n  math_renderer: katex\nbuild:\n  optimize: false\n")
+    return main_tex
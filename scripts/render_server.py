@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Local HTTP server that renders LaTeX to HTML with warm caches.
+
+The server keeps one converter for its lifetime, so the configuration,
+templates, parsed bibliographies and the section and equation caches are
+loaded once and shared by every request. A bibliography is parsed again
+only when its modification time or size changes. The caches on disk live
+in the directory the configuration names in build.cache_dir.
+
+``POST /render`` takes LaTeX source as the request body and returns the
+HTML page. Pages are also kept in a bounded in-memory cache keyed by the
+hash of the source and by the modification time and size of the
+bibliography files it reads, so rendering the same source again costs a
+lookup.
+``GET /health`` reports the cache statistics as JSON.
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from bibliography import BibliographyStore
+from latex_to_html import LatexToHtmlConverter
+
+DEFAULT_CACHE_SIZE = 128
+
+# Largest LaTeX source accepted, in bytes
+MAX_SOURCE = 10 * 2**20
+
+
+class RenderCache:
+    """Least recently used store of rendered pages."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        """Keep at most ``max_entries`` pages; 0 disables the cache."""
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pages: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the page stored for ``key``, or None on a miss."""
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._pages.move_to_end(key)
+            return page
+
+    def put(self, key: str, page: str) -> None:
+        """Store a page, evicting the least recently used ones past the limit."""
+        with self._lock:
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+
+class RenderServer:
+    """HTTP server rendering LaTeX with a shared converter."""
+
+    def __init__(
+        self,
+        converter: LatexToHtmlConverter,
+        host: str = "127.0.0.1",
+        port: int = 8001,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        base_dir: str = ".",
+    ):
+        """Serve on ``host`` and ``port``; port 0 picks a free one.
+
+        Bibliography files named by the sources are found under ``base_dir``.
+        """
+        self.converter = converter
+        self.cache = RenderCache(cache_size)
+        self.base_dir = base_dir
+        self.bibliographies = BibliographyStore(converter.cache_dir)
+        converter.bibliographies = self.bibliographies
+        self.httpd = ThreadingHTTPServer((host, port), partial(_Handler, self))
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Return the address of the server."""
+        host, port = self.httpd.socket.getsockname()[:2]
+        return f"http://{host}:{port}/"
+
+    def render(self, source: str) -> Tuple[str, bool]:
+        """Return the page for LaTeX source and whether it was cached."""
+        key = self.key(source)
+        page = self.cache.get(key)
+        if page is not None:
+            return page, True
+        page = self.converter.convert_text(source, self.base_dir)
+        self.cache.put(key, page)
+        return page, False
+
+    def key(self, source: str) -> str:
+        """Return the cache key of LaTeX source and the files it reads.
+
+        Editing a bibliography the source reads changes the key.
+        """
+        digest = hashlib.sha256(f"{self.base_dir}\0{source}".encode("utf-8"))
+        for path in self.converter.bibliography_files(source, self.base_dir):
+            stamp = self.bibliographies.stamp(path)
+            digest.update(f"\0{path}\0{stamp}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def start(self) -> None:
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving, close the socket and write the equation cache."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.converter.equation_cache is not None:
+            self.converter.equation_cache.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handler for the render and health endpoints."""
+
+    def __init__(self, server: RenderServer, *args: Any, **kwargs: Any):
+        self.render_server = server
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        """Report the cache statistics."""
+        if urlsplit(self.path).path != "/health":
+            self._send(404, "text/plain", "Not found\n")
+            return
+        cache = self.render_server.cache
+        stats = {
+            "status": "ok",
+            "entries": len(cache),
+            "hits": cache.hits,
+            "misses": cache.misses,
+        }
+        self._send(200, "application/json", json.dumps(stats))
+
+    def do_POST(self) -> None:
+        """Render the LaTeX source in the request body."""
+        if urlsplit(self.path).path != "/render":
+            self._send(404, "text/plain", "Not found\n")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._send(411, "text/plain", "Content-Length is required\n")
+            return
+        if length > MAX_SOURCE:
+            self._send(413, "text/plain", "LaTeX source is too large\n")
+            return
+        source = self.rfile.read(length).decode("utf-8", errors="replace")
+        if not source.strip():
+            self._send(400, "text/plain", "No LaTeX source given\n")
+            return
+
+        try:
+            page, cached = self.render_server.render(source)
+        except Exception as e:
+            self._send(500, "text/plain", f"Error converting LaTeX: {e}\n")
+            return
+        self._send(
+            200,
+            "text/html",
+            page,
+            {"X-Render-Cache": "hit" if cached else "miss"},
+        )
+
+    def _send(
+        self,
+        status: int,
+        content_type: str,
+        body: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Send a complete response."""
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep the output free of request logs."""
+
+
+def main() -> None:
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Serve LaTeX to HTML rendering.")
+    parser.add_argument("--config", default="config.yaml", help="Config file path")
+    parser.add_argument("--port", type=int, default=8001, help="port to listen on")
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help="rendered pages kept in memory",
+    )
+    parser.add_argument(
+        "--base-dir",
+        default=".",
+        help="directory bibliography files are found in",
+    )
+    args = parser.parse_args()
+
+    converter = LatexToHtmlConverter(args.config)
+    server = RenderServer(
+        converter, port=args.port, cache_size=args.cache_size, base_dir=args.base_dir
+    )
+    print(f"Rendering LaTeX at {server.url}render (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        if converter.equation_cache is not None:
+            converter.equation_cache.close()
+
+
+if __name__ == "__main__":
+    main()
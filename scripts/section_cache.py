@@ -0,0 +1,64 @@
+"""
+On-disk cache of converted section HTML for incremental re-conversion.
+
+Entries are keyed by a hash of the section's raw LaTeX and the converter
+settings that affect the output. Each entry stores the cleaned HTML with
+numbering-independent citation slots, plus the citation keys in order, so
+that a cached section can be reused after earlier sections change.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class SectionCache:
+    """Content-addressed store of cleaned section HTML."""
+
+    def __init__(self, cache_dir: str, settings: str = ""):
+        """Initialize the cache in ``cache_dir`` for the given settings."""
+        self.directory = Path(cache_dir) / "sections"
+        self.settings = settings
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source: str) -> str:
+        """Return the cache key for a section's raw LaTeX."""
+        digest = hashlib.sha256(self.settings.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(source.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached entry for ``key``, or None on a miss."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry: Dict = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: Dict) -> None:
+        """Store an entry, replacing the file atomically."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # A cache that cannot be written only costs a re-conversion
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _path(self, key: str) -> Path:
+        """Return the file that holds the entry for ``key``."""
+        return self.directory / key[:2] / f"{key}.json"
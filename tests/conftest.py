@@ -1,10 +1,26 @@
 """Pytest configuration and fixtures."""
 
+import shutil
 import tempfile
 from pathlib import Path
 
 import pytest
 
+REPO_CONFIG = Path(__file__).resolve().parent.parent / "config.yaml"
+
+
+@pytest.fixture
+def project_dir(tmp_path, monkeypatch):
+    """Run a test from a scratch directory holding the project's config.yaml.
+
+    Tests that convert or build with the default configuration request this,
+    so the build cache it enables is written to the scratch directory instead
+    of the repository.
+    """
+    shutil.copy(REPO_CONFIG, tmp_path / "config.yaml")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
 
 @pytest.fixture
 def temp_dir():
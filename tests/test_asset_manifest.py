@@ -0,0 +1,70 @@
+"""Tests for fingerprinted asset names and the build manifest."""
+
+import json
+import os
+import sys
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from asset_manifest import AssetManifest, fingerprint
+from file_sync import sync_tree
+
+
+class TestFingerprint:
+    """Test cases for fingerprinted names."""
+
+    def test_fingerprint(self):
+        """Test that the hash goes before the extension."""
+        assert fingerprint("style.css", "3f2a1c9b0e7d") == "style.3f2a1c9b.css"
+        assert fingerprint("plot-480w.webp", "abcdef0123") == "plot-480w.abcdef01.webp"
+
+
+class TestAssetManifest:
+    """Test cases for AssetManifest."""
+
+    def test_sync_fingerprints_pages_assets(self, temp_dir):
+        """Test that stylesheets and scripts get hashed names, other files not."""
+        src = temp_dir / "assets"
+        (src / "fonts").mkdir(parents=True)
+        (src / "style.css").write_text("body {}")
+        (src / "fonts" / "serif.woff2").write_bytes(b"font")
+
+        manifest = AssetManifest()
+        sync_tree(
+            src,
+            temp_dir / "docs" / "assets",
+            rename=manifest.fingerprinter(str(src), "assets"),
+        )
+
+        style = manifest.url("assets/style.css")
+        assert style.startswith("assets/style.") and style != "assets/style.css"
+        assert (temp_dir / "docs" / style).read_text() == "body {}"
+        assert manifest.url("assets/fonts/serif.woff2") == "assets/fonts/serif.woff2"
+        assert manifest.url("assets/unknown.js") == "assets/unknown.js"
+
+    def test_save_and_load(self, temp_dir):
+        """Test that the manifest round-trips, dropping unpublished files."""
+        (temp_dir / "assets").mkdir()
+        (temp_dir / "assets" / "style.1234abcd.css").write_text("")
+        manifest = AssetManifest()
+        manifest.add("assets/style.css", "assets/style.1234abcd.css")
+        manifest.add("assets/gone.js", "assets/gone.5678abcd.js")
+
+        manifest.save(str(temp_dir))
+        loaded = AssetManifest.load(str(temp_dir))
+
+        assert json.loads((temp_dir / "manifest.json").read_text()) == manifest.entries
+        assert loaded.entries == {"assets/style.css": "assets/style.1234abcd.css"}
+        assert AssetManifest.load(str(temp_dir / "missing")).entries == {}
+
+    def test_write_replaces_earlier_versions(self, temp_dir):
+        """Test that generated assets replace their previous versions."""
+        manifest = AssetManifest()
+
+        first = manifest.write(str(temp_dir), "assets", "theme.css", "a {}")
+        second = manifest.write(str(temp_dir), "assets", "theme.css", "b {}")
+
+        assert first != second
+        assert os.listdir(temp_dir) == [second]
+        assert manifest.url("assets/theme.css") == f"assets/{second}"
@@ -0,0 +1,83 @@
+"""Tests for the benchmark suite."""
+
+import json
+import os
+import sys
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from benchmark import (
+    STAGES,
+    append_history,
+    benchmark_project,
+    compare,
+    load_baseline,
+    save_baseline,
+)
+from paper_corpus import PaperSpec, write_project
+
+
+class TestCompare:
+    """Test cases for comparing results with the baseline."""
+
+    def test_slowdown_past_tolerance_is_reported(self):
+        """Test that only stages slower than the tolerance allows fail."""
+        baseline = {"small": {"parse": 0.010, "build": 0.100}}
+        results = {"small": {"parse": 0.0115, "build": 0.130}}
+
+        regressions = compare(results, baseline, tolerance=20)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("small build: 130.0 ms, 30% slower")
+
+    def test_stages_without_baseline_pass(self):
+        """Test that new sizes and stages never fail."""
+        results = {"large": {"parse": 1.0}, "small": {"convert": 1.0}}
+
+        assert compare(results, {"small": {"parse": 0.001}}) == []
+
+
+class TestResultFiles:
+    """Test cases for the history and baseline files."""
+
+    def test_history_keeps_every_run(self, temp_dir):
+        """Test that each run is appended to the history."""
+        path = str(temp_dir / "history.json")
+        append_history(path, {"small": {"parse": 0.1}})
+        append_history(path, {"small": {"parse": 0.2}})
+
+        with open(path) as f:
+            history = json.load(f)
+
+        assert [run["results"]["small"]["parse"] for run in history] == [0.1, 0.2]
+        assert "python" in history[0]
+
+    def test_baseline_update_keeps_other_sizes(self, temp_dir):
+        """Test that updating the baseline of one size keeps the others."""
+        path = str(temp_dir / "baseline.json")
+        assert load_baseline(path) == {}
+
+        save_baseline(path, {"small": {"parse": 0.1}, "large": {"parse": 2.0}})
+        save_baseline(path, {"small": {"parse": 0.2}})
+
+        assert load_baseline(path) == {
+            "large": {"parse": 2.0},
+            "small": {"parse": 0.2},
+        }
+
+
+class TestBenchmarkProject:
+    """Test cases for timing the stages."""
+
+    def test_every_stage_is_timed(self, temp_dir):
+        """Test that a generated project is parsed, rendered and built."""
+        write_project(str(temp_dir), PaperSpec(sections=2, figures=0))
+        cwd = os.getcwd()
+
+        timings = benchmark_project(str(temp_dir), repeat=1)
+
+        assert os.getcwd() == cwd
+        assert tuple(timings) == STAGES
+        assert all(seconds > 0 for seconds in timings.values())
+        assert (temp_dir / "docs" / "index.html").exists()
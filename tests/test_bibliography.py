@@ -0,0 +1,183 @@
+"""Tests for BibTeX parsing and reference formatting."""
+
+import io
+import os
+import sys
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from bibliography import (
+    BibliographyStore,
+    format_authors,
+    iter_entries,
+    load_bibliography,
+    plain_text,
+)
+from latex_to_html import LatexToHtmlConverter
+
+
+class TestParseBibtex:
+    """Test cases for reading BibTeX entries."""
+
+    def test_iter_entries(self, sample_bibliography):
+        """Test that every entry is read with its type and fields."""
+        entries = list(iter_entries(io.StringIO(sample_bibliography)))
+
+        assert [(entry_type, key) for entry_type, key, _ in entries] == [
+            ("article", "einstein1905"),
+            ("book", "feynman1963"),
+            ("inproceedings", "doe2023"),
+        ]
+        assert entries[0][2]["title"].startswith("Zur Elektrodynamik")
+        assert entries[0][2]["pages"] == "891--921"
+
+    def test_entries_split_across_chunks(self, sample_bibliography):
+        """Test that entries are found when reads end mid-entry."""
+        entries = list(iter_entries(io.StringIO(sample_bibliography), chunk_size=7))
+        assert len(entries) == 3
+        assert entries[2][2]["booktitle"].startswith("Proceedings")
+
+    def test_strings_quotes_and_concatenation(self):
+        """Test @string macros, quoted values and # concatenation."""
+        bib = (
+            '@string{ieee = "IEEE Trans."}\n'
+            "@comment{ignored}\n"
+            '@article(key1, journal = ieee # " Robotics", month = jan,'
+            ' title = "A {Nested} Title", year = 2020)'
+        )
+        ((entry_type, key, fields),) = iter_entries(io.StringIO(bib))
+
+        assert (entry_type, key) == ("article", "key1")
+        assert fields == {
+            "journal": "IEEE Trans. Robotics",
+            "month": "Jan",
+            "title": "A {Nested} Title",
+            "year": "2020",
+        }
+
+
+class TestFormatting:
+    """Test cases for formatting references."""
+
+    def test_format_authors(self):
+        """Test author lists in "Last, F." form."""
+        assert format_authors("Einstein, Albert") == "Einstein, A."
+        assert format_authors("Richard P Feynman and Sands, Matthew") == (
+            "Feynman, R. P., & Sands, M."
+        )
+        assert format_authors("{NASA JPL}") == "NASA JPL"
+        assert format_authors("Doe, Jean-Paul and others") == "Doe, J.-P., et al."
+
+    def test_plain_text(self):
+        """Test conversion of accents, escapes and dashes."""
+        assert plain_text(r"K{\"o}rper \& Sch\"{u}ler, 1--2") == (
+            "Körper &amp; Schüler, 1–2"
+        )
+
+    def test_format_cited_entries(self, temp_dir, sample_bibliography):
+        """Test formatting articles, books and proceedings."""
+        bib_file = temp_dir / "refs.bib"
+        bib_file.write_text(sample_bibliography)
+        bibliography = load_bibliography(str(bib_file))
+
+        assert bibliography.format("einstein1905").startswith("Einstein, A. (1905).")
+        assert bibliography.format("einstein1905").endswith(
+            "<em>Annalen der Physik</em>, 17(10), 891–921."
+        )
+        assert bibliography.format("feynman1963") == (
+            "Feynman, R. P., Leighton, R. B., & Sands, M. (1963). "
+            "<em>The Feynman Lectures on Physics</em>. Addison-Wesley."
+        )
+        assert bibliography.format("doe2023").endswith(
+            "<em>Proceedings of the International Conference on Research</em>, "
+            "123–145."
+        )
+        assert bibliography.format("missing") is None
+
+
+class TestBibliographyCache:
+    """Test cases for caching parsed bibliographies."""
+
+    def test_cached_index_is_reused(self, temp_dir, sample_bibliography):
+        """Test that an unchanged file is loaded from the cache."""
+        bib_file = temp_dir / "refs.bib"
+        bib_file.write_text(sample_bibliography)
+        cache_dir = str(temp_dir / "cache")
+
+        first = load_bibliography(str(bib_file), cache_dir)
+        expected = first.format("einstein1905")
+        first.save()
+
+        cached = load_bibliography(str(bib_file), cache_dir)
+        assert cached.formatted == {"einstein1905": expected}
+        assert set(cached.entries) == {"einstein1905", "feynman1963", "doe2023"}
+
+        bib_file.write_text(sample_bibliography.replace("year={1905}", "year={1906}"))
+        changed = load_bibliography(str(bib_file), cache_dir)
+        assert changed.formatted == {}
+        assert "(1906)" in changed.format("einstein1905")
+
+    def test_store_keeps_unchanged_files_in_memory(self, temp_dir, sample_bibliography):
+        """Test that the store parses a file again only after it changes."""
+        bib_file = temp_dir / "refs.bib"
+        bib_file.write_text(sample_bibliography)
+        store = BibliographyStore()
+
+        first = store.load(str(bib_file))
+        assert store.load(str(bib_file)) is first
+
+        bib_file.write_text(sample_bibliography.replace("year={1905}", "year={19050}"))
+        changed = store.load(str(bib_file))
+        assert changed is not first
+        assert "(19050)" in changed.format("einstein1905")
+        assert store.stamp(str(temp_dir / "missing.bib")) is None
+
+
+@pytest.mark.usefixtures("project_dir")
+class TestConverterBibliography:
+    """Test cases for the references section of converted papers."""
+
+    def test_references_come_from_bib_file(self, temp_dir, sample_bibliography):
+        """Test that only cited entries are listed, in citation order."""
+        (temp_dir / "refs.bib").write_text(sample_bibliography)
+        (temp_dir / "paper.tex").write_text(
+            r"\section{A}See \cite{feynman1963} and \cite{einstein1905}."
+            r"\bibliography{refs}"
+        )
+
+        converter = LatexToHtmlConverter()
+        output_file = converter.convert_file(
+            str(temp_dir / "paper.tex"), str(temp_dir / "out")
+        )
+        with open(output_file, "r", encoding="utf-8") as f:
+            html = f.read()
+
+        assert '<span class="ref-num">[1]</span> Feynman' in html
+        assert '<span class="ref-num">[2]</span> Einstein' in html
+        assert "doe2023" not in html and "Doe, J." not in html
+
+    def test_caption_citations_are_listed(self, temp_dir, sample_bibliography):
+        """Test that a reference cited only in a figure caption is listed."""
+        (temp_dir / "refs.bib").write_text(sample_bibliography)
+        (temp_dir / "paper.tex").write_text(
+            r"\section{A}See \cite{feynman1963}."
+            r"\begin{figure}\includegraphics{a.png}"
+            r"\caption{As in \cite{einstein1905}.}\end{figure}"
+            r"\bibliography{refs}"
+        )
+
+        converter = LatexToHtmlConverter()
+        parsed = converter._parse_latex((temp_dir / "paper.tex").read_text())
+        output_file = converter.convert_file(
+            str(temp_dir / "paper.tex"), str(temp_dir / "out")
+        )
+        with open(output_file, "r", encoding="utf-8") as f:
+            html = f.read()
+
+        assert ">[2]</span>" in parsed["figures"][0]["caption_html"]
+        assert parsed["citations"] == {"feynman1963": 1, "einstein1905": 2}
+        assert "As in <span" in html and ">[2]</span>" in html
+        assert '<span class="ref-num">[2]</span> Einstein' in html
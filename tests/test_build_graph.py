@@ -0,0 +1,120 @@
+"""Tests for running build stages by their dependencies."""
+
+import os
+import sys
+import threading
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from build_graph import Stage, order_stages, run_stages
+
+
+class TestOrderStages:
+    """Test cases for order_stages."""
+
+    def test_needs_come_first(self):
+        """Test that every stage follows the stages it needs."""
+        stages = [
+            Stage("paper", lambda: True, ("assets",)),
+            Stage("bibtex", lambda: True, ("assets",)),
+            Stage("assets", lambda: True),
+        ]
+        assert [stage.name for stage in order_stages(stages)] == [
+            "assets",
+            "paper",
+            "bibtex",
+        ]
+
+    def test_cycles_and_unknown_needs_are_rejected(self):
+        """Test that a graph that cannot be run is an error."""
+        with pytest.raises(ValueError, match="a -> b -> a"):
+            order_stages(
+                [Stage("a", lambda: True, ("b",)), Stage("b", lambda: True, ("a",))]
+            )
+        with pytest.raises(ValueError, match="unknown stage missing"):
+            order_stages([Stage("a", lambda: True, ("missing",))])
+
+
+class TestRunStages:
+    """Test cases for run_stages."""
+
+    def test_independent_stages_run_together(self):
+        """Test that stages needing the same stage run at the same time."""
+        order = []
+        # Both pages must be running for either to finish
+        barrier = threading.Barrier(2, timeout=5)
+
+        def page(name):
+            def run():
+                barrier.wait()
+                order.append(name)
+                return True
+
+            return run
+
+        results = run_stages(
+            [
+                Stage("assets", lambda: order.append("assets") or False),
+                Stage("paper", page("paper"), ("assets",)),
+                Stage("bibtex", page("bibtex"), ("assets",)),
+            ]
+        )
+
+        assert order[0] == "assets"
+        assert sorted(order[1:]) == ["bibtex", "paper"]
+        assert list(results) == ["assets", "paper", "bibtex"]
+        assert all(result.ok for result in results.values())
+        assert [result.ran for result in results.values()] == [False, True, True]
+
+    def test_output_of_concurrent_stages_is_not_interleaved(self, capsys):
+        """Test that each stage's output is printed in one piece."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def page(name):
+            def run():
+                print(f"{name}: started", end="")
+                barrier.wait()
+                print(" and finished")
+                return True
+
+            return run
+
+        results = run_stages(
+            [Stage("paper", page("paper")), Stage("bibtex", page("bibtex"))]
+        )
+        lines = capsys.readouterr().out.splitlines()
+
+        assert sorted(lines) == [
+            "bibtex: started and finished",
+            "paper: started and finished",
+        ]
+        assert results["paper"].output == "paper: started and finished\n"
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_failure_blocks_the_stages_that_need_it(self, workers):
+        """Test that a failed stage is reported and its dependents skipped."""
+        ran = []
+
+        def fail():
+            raise OSError("disk full")
+
+        results = run_stages(
+            [
+                Stage("assets", fail),
+                Stage("paper", lambda: ran.append("paper"), ("assets",)),
+                Stage("summary", lambda: ran.append("summary"), ("paper",)),
+                Stage("other", lambda: ran.append("other") or True),
+            ],
+            workers,
+        )
+
+        assert ran == ["other"]
+        assert results["assets"].status == "failed"
+        assert results["assets"].error == "OSError: disk full"
+        assert results["paper"].status == "blocked"
+        assert results["paper"].error == "needs assets"
+        assert results["summary"].error == "needs paper"
+        assert results["other"].ok
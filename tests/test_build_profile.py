@@ -0,0 +1,115 @@
+"""Tests for profiling the build."""
+
+import json
+import os
+import pstats
+import sys
+import tracemalloc
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from build_profile import Profiler
+
+
+class TestProfiler:
+    """Test cases for Profiler."""
+
+    def test_trace_events(self, temp_dir):
+        """Test that spans are written as Chrome complete events."""
+        profiler = Profiler()
+        with profiler.span("paper", reason="not built before"):
+            pass
+        profiler.add("section Introduction", 1.0, 1.5, "section", tid=42)
+        profiler.write(str(temp_dir / "trace.json"))
+
+        with open(temp_dir / "trace.json") as f:
+            events = json.load(f)["traceEvents"]
+
+        assert [event["name"] for event in events] == [
+            "paper",
+            "section Introduction",
+        ]
+        assert events[0]["ph"] == "X"
+        assert events[0]["args"] == {"reason": "not built before"}
+        assert events[1]["ts"] == 1e6
+        assert events[1]["dur"] == 0.5e6
+        assert events[1]["tid"] == 42
+
+    def test_self_time_excludes_nested_spans(self):
+        """Test that the summary charges nested spans to themselves only."""
+        profiler = Profiler()
+        profiler.add("build", 0.0, 1.0, tid=1)
+        profiler.add("paper", 0.2, 0.7, tid=1)
+        profiler.add("parse", 0.3, 0.4, tid=1)
+        profiler.add("parse", 0.5, 0.6, tid=1)
+        # Spans in other threads run alongside, not inside
+        profiler.add("section Results", 0.3, 0.5, "section", tid=2)
+
+        totals = profiler.totals()
+        summary = profiler.summary(top=2)
+
+        assert totals["build"][0] == 1
+        assert round(totals["build"][2], 6) == 0.5
+        assert round(totals["paper"][2], 6) == 0.3
+        assert totals["parse"][0] == 2
+        assert round(totals["parse"][1], 6) == 0.2
+        header, *rows = summary.splitlines()
+        assert header.split() == ["Span", "Calls", "Total", "ms", "Self", "ms"]
+        assert [row.split()[0] for row in rows] == ["build", "paper"]
+
+    def test_cprofile_one_stage(self, temp_dir, monkeypatch):
+        """Test that only the chosen stage is run under cProfile."""
+        monkeypatch.chdir(temp_dir)
+        profiler = Profiler(cprofile="paper")
+
+        with profiler.span("assets"):
+            pass
+        with profiler.span("paper"):
+            sorted(range(1000))
+
+        assert profiler.stats_files == ["paper.pstats"]
+        assert pstats.Stats(str(temp_dir / "paper.pstats")).total_calls > 0
+
+
+class TestMemoryAccounting:
+    """Test cases for the memory accounting of spans."""
+
+    def test_peak_of_nested_spans(self):
+        """Test that a stage's peak includes the allocations of nested spans."""
+        profiler = Profiler(memory=True)
+        try:
+            with profiler.span("paper"):
+                with profiler.span("section Big", "section"):
+                    data = bytearray(4 * 2**20)
+                    del data
+                kept = bytearray(2**20)
+        finally:
+            profiler.close()
+
+        section, paper = profiler.memory_stats
+        assert section["name"] == "section Big"
+        assert section["growth"] > 3 * 2**20
+        assert section["sites"] == []
+        assert paper["peak"] >= section["peak"]
+        assert 2**20 <= paper["sites"][0]["size"] < 2 * 2**20
+        assert paper["sites"][0]["site"].startswith(__file__)
+        assert len(kept) == 2**20
+
+    def test_memory_report(self, temp_dir):
+        """Test that the report is written as JSON and summarized."""
+        profiler = Profiler(memory=True)
+        try:
+            with profiler.span("assets"):
+                pass
+        finally:
+            profiler.close()
+        profiler.write_memory(str(temp_dir / "memory.json"))
+
+        with open(temp_dir / "memory.json") as f:
+            spans = json.load(f)["spans"]
+
+        assert [span["name"] for span in spans] == ["assets"]
+        assert set(spans[0]) == {"name", "category", "peak", "growth", "sites"}
+        assert profiler.memory_summary().splitlines()[1].startswith("assets")
+        assert not tracemalloc.is_tracing()
@@ -0,0 +1,76 @@
+"""Tests for the record of build stage inputs and outputs."""
+
+import os
+import sys
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from build_state import BuildState
+
+
+class TestBuildState:
+    """Test cases for BuildState."""
+
+    def _built(self, temp_dir):
+        """Record a stage with one input and one output and reload it."""
+        (temp_dir / "main.tex").write_text("text")
+        (temp_dir / "index.html").write_text("<p>text</p>")
+        state = BuildState(str(temp_dir / "state.json"))
+        state.record(
+            "paper",
+            {"optimize": "True"},
+            [str(temp_dir / "main.tex"), str(temp_dir / "missing.bib")],
+            [str(temp_dir / "index.html")],
+            {"figures/a.png": "figures/a.1234abcd.png"},
+        )
+        state.save()
+        return BuildState(str(temp_dir / "state.json"))
+
+    def test_unchanged_stage_is_up_to_date(self, temp_dir):
+        """Test that nothing triggers a stage whose files are unchanged."""
+        state = self._built(temp_dir)
+
+        assert state.reason("paper", {"optimize": "True"}) is None
+        assert state.published("paper") == {"figures/a.png": "figures/a.1234abcd.png"}
+
+    def test_reasons(self, temp_dir):
+        """Test that changed settings, inputs and outputs are reported."""
+        state = self._built(temp_dir)
+        main, page = temp_dir / "main.tex", temp_dir / "index.html"
+
+        assert state.reason("assets", {}) == "not built before"
+        assert state.reason("paper", {"optimize": "False"}) == (
+            "setting optimize changed"
+        )
+
+        main.write_text("edit")
+        assert state.reason("paper", {"optimize": "True"}) == f"{main} changed"
+        main.write_text("text")
+
+        (temp_dir / "missing.bib").write_text("@misc{a}")
+        assert state.reason("paper", {"optimize": "True"}).endswith("appeared")
+        os.unlink(temp_dir / "missing.bib")
+
+        page.write_text("<p>edited</p>")
+        assert state.reason("paper", {"optimize": "True"}) == (
+            f"output {page} was modified"
+        )
+
+    def test_touched_input_is_not_a_change(self, temp_dir):
+        """Test that an input with a new mtime but the same content is unchanged."""
+        state = self._built(temp_dir)
+        os.utime(temp_dir / "main.tex", ns=(1, 1))
+
+        assert state.reason("paper", {"optimize": "True"}) is None
+        state.save()
+        reloaded = BuildState(str(temp_dir / "state.json"))
+        assert reloaded.stages["paper"]["inputs"][str(temp_dir / "main.tex")][1] == 1
+
+    def test_without_path(self):
+        """Test that a state without a file always runs every stage."""
+        state = BuildState()
+        state.record("paper", {}, [], [])
+        state.save()
+
+        assert state.reason("paper", {}) == "no build cache configured"
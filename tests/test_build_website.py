@@ -1,5 +1,6 @@
 """Tests for website building functionality."""
 
+import json
 import os
 import sys
 import tempfile
@@ -11,9 +12,12 @@ import pytest
 # Add scripts directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
 
-from build_website import WebsiteBuilder
+from build_state import BuildState
+from build_website import WebsiteBuilder, build_batch, describe_batch, load_batch
+from paper_corpus import PaperSpec, write_project
 
 
+@pytest.mark.usefixtures("project_dir")
 class TestWebsiteBuilder:
     """Test cases for WebsiteBuilder."""
 
@@ -148,11 +152,13 @@ paper:
 
             assets_dir = builder.output_dir / "assets"
             assert assets_dir.exists()
-            assert (assets_dir / "style.css").exists()
-            assert (assets_dir / "theme.css").exists()
+            style = builder.output_dir / builder.manifest.url("assets/style.css")
+            theme = builder.output_dir / builder.manifest.url("assets/theme.css")
+            assert style.exists() and style.name != "style.css"
+            assert theme.exists() and theme.name != "theme.css"
 
             # Check CSS content
-            with open(assets_dir / "style.css", "r") as f:
+            with open(style, "r") as f:
                 css_content = f.read()
                 assert "body {" in css_content
 
@@ -174,33 +180,126 @@ paper:
 
             builder._copy_assets()
 
-            # Check files were copied
-            dst_assets = builder.output_dir / "assets"
-            assert (dst_assets / "custom.css").exists()
-            assert (dst_assets / "script.js").exists()
-
-    def test_copy_figures(self):
-        """Test copying figures."""
+            # Check files were copied under fingerprinted names
+            script = builder.manifest.url("assets/script.js")
+            assert (
+                builder.output_dir / builder.manifest.url("assets/custom.css")
+            ).exists()
+            assert (builder.output_dir / script).exists()
+            assert script.startswith("assets/script.") and script.endswith(".js")
+            assert script != "assets/script.js"
+
+    def test_changed_asset_gets_new_name(self):
+        """Test that editing an asset publishes it under a new name."""
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Create source figures
-            src_figures = Path(temp_dir) / "src" / "paper" / "figures"
-            src_figures.mkdir(parents=True)
-
-            # Create some figure files
-            (src_figures / "figure1.png").write_text("fake image data")
-            (src_figures / "figure2.jpg").write_text("fake image data")
+            src_assets = Path(temp_dir) / "src" / "web" / "assets"
+            src_assets.mkdir(parents=True)
+            (src_assets / "style.css").write_text("body { color: red; }")
 
             builder = WebsiteBuilder()
-            builder.source_dir = Path(temp_dir) / "src"
             builder.output_dir = Path(temp_dir) / "docs"
-            builder.paper_dir = Path(temp_dir) / "src" / "paper"
+            builder.web_dir = Path(temp_dir) / "src" / "web"
+            builder._copy_assets()
+            old = builder.manifest.url("assets/style.css")
+
+            (src_assets / "style.css").write_text("body { color: blue; }")
+            builder._copy_assets()
+            new = builder.manifest.url("assets/style.css")
+
+            assert new != old
+            assert os.listdir(builder.output_dir / "assets") == [Path(new).name]
 
-            builder._copy_figures()
+    @patch("build_website.LatexToHtmlConverter")
+    def test_unchanged_build_is_skipped(self, mock_converter_class, capsys):
+        """Test that only stages with changed inputs run again."""
+        mock_converter = mock_converter_class.return_value
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paper_dir = Path(temp_dir) / "src" / "paper"
+            assets_dir = Path(temp_dir) / "src" / "web" / "assets"
+            paper_dir.mkdir(parents=True)
+            assets_dir.mkdir(parents=True)
+            (paper_dir / "main.tex").write_text(r"\begin{document}\end{document}")
+            (paper_dir / "bibliography.bib").write_text("@misc{a, title={A}}")
+            (assets_dir / "style.css").write_text("body { color: red; }")
+
+            def build():
+                builder = WebsiteBuilder(optimize=False)
+                builder.output_dir = Path(temp_dir) / "docs"
+                builder.paper_dir = paper_dir
+                builder.web_dir = assets_dir.parent
+                builder.state = BuildState(str(Path(temp_dir) / "state.json"))
+                assert builder.build(explain=True) is True
+                return capsys.readouterr().out
+
+            mock_converter.inputs = [str(paper_dir / "main.tex")]
+            build()
+            output = build()
+
+            assert "Website is up to date" in output
+            assert mock_converter.convert_file.call_count == 1
+            manifest = json.loads(
+                (Path(temp_dir) / "docs" / "manifest.json").read_text()
+            )
+            assert list(manifest) == ["assets/style.css"]
+
+            (assets_dir / "style.css").write_text("body { color: blue; }")
+            output = build()
+
+            assert "style.css changed" in output
+            assert "paper: setting assets changed" in output
+            assert mock_converter.convert_file.call_count == 2
+
+    def test_explain_lines_of_concurrent_stages(self, temp_dir, capsys):
+        """Test that stages running together print whole lines."""
+        write_project(str(temp_dir), PaperSpec(sections=1, figures=0))
+        (temp_dir / "config.yaml").write_text("build:\n  cache_dir: .cache\n")
+
+        WebsiteBuilder(root=str(temp_dir)).build()
+        capsys.readouterr()
+        assert WebsiteBuilder(root=str(temp_dir)).build(explain=True) is True
+        lines = capsys.readouterr().out.splitlines()
+
+        for stage in ("assets", "paper", "bibtex"):
+            assert f"{stage}: up to date" in lines
+
+    def test_failed_stage_is_reported(self, temp_dir, capsys):
+        """Test that a failing stage fails the build without stopping the others."""
+        write_project(str(temp_dir), PaperSpec(sections=1, figures=0))
+        builder = WebsiteBuilder(root=str(temp_dir))
+
+        with patch.object(
+            WebsiteBuilder, "_build_paper", side_effect=RuntimeError("bad paper")
+        ):
+            assert builder.build() is False
+        output = capsys.readouterr().out
+
+        assert "Stage paper failed: RuntimeError: bad paper" in output
+        assert output.strip().endswith("Build failed in paper")
+        assert (temp_dir / "docs" / "bibtex.html").exists()
+        assert "assets/style.css" in builder.manifest.entries
+
+    def test_optimize_pages(self):
+        """Test that pages are minified with their critical CSS inlined."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            builder = WebsiteBuilder(optimize=True)
+            builder.output_dir = Path(temp_dir)
+            (builder.output_dir / "assets").mkdir()
+            (builder.output_dir / "assets" / "style.css").write_text(
+                ".paper-title { color: red; }\n.figure { margin: 0; }"
+            )
+            (builder.output_dir / "index.html").write_text(
+                '<html>\n  <head>\n    <link rel="stylesheet" href="assets/style.css">'
+                '\n  </head>\n  <body>\n    <h1 class="paper-title">Title</h1>'
+                "\n  </body>\n</html>\n"
+            )
+
+            builder._optimize_pages()
 
-            # Check figures were copied
-            dst_figures = builder.output_dir / "figures"
-            assert (dst_figures / "figure1.png").exists()
-            assert (dst_figures / "figure2.jpg").exists()
+            html = (builder.output_dir / "index.html").read_text()
+            assert html.startswith("<html><head><style>.paper-title{color:red}</style>")
+            assert ".figure" not in html
+            assert '<link rel="preload" href="assets/style.css" as="style"' in html
+            assert "<body><h1" in html
 
     def test_generate_bibtex_page(self):
         """Test BibTeX page generation."""
@@ -334,6 +433,10 @@ This is a test abstract.
 \end{abstract}
 \section{Introduction}
 Test content.
+\begin{figure}
+\includegraphics{figures/test_figure.png}
+\caption{Test figure}
+\end{figure}
 \end{document}
 """
             (paper_dir / "main.tex").write_text(latex_content)
@@ -381,9 +484,10 @@ paper:
                 docs_dir = Path(temp_dir) / "docs"
                 assert docs_dir.exists()
                 assert (docs_dir / "index.html").exists()
-                assert (docs_dir / "assets" / "style.css").exists()
-                assert (docs_dir / "assets" / "theme.css").exists()
-                assert (docs_dir / "figures" / "test_figure.png").exists()
+                manifest = json.loads((docs_dir / "manifest.json").read_text())
+                assert (docs_dir / manifest["assets/style.css"]).exists()
+                assert (docs_dir / manifest["assets/theme.css"]).exists()
+                assert (docs_dir / manifest["figures/test_figure.png"]).exists()
                 assert (docs_dir / "bibtex.html").exists()
 
                 # Check HTML content
@@ -404,5 +508,55 @@ paper:
                 os.chdir(original_cwd)
 
 
+class TestBatchBuild:
+    """Test cases for building several papers at once."""
+
+    def test_builder_uses_project_root(self, temp_dir):
+        """Test that paths and the configuration are taken from the root."""
+        (temp_dir / "config.yaml").write_text("build:\n  cache_dir: .cache\n")
+
+        builder = WebsiteBuilder(root=str(temp_dir), cache_dir="/shared")
+
+        assert builder.config_path == str(temp_dir / "config.yaml")
+        assert builder.paper_dir == temp_dir / "src" / "paper"
+        assert builder.output_dir == temp_dir / "docs"
+        assert builder.cache_dir == "/shared"
+        # Previous builds are recorded per project
+        assert builder.state.path == str(temp_dir / ".cache" / "build-state.json")
+
+    def test_load_batch(self, temp_dir):
+        """Test that batch paths are relative to the batch file."""
+        (temp_dir / "papers.yaml").write_text(
+            "cache_dir: cache\npapers:\n  - one\n  - group/two\n"
+        )
+        (temp_dir / "list.yaml").write_text("- one\n")
+
+        roots, cache_dir = load_batch(str(temp_dir / "papers.yaml"))
+
+        assert roots == [str(temp_dir / "one"), str(temp_dir / "group" / "two")]
+        assert cache_dir == str(temp_dir / "cache")
+        assert load_batch(str(temp_dir / "list.yaml")) == (
+            [str(temp_dir / "one")],
+            None,
+        )
+
+    def test_failing_paper_does_not_stop_others(self, temp_dir):
+        """Test that every paper is built and failures are reported."""
+        for name in ("a", "b"):
+            write_project(str(temp_dir / name), PaperSpec(sections=2, figures=0))
+        (temp_dir / "broken" / "src" / "paper").mkdir(parents=True)
+        roots = [str(temp_dir / name) for name in ("a", "broken", "b")]
+        cache_dir = str(temp_dir / "cache")
+
+        results = build_batch(roots, jobs=2, cache_dir=cache_dir)
+
+        assert [result.ok for result in results] == [True, False, True]
+        assert results[1].error == "No main.tex file found in src/paper/"
+        assert (temp_dir / "a" / "docs" / "index.html").exists()
+        assert (temp_dir / "b" / "docs" / "index.html").exists()
+        assert os.path.isdir(os.path.join(cache_dir, "sections"))
+        assert describe_batch(results).endswith("Built 2 of 3 papers")
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
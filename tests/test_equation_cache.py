@@ -0,0 +1,111 @@
+"""Tests for the persistent equation cache."""
+
+import os
+import sys
+import threading
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from equation_cache import EquationCache
+from math_render import MathPrerenderer, normalize_tex
+
+
+class TestEquationCache:
+    """Test cases for EquationCache."""
+
+    def test_entries_persist_across_instances(self, temp_dir):
+        """Test that flushed entries are read back by a later build."""
+        path = str(temp_dir / "equations.sqlite")
+        first = EquationCache(path, "renderer 1")
+        key = first.key("x^2", display=False)
+        assert first.get(key) is None
+        first.put(key, "<math>x</math>")
+        first.close()
+
+        second = EquationCache(path, "renderer 1")
+        assert second.get(key) == "<math>x</math>"
+        assert (second.hits, second.misses) == (1, 0)
+
+    def test_cache_is_shared_between_threads(self, temp_dir):
+        """Test that a cache opened in one thread is used from another."""
+        cache = EquationCache(str(temp_dir / "equations.sqlite"), "renderer")
+        key = cache.key("x", display=False)
+        cache.put(key, "<math>x</math>")
+        cache.flush()
+
+        thread = threading.Thread(target=lambda: cache.put("y", cache.get(key)))
+        thread.start()
+        thread.join()
+        cache.close()
+
+        assert cache.hits == 1
+        assert EquationCache(cache.path, "renderer").get("y") == "<math>x</math>"
+
+    def test_key_depends_on_renderer_and_mode(self, temp_dir):
+        """Test that renderer versions and display modes do not collide."""
+        path = str(temp_dir / "equations.sqlite")
+        old = EquationCache(path, "renderer 1")
+        new = EquationCache(path, "renderer 2")
+
+        assert old.key("x", False) != new.key("x", False)
+        assert old.key("x", False) != old.key("x", True)
+
+    def test_least_recently_used_entries_are_evicted(self, temp_dir):
+        """Test that the cache is bounded and keeps recently used entries."""
+        path = str(temp_dir / "equations.sqlite")
+        cache = EquationCache(path, "renderer", max_entries=2)
+        keys = [cache.key(str(i), False) for i in range(3)]
+        cache.put(keys[0], "zero")
+        cache.put(keys[1], "one")
+        cache.flush()
+
+        cache.get(keys[0])
+        cache.put(keys[2], "two")
+        cache.flush()
+
+        assert cache.size() == 2
+        reopened = EquationCache(path, "renderer")
+        assert reopened.get(keys[1]) is None
+        assert reopened.get(keys[0]) == "zero"
+
+    def test_unusable_database_is_disabled(self, temp_dir, capsys):
+        """Test that a corrupt database only disables the cache."""
+        path = temp_dir / "equations.sqlite"
+        path.write_text("not a database")
+        cache = EquationCache(str(path), "renderer")
+
+        assert cache.get(cache.key("x", False)) is None
+        assert "disabled" in capsys.readouterr().out
+
+
+class TestCachedPrerendering:
+    """Test cases for rendering math through the equation cache."""
+
+    def test_identical_equations_render_once(self, temp_dir):
+        """Test that repeated formulas are looked up once per document."""
+        cache = EquationCache(str(temp_dir / "equations.sqlite"), "renderer")
+        renderer = MathPrerenderer(cache)
+        html = renderer.render("$a + b$ and $a  +  b$ and $a+b$")
+
+        assert renderer.converted == 3
+        assert cache.misses == 2
+        assert html.count("<math") == 3
+
+    def test_second_build_hits_cache(self, temp_dir):
+        """Test that a later build reuses rendered and failed equations."""
+        path = str(temp_dir / "equations.sqlite")
+        text = r"$x^2$ and $\left( x$"
+        first = EquationCache(path, "renderer")
+        expected = MathPrerenderer(first).render(text)
+        first.close()
+
+        second = EquationCache(path, "renderer")
+        renderer = MathPrerenderer(second)
+        assert renderer.render(text) == expected
+        assert (second.hits, second.misses) == (2, 0)
+        assert renderer.fallbacks == 1
+
+    def test_normalize_tex(self):
+        """Test that whitespace differences share a cache entry."""
+        assert normalize_tex(" a  +\n b ") == "a + b"
@@ -0,0 +1,172 @@
+"""Tests for the responsive figure pipeline."""
+
+import os
+import re
+import sys
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from figure_pipeline import PUBLISHED_FILE, process_figures
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _image(path, size=(1200, 600), format="PNG"):
+    """Write a solid colour image."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", size, (30, 120, 200)).save(path, format)
+
+
+class TestProcessFigures:
+    """Test cases for process_figures."""
+
+    def test_variants_and_srcset(self, temp_dir):
+        """Test that each width is encoded as WebP and the original format."""
+        _image(temp_dir / "paper" / "figures" / "plot.png")
+
+        figures = process_figures(
+            ["figures/plot.png"], str(temp_dir / "paper"), str(temp_dir / "docs")
+        )
+
+        image = figures["figures/plot.png"]
+        assert (image.width, image.height) == (1200, 600)
+        assert re.fullmatch(r"figures/plot-1200w\.[0-9a-f]{8}\.png", image.src)
+        assert [width for _, width in image.srcsets["image/webp"]] == [480, 960, 1200]
+        assert [width for _, width in image.srcsets["image/png"]] == [480, 960, 1200]
+        small_url = image.srcsets["image/webp"][0][0]
+        assert re.fullmatch(r"figures/plot-480w\.[0-9a-f]{8}\.webp", small_url)
+        with Image.open(temp_dir / "docs" / small_url) as small:
+            assert small.size == (480, 240)
+
+    def test_only_referenced_figures_are_published(self, temp_dir):
+        """Test that figures the paper does not use are left out."""
+        _image(temp_dir / "paper" / "figures" / "used.jpg", format="JPEG")
+        _image(temp_dir / "paper" / "figures" / "unused.png")
+
+        figures = process_figures(
+            ["figures/used"], str(temp_dir / "paper"), str(temp_dir / "docs")
+        )
+
+        assert figures["figures/used"].src.endswith(".jpg")
+        published = os.listdir(temp_dir / "docs" / "figures")
+        assert not [name for name in published if name.startswith("unused")]
+
+    def test_placeholder(self, temp_dir):
+        """Test that opaque figures get a small inline placeholder."""
+        _image(temp_dir / "opaque.png")
+        Image.new("RGBA", (200, 100)).save(temp_dir / "clear.png")
+
+        figures = process_figures(
+            ["opaque.png", "clear.png"], str(temp_dir), str(temp_dir / "docs")
+        )
+
+        placeholder = figures["opaque.png"].placeholder
+        assert placeholder.startswith("data:image/webp;base64,")
+        assert len(placeholder) < 600
+        assert figures["clear.png"].placeholder is None
+
+    def test_unchanged_figures_are_not_reencoded(self, temp_dir):
+        """Test that cached variants are reused while the source is unchanged."""
+        _image(temp_dir / "paper" / "plot.png", size=(300, 200))
+        args = (["plot.png"], str(temp_dir / "paper"), str(temp_dir / "docs"))
+        cache_dir = str(temp_dir / "cache")
+
+        first = process_figures(*args, cache_dir=cache_dir)["plot.png"]
+        cached = os.listdir(temp_dir / "cache" / "figures")
+        encoded = os.stat(temp_dir / "docs" / first.src).st_mtime_ns
+        again = process_figures(*args, cache_dir=cache_dir)["plot.png"]
+
+        assert again == first
+        assert os.listdir(temp_dir / "cache" / "figures") == cached
+        assert os.stat(temp_dir / "docs" / first.src).st_mtime_ns == encoded
+
+        _image(temp_dir / "paper" / "plot.png", size=(320, 200))
+        changed = process_figures(*args, cache_dir=cache_dir)["plot.png"]
+
+        assert len(os.listdir(temp_dir / "cache" / "figures")) == 2
+        assert changed.width == 320
+        assert changed.src != first.src
+        # Variants of the previous version are no longer published
+        assert sorted(os.listdir(temp_dir / "docs" / "figures")) == sorted(
+            [PUBLISHED_FILE]
+            + [
+                os.path.basename(url)
+                for variants in changed.srcsets.values()
+                for url, _ in variants
+            ]
+        )
+
+    def test_parallel_matches_serial(self, temp_dir):
+        """Test that encoding in worker processes gives the same figures."""
+        for name in ("a.png", "b.png", "c.png"):
+            _image(temp_dir / "paper" / name, size=(600, 300))
+        paths = ["a.png", "b.png", "c.png"]
+
+        serial = process_figures(paths, str(temp_dir / "paper"), str(temp_dir / "s"))
+        parallel = process_figures(
+            paths, str(temp_dir / "paper"), str(temp_dir / "p"), jobs=2
+        )
+
+        assert parallel == serial
+
+    def test_unreadable_figure_is_copied(self, temp_dir):
+        """Test that files Pillow cannot resize are published unchanged."""
+        (temp_dir / "paper").mkdir()
+        (temp_dir / "paper" / "diagram.pdf").write_bytes(b"%PDF-1.4")
+
+        figures = process_figures(
+            ["diagram"], str(temp_dir / "paper"), str(temp_dir / "docs")
+        )
+
+        src = figures["diagram"].src
+        assert re.fullmatch(r"figures/diagram\.[0-9a-f]{8}\.pdf", src)
+        assert figures["diagram"].srcsets == {}
+        assert (temp_dir / "docs" / src).read_bytes() == b"%PDF-1.4"
+
+    def test_copied_figure_keeps_dimensions(self, temp_dir):
+        """Test that figures published as they are still report their size."""
+        Image.new("P", (40, 30)).save(temp_dir / "anim.gif")
+
+        figures = process_figures(["anim.gif"], str(temp_dir), str(temp_dir / "d"))
+
+        assert (figures["anim.gif"].width, figures["anim.gif"].height) == (40, 30)
+
+    def test_figures_stay_in_the_figures_directory(self, temp_dir):
+        """Test that figures from outside the paper are published below docs."""
+        _image(temp_dir / "common" / "plot.png", size=(300, 200))
+        (temp_dir / "paper").mkdir()
+
+        figures = process_figures(
+            ["../common/plot.png"], str(temp_dir / "paper"), str(temp_dir / "docs")
+        )
+
+        src = figures["../common/plot.png"].src
+        assert re.fullmatch(r"figures/common/plot-300w\.[0-9a-f]{8}\.png", src)
+        assert (temp_dir / "docs" / src).is_file()
+        assert os.listdir(temp_dir / "common") == ["plot.png"]
+
+    def test_only_previously_published_files_are_removed(self, temp_dir):
+        """Test that files the pipeline did not publish are never removed."""
+        _image(temp_dir / "paper" / "plot.png", size=(300, 200))
+        for name in ("CNAME", "bibtex.html", "figures/notes.txt"):
+            (temp_dir / "docs" / name).parent.mkdir(parents=True, exist_ok=True)
+            (temp_dir / "docs" / name).write_text(name)
+        args = (["plot.png"], str(temp_dir / "paper"), str(temp_dir / "docs"))
+
+        first = process_figures(*args)["plot.png"]
+        _image(temp_dir / "paper" / "plot.png", size=(320, 200))
+        changed = process_figures(*args)["plot.png"]
+
+        assert not (temp_dir / "docs" / first.src).exists()
+        assert (temp_dir / "docs" / changed.src).is_file()
+        for name in ("CNAME", "bibtex.html", "figures/notes.txt"):
+            assert (temp_dir / "docs" / name).read_text() == name
+
+    def test_missing_figure_is_skipped(self, temp_dir):
+        """Test that a missing figure does not stop the build."""
+        figures = process_figures(["missing.png"], str(temp_dir), str(temp_dir))
+
+        assert figures == {}
@@ -0,0 +1,153 @@
+"""Tests for incremental directory sync."""
+
+import os
+import sys
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import file_sync
+from file_sync import copy_file, sync_tree
+
+
+def _tree(root):
+    """Return the files below root with their content."""
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+class TestSyncTree:
+    """Test cases for sync_tree."""
+
+    def test_initial_sync_copies_everything(self, temp_dir):
+        """Test that a new destination receives every file."""
+        src = temp_dir / "src"
+        (src / "sub").mkdir(parents=True)
+        (src / "a.css").write_text("a")
+        (src / "sub" / "b.png").write_bytes(b"\x89PNG")
+
+        stats = sync_tree(src, temp_dir / "dst")
+
+        assert (stats.copied, stats.unchanged, stats.removed) == (2, 0, 0)
+        assert _tree(temp_dir / "dst") == _tree(src)
+
+    def test_unchanged_tree_is_not_copied(self, temp_dir):
+        """Test that a second sync leaves identical files alone."""
+        src = temp_dir / "src"
+        src.mkdir()
+        (src / "a.css").write_text("a")
+        sync_tree(src, temp_dir / "dst")
+        inode = os.stat(temp_dir / "dst" / "a.css").st_ino
+
+        stats = sync_tree(src, temp_dir / "dst")
+
+        assert (stats.copied, stats.unchanged, stats.removed) == (0, 1, 0)
+        assert os.stat(temp_dir / "dst" / "a.css").st_ino == inode
+
+    def test_changed_and_stale_files(self, temp_dir):
+        """Test that changed files are recopied and stale ones removed."""
+        src = temp_dir / "src"
+        dst = temp_dir / "dst"
+        src.mkdir()
+        (src / "keep.css").write_text("keep")
+        (src / "change.css").write_text("old")
+        (src / "old").mkdir()
+        (src / "old" / "gone.png").write_text("gone")
+        sync_tree(src, dst)
+
+        (src / "change.css").write_text("new content")
+        (src / "old" / "gone.png").unlink()
+        (src / "old").rmdir()
+        stats = sync_tree(src, dst)
+
+        assert (stats.copied, stats.unchanged, stats.removed) == (1, 1, 1)
+        assert _tree(dst) == _tree(src)
+
+    def test_same_content_with_new_mtime(self, temp_dir):
+        """Test that files with equal content are only re-timestamped."""
+        src = temp_dir / "src"
+        dst = temp_dir / "dst"
+        src.mkdir()
+        (src / "a.css").write_text("same")
+        sync_tree(src, dst)
+        os.utime(src / "a.css", ns=(1, 1))
+
+        stats = sync_tree(src, dst)
+
+        assert stats.unchanged == 1
+        assert os.stat(dst / "a.css").st_mtime_ns == 1
+
+    def test_hardlinks(self, temp_dir):
+        """Test that files can be linked instead of copied."""
+        src = temp_dir / "src"
+        src.mkdir()
+        (src / "big.png").write_bytes(b"data")
+
+        sync_tree(src, temp_dir / "dst", hardlink=True)
+
+        assert os.path.samefile(src / "big.png", temp_dir / "dst" / "big.png")
+
+    def test_rename(self, temp_dir):
+        """Test that files can be published under other names."""
+        src = temp_dir / "src"
+        src.mkdir()
+        (src / "a.css").write_text("a")
+        (temp_dir / "dst").mkdir()
+        (temp_dir / "dst" / "a.old.css").write_text("old")
+
+        def rename(path):
+            return os.path.basename(path).replace(".css", ".new.css")
+
+        stats = sync_tree(src, temp_dir / "dst", rename=rename)
+
+        assert os.listdir(temp_dir / "dst") == ["a.new.css"]
+        assert (stats.copied, stats.removed) == (1, 1)
+        assert sync_tree(src, temp_dir / "dst", rename=rename).unchanged == 1
+
+
+class TestCopyFile:
+    """Test cases for copy_file."""
+
+    def test_copy_keeps_metadata(self, temp_dir):
+        """Test that copies keep content, mode and mtime."""
+        src = temp_dir / "a.bin"
+        src.write_bytes(os.urandom(3 * 1024 * 1024))
+        os.chmod(src, 0o640)
+        os.utime(src, ns=(10**9, 2 * 10**9))
+
+        copy_file(str(src), str(temp_dir / "b.bin"))
+
+        copy = os.stat(temp_dir / "b.bin")
+        assert (temp_dir / "b.bin").read_bytes() == src.read_bytes()
+        assert copy.st_mtime_ns == 2 * 10**9
+        assert copy.st_mode & 0o777 == 0o640
+        assert set(os.listdir(temp_dir)) == {"a.bin", "b.bin"}
+
+    @pytest.mark.skipif(
+        not hasattr(os, "copy_file_range"), reason="needs os.copy_file_range"
+    )
+    def test_short_copy_is_completed(self, temp_dir, monkeypatch):
+        """Test that a copy_file_range stopping early does not truncate the copy."""
+        copy_file_range = os.copy_file_range
+        calls = []
+
+        def stop_after_one_block(src, dst, count):
+            calls.append(count)
+            return copy_file_range(src, dst, min(count, 4096)) if len(calls) == 1 else 0
+
+        monkeypatch.setattr(file_sync, "fcntl", None)
+        monkeypatch.setattr(os, "copy_file_range", stop_after_one_block)
+        src = temp_dir / "a.bin"
+        src.write_bytes(os.urandom(64 * 1024))
+
+        copy_file(str(src), str(temp_dir / "b.bin"))
+
+        assert len(calls) == 2
+        assert (temp_dir / "b.bin").read_bytes() == src.read_bytes()
@@ -0,0 +1,79 @@
+"""Tests for watching the sources for changes."""
+
+import os
+import sys
+import threading
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from file_watch import InotifyWatcher, PollingWatcher, create_watcher, wait_for_changes
+
+
+def _watchers():
+    """Return the watcher classes that work on this system."""
+    watchers = [lambda paths: PollingWatcher(paths, interval=0.01)]
+    if sys.platform.startswith("linux"):
+        watchers.append(InotifyWatcher)
+    return watchers
+
+
+@pytest.mark.parametrize("make_watcher", _watchers())
+class TestWatchers:
+    """Test cases shared by the inotify and polling watchers."""
+
+    def test_changed_file_is_reported(self, temp_dir, make_watcher):
+        """Test that edits, new files and watched single files are reported."""
+        (temp_dir / "paper" / "sections").mkdir(parents=True)
+        (temp_dir / "paper" / "main.tex").write_text("a")
+        (temp_dir / "config.yaml").write_text("a: 1")
+        (temp_dir / "other.txt").write_text("x")
+        watcher = make_watcher([str(temp_dir / "paper"), str(temp_dir / "config.yaml")])
+        try:
+            assert watcher.wait(0.05) == set()
+
+            (temp_dir / "paper" / "sections" / "intro.tex").write_text("b")
+            (temp_dir / "other.txt").write_text("y")
+            assert wait_for_changes(watcher) == [
+                str(temp_dir / "paper" / "sections" / "intro.tex")
+            ]
+
+            (temp_dir / "config.yaml").write_text("a: 2")
+            assert wait_for_changes(watcher) == [str(temp_dir / "config.yaml")]
+        finally:
+            watcher.close()
+
+    def test_editor_files_are_ignored(self, temp_dir, make_watcher):
+        """Test that swap and backup files do not trigger rebuilds."""
+        watcher = make_watcher([str(temp_dir)])
+        try:
+            (temp_dir / ".main.tex.swp").write_text("swap")
+            (temp_dir / "main.tex~").write_text("backup")
+
+            assert watcher.wait(0.1) == set()
+        finally:
+            watcher.close()
+
+
+class TestWaitForChanges:
+    """Test cases for wait_for_changes."""
+
+    def test_burst_of_changes_is_one_rebuild(self, temp_dir):
+        """Test that changes arriving close together are returned together."""
+        watcher = create_watcher([str(temp_dir)])
+
+        def edit():
+            for name in ("a.tex", "b.tex", "c.tex"):
+                (temp_dir / name).write_text(name)
+
+        timer = threading.Timer(0.05, edit)
+        timer.start()
+        try:
+            changed = wait_for_changes(watcher, debounce=0.3)
+        finally:
+            timer.join()
+            watcher.close()
+
+        assert changed == [str(temp_dir / name) for name in ("a.tex", "b.tex", "c.tex")]
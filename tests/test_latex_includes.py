@@ -0,0 +1,88 @@
+"""Tests for resolving included LaTeX files."""
+
+import os
+import sys
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from latex_includes import IncludeGraph
+
+
+@pytest.fixture
+def paper_dir(temp_dir):
+    """Create a main document that includes section files."""
+    (temp_dir / "sections").mkdir()
+    (temp_dir / "main.tex").write_text(
+        "\\begin{document}\n"
+        "\\input{sections/intro}\n"
+        "\\include{sections/method}\n"
+        "% \\input{sections/draft}\n"
+        "\\end{document}\n"
+    )
+    (temp_dir / "sections" / "intro.tex").write_text(
+        "\\section{Intro}Intro text. \\input{sections/detail}"
+    )
+    (temp_dir / "sections" / "method.tex").write_text("\\section{Method}Method.")
+    (temp_dir / "sections" / "detail.tex").write_text("Detail.")
+    return temp_dir
+
+
+class TestIncludeGraph:
+    """Test cases for IncludeGraph."""
+
+    def test_resolve_nested_includes(self, paper_dir):
+        """Test that includes are spliced in recursively."""
+        content = IncludeGraph().resolve(str(paper_dir / "main.tex"))
+
+        assert "\\section{Intro}Intro text. Detail.\n" in content
+        assert "\\section{Method}Method.\n" in content
+        assert "% \\input{sections/draft}" in content
+
+    def test_rebuild_reads_only_changed_files(self, paper_dir):
+        """Test that a rebuild re-reads only files that changed."""
+        graph = IncludeGraph()
+        main_file = str(paper_dir / "main.tex")
+        graph.resolve(main_file)
+        assert graph.reads == 4
+
+        method = paper_dir / "sections" / "method.tex"
+        method.write_text("\\section{Method}Changed method.")
+        os.utime(method, ns=(1, 1))
+        content = graph.resolve(main_file)
+
+        assert graph.reads == 5
+        assert "Changed method." in content
+
+    def test_dependencies(self, paper_dir):
+        """Test that every reachable file is listed with its hash."""
+        graph = IncludeGraph()
+        graph.resolve(str(paper_dir / "main.tex"))
+
+        names = {os.path.basename(path) for path in graph.dependencies()}
+        assert names == {"main.tex", "intro.tex", "method.tex", "detail.tex"}
+
+    def test_subfile_body(self, temp_dir):
+        """Test that only the document body of a subfile is included."""
+        (temp_dir / "main.tex").write_text("A \\subfile{part} B")
+        (temp_dir / "part.tex").write_text(
+            "\\documentclass[main]{subfiles}\n\\begin{document}Part\\end{document}"
+        )
+        assert IncludeGraph().resolve(str(temp_dir / "main.tex")) == "A Part B"
+
+    def test_missing_and_circular_includes(self, temp_dir, capsys):
+        """Test that missing and circular includes are skipped."""
+        (temp_dir / "main.tex").write_text("\\input{a}\\input{missing}")
+        (temp_dir / "a.tex").write_text("a\\input{main}")
+
+        assert IncludeGraph().resolve(str(temp_dir / "main.tex")) == "a"
+        output = capsys.readouterr().out
+        assert "circular" in output
+        assert "not found" in output
+
+    def test_missing_main_file(self, temp_dir):
+        """Test that a missing main document raises an error."""
+        with pytest.raises(FileNotFoundError):
+            IncludeGraph().resolve(str(temp_dir / "missing.tex"))
@@ -0,0 +1,188 @@
+"""Tests for the single-pass LaTeX lexer."""
+
+import os
+import sys
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from latex_lexer import (
+    LatexLexer,
+    Segment,
+    find_environment_end,
+    read_group,
+    segment_content,
+    split_items,
+    split_paragraphs,
+)
+
+
+@pytest.fixture
+def lexer():
+    """Create a lexer that renders citations as their keys."""
+    return LatexLexer(lambda key: f"[{key}]")
+
+
+class TestLatexLexer:
+    """Test cases for LatexLexer."""
+
+    def test_formatting_commands(self, lexer):
+        """Test conversion of text formatting commands."""
+        html = lexer.render(r"\textbf{bold} \textit{it} \emph{em} \texttt{tt}")
+        assert html == "<strong>bold</strong> <em>it</em> <em>em</em> <code>tt</code>"
+
+    def test_nested_formatting(self, lexer):
+        """Test that nested braces are matched correctly."""
+        html = lexer.render(r"\textbf{a \textit{b} c}")
+        assert html == "<strong>a <em>b</em> c</strong>"
+
+    def test_citations_use_callback(self):
+        """Test that citations are rendered through the callback in order."""
+        seen = []
+
+        def cite(key):
+            seen.append(key)
+            return f"[{len(seen)}]"
+
+        html = LatexLexer(cite).render(r"See \cite{a} and \cite{b}.")
+        assert html == "See [1] and [2]."
+        assert seen == ["a", "b"]
+
+    def test_dropped_figure_still_numbers_citations(self):
+        """Test that citations inside removed figures are still numbered."""
+        seen = []
+        lexer = LatexLexer(lambda key: seen.append(key) or "")
+        html = lexer.render(
+            r"Text \begin{figure}\caption{From \cite{x}}\end{figure} end"
+        )
+        assert html == "Text end"
+        assert seen == ["x"]
+
+    def test_equation_environments(self, lexer):
+        """Test conversion of equation and align environments."""
+        html = lexer.render(
+            r"\begin{equation}E = mc^2\label{eq:e}\end{equation}"
+            r"\begin{align}a &= b \\ c &= d\end{align}"
+        )
+        assert html == ("$$E = mc^2$$$$\\begin{align}a &= b \\\\ c &= d\\end{align}$$")
+
+    def test_line_breaks_outside_math(self, lexer):
+        """Test that \\\\ becomes a newline only outside display math."""
+        html = lexer.render(r"one\\two $$a \\ b$$")
+        assert html == "one\ntwo $$a \\\\ b$$"
+
+    def test_unclosed_display_math(self, lexer):
+        """Test that an unclosed $$ does not swallow line breaks."""
+        assert lexer.render(r"$$a \\ b") == "$$a \n b"
+
+    def test_lists(self, lexer):
+        """Test conversion of itemize and enumerate environments."""
+        html = lexer.render(
+            "\\begin{itemize}\n\\item First\n\\item Second\n\\end{itemize}"
+            "\\begin{enumerate}\\item One\\end{enumerate}"
+        )
+        assert html == "<ul><li>First</li><li>Second</li></ul><ol><li>One</li></ol>"
+
+    def test_nested_lists(self, lexer):
+        """Test that nested lists stay inside their parent item."""
+        html = lexer.render(
+            r"\begin{itemize}\item Outer \begin{enumerate}\item Inner"
+            r"\end{enumerate}\item Last\end{itemize}"
+        )
+        assert html == ("<ul><li>Outer <ol><li>Inner</li></ol></li><li>Last</li></ul>")
+
+    def test_references(self, lexer):
+        """Test that references render as their labels."""
+        assert lexer.render(r"Figure~\ref{fig:a} and \ref{eq:b}") == (
+            "Figure fig:a and eq:b"
+        )
+
+    def test_only_figure_references_lose_their_tie(self, lexer):
+        """Test that ties before other references are kept, as before."""
+        assert lexer.render(r"Eq.~\ref{x} and Section~\ref{y}") == (
+            "Eq.~x and Section~y"
+        )
+
+    def test_removed_commands(self, lexer):
+        """Test removal of structural and figure commands."""
+        html = lexer.render(
+            r"\section*{Title}Text\centering\bibliographystyle{plain}"
+            r"\bibliography{refs}\end{document}"
+        )
+        assert html == "Text"
+
+    def test_spacing_and_whitespace(self, lexer):
+        """Test spacing macros and whitespace normalization."""
+        assert lexer.render(r"a\,b\;c\quad d\qquad e 50\%") == "a b c d e 50%"
+        assert lexer.render("a\n\n\n\nb   c") == "a\n\nb c"
+
+    def test_unknown_commands_are_kept(self, lexer):
+        """Test that unknown commands pass through unchanged."""
+        assert lexer.render(r"$\alpha + \beta$") == r"$\alpha + \beta$"
+        assert lexer.render(r"\quadrant") == r"\quadrant"
+
+
+class TestLexerHelpers:
+    """Test cases for the lexer helper functions."""
+
+    def test_read_group(self):
+        """Test reading balanced brace groups."""
+        assert read_group("{a{b}c}d", 0) == ("a{b}c", 7)
+        assert read_group(r"{a\}b}", 0) == (r"a\}b", 6)
+        assert read_group("{open", 0) is None
+        assert read_group("x", 0) is None
+
+    def test_find_environment_end(self):
+        """Test finding the end of nested environments."""
+        text = r"\begin{x}a\begin{x}b\end{x}c\end{x}d"
+        body_end, after = find_environment_end(text, len(r"\begin{x}"), "x")
+        assert text[after:] == "d"
+        assert text[len(r"\begin{x}") : body_end] == r"a\begin{x}b\end{x}c"
+
+    def test_split_items(self):
+        """Test splitting list bodies at top-level items."""
+        chunks = split_items(
+            r"\item a \begin{itemize}\item b\end{itemize}\item c\itemsep"
+        )
+        assert chunks == ["", r"a \begin{itemize}\item b\end{itemize}", r"c\itemsep"]
+
+
+class TestSegmentation:
+    """Test cases for content segmentation and paragraph splitting."""
+
+    def test_segment_content(self):
+        """Test splitting content into text, math and list segments."""
+        segments = segment_content("Intro $$a$$ mid <ul><li>x $$b$$</li></ul> end")
+        assert segments == [
+            Segment("text", "Intro "),
+            Segment("math", "$$a$$"),
+            Segment("text", " mid "),
+            Segment("list", "<ul><li>x $$b$$</li></ul>"),
+            Segment("text", " end"),
+        ]
+
+    def test_segment_nested_lists(self):
+        """Test that nested lists form a single segment."""
+        content = "<ul><li>a<ol><li>b</li></ol></li></ul>"
+        assert segment_content(content) == [Segment("list", content)]
+
+    def test_unclosed_blocks_are_text(self):
+        """Test that unclosed math blocks and lists stay as text."""
+        assert segment_content("a $$b") == [Segment("text", "a $$b")]
+        assert segment_content("a <ul><li>b") == [Segment("text", "a <ul><li>b")]
+
+    def test_split_paragraphs(self):
+        """Test that blank lines inside math blocks do not split paragraphs."""
+        content = "First\n\nSecond $$a\n\nb$$ still second\n  \n$$c$$"
+        assert split_paragraphs(content) == [
+            "First",
+            "Second $$a\n\nb$$ still second",
+            "$$c$$",
+        ]
+
+    def test_split_paragraphs_many_math_blocks(self):
+        """Test that every math block is kept with its own paragraph."""
+        content = "\n\n".join(f"$$x_{{{i}}}$$" for i in range(12))
+        assert split_paragraphs(content) == [f"$$x_{{{i}}}$$" for i in range(12)]
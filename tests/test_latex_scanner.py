@@ -0,0 +1,94 @@
+"""Tests for single-scan document extraction."""
+
+import os
+import sys
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from latex_scanner import scan_document
+
+
+class TestScanDocument:
+    """Test cases for scan_document."""
+
+    def test_scan_sample_document(self, sample_latex_content):
+        """Test extracting every component of a document in one pass."""
+        scan = scan_document(sample_latex_content)
+
+        assert scan.title == "Sample Research Paper"
+        assert scan.author.startswith("John Doe")
+        assert "sample abstract" in scan.abstract
+        assert [section.title for section in scan.sections] == [
+            "Introduction",
+            "Methodology",
+            "Results",
+            "Conclusion",
+        ]
+        assert scan.figures == [
+            {
+                "path": "figures/result.png",
+                "caption": "Main result showing the experimental findings.",
+                "label": "fig:result",
+            }
+        ]
+        assert scan.equations == [
+            {"content": "E = mc^2\n\\label{eq:einstein}", "type": "equation"}
+        ]
+        assert scan.labels == {
+            "eq:einstein": ("equation", 0),
+            "fig:result": ("figure", 0),
+        }
+
+    def test_section_boundaries(self):
+        """Test that each section ends where the next heading starts."""
+        content = r"\section{A}first\subsection{B}second"
+        scan = scan_document(content)
+
+        spans = [(s.level, content[s.start : s.end]) for s in scan.sections]
+        assert spans == [("section", "first"), ("subsection", "second")]
+
+    def test_figure_spans(self):
+        """Test that figure environments are located with their citations."""
+        content = (
+            r"\section{A}Text"
+            r"\begin{figure}\caption{See \cite{ref1}}\end{figure}"
+            r"\begin{figure}\includegraphics{a.png}\label{fig:a}\end{figure}"
+        )
+        scan = scan_document(content)
+
+        assert len(scan.figure_spans) == 2
+        first, second = scan.figure_spans
+        assert content[first.start : first.end].startswith(r"\begin{figure}")
+        assert first.citations == ["ref1"]
+        assert first.figure is None
+        assert second.figure == 0
+        assert scan.figures[0]["path"] == "a.png"
+        assert scan.labels["fig:a"] == ("figure", 0)
+
+    def test_nested_braces_in_title(self):
+        """Test that titles with nested braces are read completely."""
+        scan = scan_document(r"\title{A \textbf{Bold} Title}")
+        assert scan.title == r"A \textbf{Bold} Title"
+
+    def test_nested_braces_in_caption(self):
+        """Test that captions with nested braces are read completely."""
+        scan = scan_document(
+            r"\begin{figure}\includegraphics{a.png}"
+            r"\caption[Short]{A \emph{bold} claim \cite{x}}\end{figure}"
+        )
+        assert scan.figures[0]["caption"] == r"A \emph{bold} claim \cite{x}"
+
+    def test_section_labels(self):
+        """Test that labels outside environments point at their section."""
+        scan = scan_document(r"\section{A}\section{B}\label{sec:b}")
+        assert scan.labels == {"sec:b": ("section", 1)}
+
+    def test_empty_document(self):
+        """Test scanning a document without any structure."""
+        scan = scan_document("Just text")
+
+        assert scan.title is None
+        assert scan.abstract is None
+        assert scan.sections == []
+        assert scan.figures == []
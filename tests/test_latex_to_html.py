@@ -3,6 +3,7 @@
 import os
 import sys
 import tempfile
+import threading
 from unittest.mock import mock_open, patch
 
 import pytest
@@ -10,9 +11,12 @@ import pytest
 # Add scripts directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
 
-from latex_to_html import LatexToHtmlConverter
+from build_profile import Profiler
+from figure_pipeline import FigureImage
+from latex_to_html import LatexToHtmlConverter, write_atomic
 
 
+@pytest.mark.usefixtures("project_dir")
 class TestLatexToHtmlConverter:
     """Test cases for LatexToHtmlConverter."""
 
@@ -176,6 +180,77 @@ This is the introduction.
         assert "Test Paper" in head
         assert "mathjax" in head
 
+    def test_generate_html_head_prerender(self):
+        """Test that prerendered pages load KaTeX only for fallback spans."""
+        converter = LatexToHtmlConverter()
+        converter.config["website"]["math_renderer"] = "prerender"
+
+        head = converter._generate_html_head({"title": "Test Paper"})
+        assert "katex" not in head
+
+        head = converter._generate_html_head(
+            {"title": "Test Paper", "math_fallback": True}
+        )
+        assert "katex.min.js" in head
+        assert ".math-fallback" in head
+
+    def test_generate_html_head_page_meta(self):
+        """Test that the head describes the page for search and link previews."""
+        converter = LatexToHtmlConverter()
+        converter.config["paper"] = {"keywords": ["space", "navigation"]}
+        converter.config["pages"] = {"custom_domain": "paper.example.org"}
+        converter.config["website"]["syntax_highlighting"] = True
+
+        head = converter._generate_html_head(
+            {"title": "Test Paper", "abstract": 'A "quoted" abstract.'}
+        )
+
+        assert '<meta name="keywords" content="space, navigation">' in head
+        assert 'content="A &#34;quoted&#34; abstract."' in head
+        assert '<meta property="og:url" content="https://paper.example.org">' in head
+        assert "highlight.min.js" in head
+        assert "favicon.ico" in head
+        assert "font-awesome" in head
+
+    def test_prerender_math(self):
+        """Test that section math is converted to MathML at build time."""
+        converter = LatexToHtmlConverter()
+        converter.config["website"]["math_renderer"] = "prerender"
+
+        parsed = converter._parse_latex(
+            r"\section{A}Inline $x^2$ and"
+            "\n\n"
+            r"\begin{equation}E = mc^2\end{equation}"
+        )
+        content = parsed["sections"][0]["content"]
+
+        assert "$" not in content
+        assert '<math xmlns="http://www.w3.org/1998/Math/MathML" display="inline">' in (
+            content
+        )
+        assert parsed["math_fallback"] is False
+        html = converter._generate_content(parsed)
+        assert (
+            '<p><math xmlns="http://www.w3.org/1998/Math/MathML" display="block">'
+            not in (html)
+        )
+
+    def test_prerender_math_in_captions(self):
+        """Test that figure captions are converted to MathML too."""
+        converter = LatexToHtmlConverter()
+        converter.section_cache = None
+        converter.config["website"]["math_renderer"] = "prerender"
+
+        page = converter.convert_text(
+            r"\section{A}\begin{figure}\includegraphics{a.png}"
+            r"\caption{Voltage $\Delta V$ over time}\end{figure}"
+        )
+
+        assert "$" not in page
+        assert 'alt="Voltage \u0394V over time"' in page
+        assert "Figure 1: Voltage <math" in page
+        assert "katex" not in page
+
     def test_generate_header(self):
         """Test header generation."""
         converter = LatexToHtmlConverter()
@@ -268,6 +343,7 @@ This is the introduction.
                 assert "Test abstract." in content
 
 
+@pytest.mark.usefixtures("project_dir")
 class TestLatexToHtmlIntegration:
     """Integration tests for LaTeX to HTML conversion."""
 
@@ -361,5 +437,199 @@ This is the conclusion.
                 assert "katex" in html_content or "mathjax" in html_content
 
 
+@pytest.mark.usefixtures("project_dir")
+class TestFigureRendering:
+    """Test cases for rendering figures into the page."""
+
+    def test_figures_are_rendered_in_place(self):
+        """Test that figures with an image become numbered figure blocks."""
+        converter = LatexToHtmlConverter()
+        converter.section_cache = None
+
+        parsed = converter._parse_latex(
+            r"\section{A}Before."
+            "\n"
+            r"\begin{figure}\includegraphics{a.png}\caption{First \cite{x}}"
+            r"\label{fig:a}\end{figure}"
+            r"\section{B}\begin{figure}\includegraphics{b.png}\end{figure}After."
+        )
+        html = converter._generate_content(parsed)
+
+        assert "<p>Before.</p>" in html
+        assert '<figure class="figure" id="fig:a">' in html
+        assert '<img src="a.png" alt="First [1]">' in html
+        assert '<img src="b.png" alt="" loading="lazy" decoding="async">' in html
+        assert "Figure 1: First" in html
+        assert "Figure 2: " in html
+        assert html.index('src="a.png"') < html.index('src="b.png"')
+        assert "\x02" not in html
+
+    def test_figure_reserves_its_space(self):
+        """Test that processed figures carry their size and placeholder."""
+        converter = LatexToHtmlConverter()
+        converter.figure_images["a.png"] = FigureImage(
+            "a-800w.png",
+            800,
+            600,
+            {"image/webp": [("a-800w.webp", 800)], "image/png": [("a-800w.png", 800)]},
+            "data:image/webp;base64,AAAA",
+        )
+
+        html = converter._generate_figure({"path": "a.png", "caption": "A"}, 2)
+
+        assert '<source type="image/webp" srcset="a-800w.webp 800w"' in html
+        assert 'width="800" height="600" alt="A" loading="lazy"' in html
+        assert "url(data:image/webp;base64,AAAA)" in html
+
+
+@pytest.mark.usefixtures("project_dir")
+class TestParallelConversion:
+    """Test cases for converting sections in worker processes."""
+
+    def test_parallel_output_matches_serial(self):
+        """Test that a parallel run produces the same sections and citations."""
+        latex_content = "".join(
+            rf"\section{{Part {i}}}Text \cite{{key{i % 3}}} and \cite{{new{i}}}."
+            rf"\begin{{figure}}\caption{{From \cite{{fig{i}}}}}\end{{figure}}"
+            for i in range(6)
+        )
+
+        results = []
+        for jobs in (1, 2):
+            converter = LatexToHtmlConverter(jobs=jobs)
+            converter.section_cache = None
+            sections = converter._extract_sections(latex_content)
+            results.append((sections, converter.citation_map))
+
+        assert results[0] == results[1]
+        assert list(results[1][1])[:4] == ["key0", "new0", "fig0", "key1"]
+
+    def test_sections_are_profiled(self):
+        """Test that sections converted in workers are timed by their title."""
+        latex_content = "".join(rf"\section{{Part {i}}}Text {i}." for i in range(3))
+        profiler = Profiler()
+        converter = LatexToHtmlConverter(jobs=2, profiler=profiler)
+        converter.section_cache = None
+
+        converter._extract_sections(latex_content)
+
+        spans = [event for event in profiler.events if event["cat"] == "section"]
+        assert [span["name"] for span in spans] == [
+            "section Part 0",
+            "section Part 1",
+            "section Part 2",
+        ]
+        assert all(span["tid"] != threading.get_native_id() for span in spans)
+
+    def test_memory_profiling_renders_sections_here(self):
+        """Test that sections are traced in this process when memory is profiled."""
+        latex_content = "".join(rf"\section{{Part {i}}}Text {i}." for i in range(3))
+        profiler = Profiler(memory=True)
+        converter = LatexToHtmlConverter(jobs=2, profiler=profiler)
+        converter.section_cache = None
+
+        try:
+            sections = converter._extract_sections(latex_content)
+        finally:
+            profiler.close()
+
+        assert [section["content"] for section in sections] == [
+            "Text 0.",
+            "Text 1.",
+            "Text 2.",
+        ]
+        assert [stats["name"] for stats in profiler.memory_stats] == [
+            "section Part 0",
+            "section Part 1",
+            "section Part 2",
+        ]
+
+
+@pytest.mark.usefixtures("project_dir")
+class TestConvertText:
+    """Test cases for converting LaTeX source held in memory."""
+
+    def test_threads_number_citations_separately(self):
+        """Test that documents converted at the same time keep their numbering."""
+        converter = LatexToHtmlConverter()
+        converter.section_cache = None
+        barrier = threading.Barrier(4)
+        pages = {}
+
+        def convert(i):
+            barrier.wait()
+            source = (
+                rf"\section{{Part {i}}}\cite{{own{i}}} and \cite{{shared}}."
+                rf"\section{{More}}Again \cite{{shared}} and \cite{{last{i}}}."
+            )
+            pages[i] = converter.convert_text(source)
+
+        threads = [threading.Thread(target=convert, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for page in pages.values():
+            assert page.count(">[2]</span>") == 2
+            assert page.count(">[3]</span>") == 1
+            assert ">[4]</span>" not in page
+        assert converter.citation_map == {}
+
+
+@pytest.mark.usefixtures("project_dir")
+class TestStreamingOutput:
+    """Test cases for streaming the HTML page to disk."""
+
+    def test_write_atomic(self, temp_dir):
+        """Test that chunks are written to the target file."""
+        path = temp_dir / "index.html"
+        write_atomic(str(path), iter(["<html>", "</html>"]))
+
+        assert path.read_text() == "<html></html>"
+        assert os.listdir(temp_dir) == ["index.html"]
+
+    def test_failed_build_keeps_previous_page(self, temp_dir):
+        """Test that a failure mid-stream leaves the old page in place."""
+        path = temp_dir / "index.html"
+        path.write_text("old page")
+
+        def chunks():
+            yield "<html>"
+            raise RuntimeError("build failed")
+
+        with pytest.raises(RuntimeError):
+            write_atomic(str(path), chunks())
+
+        assert path.read_text() == "old page"
+        assert os.listdir(temp_dir) == ["index.html"]
+
+    def test_streamed_page_matches_joined_page(self, temp_dir, sample_latex_content):
+        """Test that the streamed file matches the page built in memory."""
+        input_file = temp_dir / "paper.tex"
+        input_file.write_text(sample_latex_content)
+
+        converter = LatexToHtmlConverter()
+        output_file = converter.convert_file(str(input_file), str(temp_dir / "out"))
+        expected = converter._convert_to_html(
+            converter._parse_latex(sample_latex_content)
+        )
+
+        with open(output_file, "r", encoding="utf-8") as f:
+            assert f.read() == expected
+
+    def test_template_rendering_is_timed(self, temp_dir, sample_latex_content):
+        """Test that rendering the page templates is reported as its own stage."""
+        input_file = temp_dir / "paper.tex"
+        input_file.write_text(sample_latex_content)
+
+        converter = LatexToHtmlConverter()
+        converter.convert_file(str(input_file), str(temp_dir / "out"))
+
+        assert list(converter.timings) == ["parse", "figures", "templates"]
+        assert converter.timings["templates"] > 0
+        assert "templates" in converter.describe_timings()
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
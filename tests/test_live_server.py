@@ -0,0 +1,66 @@
+"""Tests for the live-reload preview server."""
+
+import http.client
+import os
+import sys
+import urllib.request
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from live_server import RELOAD_PATH, LiveReloadServer
+
+
+@pytest.fixture
+def server(temp_dir):
+    """Serve a temporary directory on a free port."""
+    (temp_dir / "index.html").write_text("<html><body><p>Paper</p></body></html>")
+    (temp_dir / "style.css").write_text("p{}")
+    live = LiveReloadServer(str(temp_dir), port=0)
+    live.start()
+    yield live
+    live.stop()
+
+
+class TestLiveReloadServer:
+    """Test cases for LiveReloadServer."""
+
+    def test_pages_get_the_reload_script(self, server):
+        """Test that pages listen for reloads and other files are unchanged."""
+        with urllib.request.urlopen(server.url) as response:
+            page = response.read().decode("utf-8")
+        with urllib.request.urlopen(server.url + "style.css") as response:
+            css = response.read().decode("utf-8")
+
+        assert page.startswith("<html><body><p>Paper</p><script>")
+        assert f'new EventSource("{RELOAD_PATH}")' in page
+        assert page.endswith("</script></body></html>")
+        assert css == "p{}"
+
+    def test_directory_without_slash_is_redirected(self, server, temp_dir):
+        """Test that a directory is redirected to its path with a slash."""
+        (temp_dir / "figures").mkdir()
+        (temp_dir / "figures" / "index.html").write_text("<body>Figures</body>")
+        host, port = server.httpd.socket.getsockname()[:2]
+        connection = http.client.HTTPConnection(host, port, timeout=5)
+        connection.request("GET", "/figures?v=1")
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+
+        with urllib.request.urlopen(server.url + "figures/") as page:
+            body = page.read().decode("utf-8")
+
+        assert response.status == 301
+        assert response.getheader("Location") == "/figures/?v=1"
+        assert body.startswith("<body>Figures<script>")
+
+    def test_reload_event(self, server):
+        """Test that a rebuild sends a reload event to connected pages."""
+        with urllib.request.urlopen(server.url + RELOAD_PATH[1:], timeout=5) as events:
+            assert events.headers["Content-Type"] == "text/event-stream"
+            server.reload()
+
+            assert events.readline() == b"data: 1\n"
@@ -0,0 +1,59 @@
+"""Tests for build-time math rendering."""
+
+import os
+import sys
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from math_render import MathPrerenderer, is_display_block, to_mathml
+
+
+class TestMathPrerenderer:
+    """Test cases for MathPrerenderer."""
+
+    def test_inline_and_display_math(self):
+        """Test that every delimiter style is converted."""
+        renderer = MathPrerenderer()
+        html = renderer.render(r"a $x$ b $$y$$ c \(z\) d \[w\]")
+
+        assert "$" not in html
+        assert html.count('display="inline"') == 2
+        assert html.count('display="block"') == 2
+        assert renderer.converted == 4
+        assert renderer.fallbacks == 0
+
+    def test_escaped_dollars_are_kept(self):
+        """Test that escaped dollar signs are not treated as math."""
+        renderer = MathPrerenderer()
+        assert renderer.render(r"costs \$5 and \$6") == r"costs \$5 and \$6"
+        assert renderer.converted == 0
+
+    def test_unconvertible_span_falls_back(self):
+        """Test that spans latex2mathml cannot handle are kept as TeX."""
+        renderer = MathPrerenderer()
+        html = renderer.render(r"ok $x$ bad $\left( x$")
+
+        assert html.endswith(r'<span class="math-fallback">$\left( x$</span>')
+        assert renderer.converted == 1
+        assert renderer.fallbacks == 1
+
+
+class TestMathHelpers:
+    """Test cases for the math helper functions."""
+
+    def test_to_mathml(self):
+        """Test conversion of single expressions."""
+        assert to_mathml("x", display=True).startswith("<math")
+        assert 'display="block"' in to_mathml("x", display=True)
+        assert to_mathml(r"\unknowncommand{x}") is None
+
+    def test_is_display_block(self):
+        """Test recognizing paragraphs that are a single display formula."""
+        block = to_mathml("x", display=True)
+        inline = to_mathml("y")
+
+        assert is_display_block(block)
+        assert not is_display_block(inline)
+        assert not is_display_block(block + " text")
+        assert not is_display_block(block + inline)
@@ -0,0 +1,164 @@
+"""Tests for build-time minification."""
+
+import os
+import sys
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from minify import (
+    inline_critical_css,
+    minify_css,
+    minify_html,
+    minify_js,
+    minify_tree,
+)
+
+
+class TestMinifyCss:
+    """Test cases for minify_css."""
+
+    def test_whitespace_and_comments(self):
+        """Test that comments and insignificant whitespace are removed."""
+        css = """
+/* Header */
+.paper-header > h1,
+.paper-title {
+    font-family: 'Times New Roman', serif;
+    margin: 0 auto;
+}
+@media (max-width: 768px) {
+    body { padding: 3%; }
+}
+"""
+        assert minify_css(css) == (
+            ".paper-header>h1,.paper-title{font-family:'Times New Roman',serif;"
+            "margin:0 auto}@media (max-width:768px){body{padding:3%}}"
+        )
+
+    def test_strings_and_licenses_are_kept(self):
+        """Test that strings and /*! comments survive minification."""
+        css = '/*! MIT */ a::after { content: " ;  } /* x */ "; }'
+
+        assert minify_css(css) == '/*! MIT */ a::after{content:" ;  } /* x */ "}'
+
+
+class TestMinifyJs:
+    """Test cases for minify_js."""
+
+    def test_comments_and_indentation(self):
+        """Test that comments and indentation go but line breaks stay."""
+        js = """
+// Set up
+function f(a) {
+    /* block */
+    return a   // trailing
+}
+"""
+        assert minify_js(js) == "function f(a) {\nreturn a\n}"
+
+    def test_literals_are_kept(self):
+        """Test that strings, templates and regexes are left unchanged."""
+        js = "x = '//  no';\ny = `a\n\n    b`;\nz = /[/]  +/g.test(s) / 2;"
+
+        assert minify_js(js) == js
+
+    def test_division_is_not_a_regex(self):
+        """Test that divisions are not mistaken for regex literals."""
+        assert minify_js("a = b / c;  d = e / f;") == "a = b / c; d = e / f;"
+
+
+class TestMinifyHtml:
+    """Test cases for minify_html."""
+
+    def test_whitespace_is_collapsed(self):
+        """Test that indentation between blocks is removed."""
+        html = """
+<section class="abstract">
+    <h2>Abstract</h2>
+    <p>Some   <strong>bold</strong>
+       text</p>
+</section>
+<!-- note -->
+"""
+        assert minify_html(html) == (
+            '<section class="abstract"><h2>Abstract</h2>'
+            "<p>Some <strong>bold</strong> text</p></section>"
+        )
+
+    def test_preformatted_content_and_math_are_kept(self):
+        """Test that pre, code and math keep their whitespace."""
+        html = "<p>Let  $a   +  b$  and\n<code>x   y</code></p>\n<pre>\n  k\n</pre>"
+
+        assert minify_html(html) == (
+            "<p>Let $a   +  b$ and <code>x   y</code></p><pre>\n  k\n</pre>"
+        )
+
+    def test_inline_scripts_and_styles_are_minified(self):
+        """Test that inline CSS and JavaScript are minified too."""
+        html = (
+            "<style>\n  a { color: red; }\n</style><script>\n  // x\n  go();</script>"
+        )
+
+        assert minify_html(html) == "<style>a{color:red}</style><script>go();</script>"
+
+
+class TestCriticalCss:
+    """Test cases for inline_critical_css."""
+
+    PAGE = (
+        '<html><head><link rel="stylesheet" href="assets/style.css">'
+        '<link rel="stylesheet" href="https://cdn.example/all.css"></head>'
+        '<body><header class="paper-header"><h1 class="paper-title">T</h1>'
+        '</header><main class="paper-content"><figure class="figure"></figure>'
+        "</main></body></html>"
+    )
+
+    def test_above_the_fold_rules_are_inlined(self):
+        """Test that only rules for the header are inlined."""
+        css = (
+            "body{margin:0}.paper-title:hover{color:red}.figure img{width:1px}"
+            ".logo{background:url(logo.png)}"
+            "@media (max-width:768px){.paper-header h1{font-size:1em}.figure{x:y}}"
+            "@font-face{font-family:A}"
+        )
+        stylesheets = {"assets/style.css": css}
+
+        html = inline_critical_css(self.PAGE, stylesheets.get)
+
+        assert (
+            "<style>body{margin:0}.paper-title:hover{color:red}"
+            "@media (max-width:768px){.paper-header h1{font-size:1em}}</style>"
+        ) in html
+        assert '<link rel="preload" href="assets/style.css" as="style"' in html
+        assert '<noscript><link rel="stylesheet" href="assets/style.css">' in html
+        assert '<link rel="stylesheet" href="https://cdn.example/all.css">' in html
+
+    def test_relative_urls_are_rebased(self):
+        """Test that inlined url() references still point at the assets."""
+        css = ".paper-header{background:url('bg.png')}"
+
+        html = inline_critical_css(self.PAGE, {"assets/style.css": css}.get)
+
+        assert "url('assets/bg.png')" in html
+
+
+class TestMinifyTree:
+    """Test cases for minify_tree."""
+
+    def test_minified_copies_keep_mtime(self, temp_dir):
+        """Test that minified files keep their source's modification time."""
+        src = temp_dir / "src"
+        src.mkdir()
+        (src / "style.css").write_text("a {  color: red;  }")
+        (src / "logo.png").write_bytes(b"png")
+
+        report = minify_tree(str(src), str(temp_dir / "dst"))
+
+        assert report == [("style.css", 19, 12)]
+        assert (temp_dir / "dst" / "style.css").read_text() == "a{color:red}"
+        assert (temp_dir / "dst" / "logo.png").read_bytes() == b"png"
+        assert (
+            os.stat(temp_dir / "dst" / "style.css").st_mtime_ns
+            == os.stat(src / "style.css").st_mtime_ns
+        )
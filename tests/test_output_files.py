@@ -0,0 +1,60 @@
+"""Tests for the output layer of the published site."""
+
+import os
+import sys
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from output_files import OutputChanges, write_atomic
+
+
+class TestWriteAtomic:
+    """Test cases for write_atomic."""
+
+    def test_identical_content_is_not_rewritten(self, temp_dir):
+        """Test that a file with the same content keeps its mtime."""
+        path = temp_dir / "index.html"
+
+        assert write_atomic(str(path), ["<p>", "a</p>"]) is True
+        os.utime(path, ns=(1, 1))
+
+        assert write_atomic(str(path), ["<p>a", "</p>"]) is False
+        assert os.stat(path).st_mtime_ns == 1
+        assert os.listdir(temp_dir) == ["index.html"]
+
+    def test_changed_content_is_replaced(self, temp_dir):
+        """Test that different content of the same size is written."""
+        path = temp_dir / "index.html"
+        path.write_text("<p>a</p>")
+
+        assert write_atomic(str(path), ["<p>b</p>"]) is True
+        assert path.read_text() == "<p>b</p>"
+
+
+class TestOutputChanges:
+    """Test cases for OutputChanges."""
+
+    def test_changes(self, temp_dir):
+        """Test that added, modified and removed files are listed."""
+        (temp_dir / "assets").mkdir()
+        (temp_dir / "index.html").write_text("old")
+        (temp_dir / "bibtex.html").write_text("same")
+        (temp_dir / "assets" / "style.1.css").write_text("a{}")
+        changes = OutputChanges(str(temp_dir))
+
+        write_atomic(str(temp_dir / "index.html"), ["new"])
+        write_atomic(str(temp_dir / "bibtex.html"), ["same"])
+        os.unlink(temp_dir / "assets" / "style.1.css")
+        (temp_dir / "assets" / "style.2.css").write_text("b{}")
+
+        assert changes.changes() == [
+            ("D", "assets/style.1.css"),
+            ("A", "assets/style.2.css"),
+            ("M", "index.html"),
+        ]
+
+        changes.write(str(temp_dir / "changes.txt"))
+        assert (temp_dir / "changes.txt").read_text() == (
+            "D\tassets/style.1.css\nA\tassets/style.2.css\nM\tindex.html\n"
+        )
@@ -0,0 +1,51 @@
+"""Tests for the page template environment."""
+
+import os
+import sys
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from page_templates import template_environment
+
+
+class TestTemplateEnvironment:
+    """Test cases for template_environment."""
+
+    def test_project_templates_override_defaults(self, temp_dir):
+        """Test that a project template replaces the default of the same name."""
+        (temp_dir / "partials").mkdir()
+        (temp_dir / "partials" / "footer.html").write_text("<footer>Mine</footer>")
+
+        templates = template_environment([str(temp_dir)])
+
+        assert templates.get_template("partials/footer.html").render() == (
+            "<footer>Mine</footer>"
+        )
+        # Templates the project does not override come from the defaults
+        assert "paper-header" in templates.get_template("partials/header.html").render(
+            title="T", authors=[], affiliations=[]
+        )
+
+    def test_bytecode_is_cached(self, temp_dir):
+        """Test that compiled templates are stored and reused."""
+        (temp_dir / "page.html").write_text("<p>{{ text }}</p>")
+        cache_dir = str(temp_dir / "cache")
+
+        template_environment([str(temp_dir)], cache_dir).get_template("page.html")
+        cached = os.listdir(temp_dir / "cache" / "templates")
+        templates = template_environment([str(temp_dir)], cache_dir)
+
+        assert len(cached) == 1
+        assert templates.get_template("page.html").render(text="a") == "<p>a</p>"
+
+    def test_changed_template_is_recompiled(self, temp_dir):
+        """Test that editing a template invalidates its cached bytecode."""
+        (temp_dir / "page.html").write_text("old")
+        cache_dir = str(temp_dir / "cache")
+        template_environment([str(temp_dir)], cache_dir).get_template("page.html")
+
+        (temp_dir / "page.html").write_text("new")
+        templates = template_environment([str(temp_dir)], cache_dir)
+
+        assert templates.get_template("page.html").render() == "new"
@@ -0,0 +1,61 @@
+"""Tests for the synthetic paper generator."""
+
+import os
+import sys
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from latex_to_html import LatexToHtmlConverter
+from paper_corpus import SIZES, PaperSpec, generate_paper, write_project
+
+
+class TestGeneratePaper:
+    """Test cases for generate_paper."""
+
+    def test_size_is_configurable(self):
+        """Test that the paper has the requested number of each construct."""
+        spec = PaperSpec(sections=3, subsections=2, paragraphs=2, equations=3)
+        paper = generate_paper(spec)
+
+        assert paper.count("\\section{") == 3
+        assert paper.count("\\subsection{") == 6
+        assert paper.count("\\begin{equation}") == 27
+        assert paper.count("\\begin{figure}") == 1
+        assert "\\cite{" in paper
+        assert "\\emph{" in paper
+
+    def test_same_seed_same_paper(self):
+        """Test that papers are reproducible and differ between seeds."""
+        assert generate_paper(PaperSpec()) == generate_paper(PaperSpec())
+        assert generate_paper(PaperSpec()) != generate_paper(PaperSpec(seed=1))
+
+    def test_paper_converts(self, project_dir):
+        """Test that the converter finds every section and citation."""
+        spec = SIZES["small"]
+        converter = LatexToHtmlConverter()
+        converter.section_cache = None
+
+        parsed = converter._parse_latex(generate_paper(spec))
+
+        assert len(parsed["sections"]) == spec.sections * (1 + spec.subsections)
+        assert len(parsed["figures"]) == spec.figures
+        assert converter.citation_map
+
+
+class TestWriteProject:
+    """Test cases for write_project."""
+
+    def test_project_layout(self, temp_dir):
+        """Test that the paper, bibliography, figures and config are written."""
+        main_tex = write_project(str(temp_dir), PaperSpec(figures=2, citations=1))
+
+        assert main_tex == str(temp_dir / "src" / "paper" / "main.tex")
+        assert (temp_dir / "config.yaml").exists()
+        assert (temp_dir / "src" / "paper" / "bibliography.bib").read_text().count(
+            "@article"
+        ) == 4
+        assert sorted(os.listdir(temp_dir / "src" / "paper" / "figures")) == [
+            "figure1.png",
+            "figure2.png",
+        ]
@@ -0,0 +1,142 @@
+"""Tests for the LaTeX render server."""
+
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import bibliography
+from latex_to_html import LatexToHtmlConverter
+from render_server import RenderCache, RenderServer
+
+
+def _paper(*keys):
+    """Return a one-section paper citing ``keys`` in order."""
+    cites = " ".join(rf"\cite{{{key}}}" for key in keys)
+    return rf"\begin{{document}}\section{{Results}}Text {cites}.\end{{document}}"
+
+
+def _post(server, source):
+    """Render LaTeX source and return the page and the cache header."""
+    request = urllib.request.Request(
+        server.url + "render", data=source.encode("utf-8"), method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read().decode("utf-8"), response.headers["X-Render-Cache"]
+
+
+@pytest.fixture
+def server():
+    """Serve rendering on a free port."""
+    converter = LatexToHtmlConverter()
+    converter.section_cache = None
+    render = RenderServer(converter, port=0, cache_size=2)
+    render.start()
+    yield render
+    render.stop()
+
+
+class TestRenderCache:
+    """Test cases for RenderCache."""
+
+    def test_least_recently_used_are_evicted(self):
+        """Test that the cache keeps the most recently used pages."""
+        cache = RenderCache(2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        assert cache.get("a") == "A"
+        cache.put("c", "C")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "A"
+        assert cache.get("c") == "C"
+        assert len(cache) == 2
+        assert (cache.hits, cache.misses) == (3, 1)
+
+
+@pytest.mark.usefixtures("project_dir")
+class TestRenderServer:
+    """Test cases for RenderServer."""
+
+    def test_render_is_cached_by_content(self, server):
+        """Test that rendering the same source again is a cache hit."""
+        first, status = _post(server, _paper("a"))
+        again, cached = _post(server, _paper("a"))
+        with urllib.request.urlopen(server.url + "health") as response:
+            health = json.load(response)
+
+        assert (status, cached) == ("miss", "hit")
+        assert first == again
+        assert "<h2>Results</h2>" in first
+        assert health == {"status": "ok", "entries": 1, "hits": 1, "misses": 1}
+
+    def test_empty_source_is_rejected(self, server):
+        """Test that a request without LaTeX is a client error."""
+        with pytest.raises(urllib.error.HTTPError) as error:
+            _post(server, "  ")
+        assert error.value.code == 400
+
+    def test_concurrent_requests_are_numbered_separately(self, server):
+        """Test that concurrent documents each number citations from one."""
+        sources = [_paper(f"key{i}", f"other{i}") for i in range(8)]
+        with ThreadPoolExecutor(8) as executor:
+            pages = list(executor.map(lambda source: _post(server, source)[0], sources))
+
+        for page in pages:
+            assert page.count(">[1]</span>") == 1
+            assert page.count(">[2]</span>") == 1
+            assert ">[3]</span>" not in page
+
+    def test_edited_bibliography_is_rendered_again(self, temp_dir):
+        """Test that editing a bibliography the source reads is a cache miss."""
+        converter = LatexToHtmlConverter()
+        converter.section_cache = None
+        render = RenderServer(converter, port=0, base_dir=temp_dir)
+        bib = os.path.join(temp_dir, "refs.bib")
+        source = _paper("a").replace(
+            r"\end{document}", r"\bibliography{refs}\end{document}"
+        )
+        with open(bib, "w") as f:
+            f.write("@article{a, title={First Title}, author={Doe, Jane}, year={2020}}")
+        first, status = render.render(source)
+        with open(bib, "w") as f:
+            f.write(
+                "@article{a, title={Second Title}, author={Doe, Jane}, year={2020}}"
+            )
+        second, cached = render.render(source)
+        render.httpd.server_close()
+
+        assert (status, cached) == (False, False)
+        assert "First Title" in first
+        assert "Second Title" in second
+
+    def test_bibliography_is_parsed_once(self, temp_dir, monkeypatch):
+        """Test that different sources reading one bibliography share its parse."""
+        loads = []
+        load = bibliography.load_bibliography
+        monkeypatch.setattr(
+            bibliography,
+            "load_bibliography",
+            lambda *args: loads.append(args[0]) or load(*args),
+        )
+        converter = LatexToHtmlConverter()
+        converter.section_cache = None
+        render = RenderServer(converter, port=0, base_dir=temp_dir)
+        with open(os.path.join(temp_dir, "refs.bib"), "w") as f:
+            f.write("@article{a, title={Warm Title}, author={Doe, Jane}, year={2020}}")
+
+        pages = [
+            render.render(_paper(*keys) + r"\bibliography{refs}")[0]
+            for keys in (("a",), ("a", "b"))
+        ]
+        render.httpd.server_close()
+
+        assert len(loads) == 1
+        assert all("Warm Title" in page for page in pages)
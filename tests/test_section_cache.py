@@ -0,0 +1,89 @@
+"""Tests for the per-section conversion cache."""
+
+import os
+import sys
+
+# Add scripts directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from latex_to_html import LatexToHtmlConverter
+from section_cache import SectionCache
+
+DOCUMENT = r"""
+\section{Introduction}
+Intro text \cite{first}.
+\section{Method}
+Method text \cite{second} and \cite{first}.
+"""
+
+
+class TestSectionCache:
+    """Test cases for SectionCache."""
+
+    def test_put_and_get(self, temp_dir):
+        """Test storing and reading back an entry."""
+        cache = SectionCache(str(temp_dir))
+        key = cache.key(r"\textbf{text}")
+        entry = {"content": "<strong>text</strong>", "citations": []}
+
+        assert cache.get(key) is None
+        cache.put(key, entry)
+
+        assert cache.get(key) == entry
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_key_depends_on_settings(self, temp_dir):
+        """Test that different settings produce different keys."""
+        first = SectionCache(str(temp_dir), settings="a")
+        second = SectionCache(str(temp_dir), settings="b")
+
+        assert first.key("text") == first.key("text")
+        assert first.key("text") != second.key("text")
+
+    def test_corrupt_entry_is_a_miss(self, temp_dir):
+        """Test that unreadable entries are treated as misses."""
+        cache = SectionCache(str(temp_dir))
+        key = cache.key("text")
+        cache.put(key, {"content": "", "citations": []})
+        cache._path(key).write_text("{not json")
+
+        assert cache.get(key) is None
+
+
+class TestIncrementalConversion:
+    """Test cases for converting documents with the section cache."""
+
+    def test_cache_dir_is_relative_to_config(self, temp_dir, tmp_path, monkeypatch):
+        """Test that build.cache_dir is found next to the configuration."""
+        (temp_dir / "config.yaml").write_text("build:\n  cache_dir: .cache\n")
+        monkeypatch.chdir(tmp_path)
+
+        converter = LatexToHtmlConverter(str(temp_dir / "config.yaml"))
+
+        assert converter.cache_dir == str(temp_dir / ".cache")
+
+    def test_unchanged_sections_are_reused(self, temp_dir):
+        """Test that a second conversion reuses every section."""
+        first = LatexToHtmlConverter(cache_dir=str(temp_dir))
+        sections = first._extract_sections(DOCUMENT)
+
+        second = LatexToHtmlConverter(cache_dir=str(temp_dir))
+        assert second._extract_sections(DOCUMENT) == sections
+        assert second.section_cache.hits == 2
+        assert second.section_cache.misses == 0
+
+    def test_citation_numbers_follow_earlier_edits(self, temp_dir, project_dir):
+        """Test that cached sections are renumbered when earlier ones change."""
+        converter = LatexToHtmlConverter(cache_dir=str(temp_dir))
+        converter._extract_sections(DOCUMENT)
+
+        edited = DOCUMENT.replace("Intro text", r"Intro \cite{new} text")
+        cached = LatexToHtmlConverter(cache_dir=str(temp_dir))
+        sections = cached._extract_sections(edited)
+        uncached = LatexToHtmlConverter()
+        uncached.section_cache = None
+
+        assert cached.section_cache.hits == 1
+        assert sections == uncached._extract_sections(edited)
+        assert cached.citation_map == {"new": 1, "first": 2, "second": 3}
+        assert "[3]" in sections[1]["content"]